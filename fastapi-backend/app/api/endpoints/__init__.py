@@ -6,6 +6,8 @@ from .tts import router as tts_router
 from .roleplay import router as roleplay_router
 from .health import router as health_router
 from .memory import router as memory_router
+from .chat import router as chat_router
+from .batch import router as batch_router
 
 router = APIRouter()
 
@@ -14,3 +16,5 @@ router.include_router(tts_router, prefix="/tts", tags=["TTS"])
 router.include_router(roleplay_router, prefix="/roleplay", tags=["Role Play"])
 router.include_router(health_router, prefix="/health", tags=["Health"])
 router.include_router(memory_router, prefix="/memory", tags=["Memory"])
+router.include_router(chat_router, prefix="/chat", tags=["Chat"])
+router.include_router(batch_router, prefix="/batch", tags=["Batch"])
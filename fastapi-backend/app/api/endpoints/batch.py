@@ -0,0 +1,84 @@
+"""
+Batch Job Endpoints (offline evaluation runs)
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
+
+from app.config.languages import LANGUAGES
+from app.utils.logger import get_logger
+
+log = get_logger("batch_endpoints")
+router = APIRouter()
+
+LEVELS = ("easy", "medium", "fast")
+
+class RolePlaySpec(BaseModel):
+    template: str = "school"
+    organization_name: str = ""
+    organization_details: str = ""
+    role_title: str = ""
+
+class ConversationSpec(BaseModel):
+    id: Optional[str] = None
+    turns: List[str]
+    language: Optional[str] = None
+    level: Optional[str] = None
+    voice: Optional[str] = None
+    role_play: Optional[RolePlaySpec] = None
+
+class BatchJobRequest(BaseModel):
+    conversations: List[ConversationSpec]
+    name: Optional[str] = None
+    save_audio: bool = True
+
+def get_manager(request: Request):
+    manager = getattr(request.app.state, "batch_jobs", None)
+    if manager is None:
+        raise HTTPException(status_code=503, detail="Batch jobs not initialized")
+    return manager
+
+def get_job(request: Request, job_id: str):
+    job = get_manager(request).get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    return job
+
+@router.post("/jobs")
+async def create_batch_job(body: BatchJobRequest, request: Request):
+    """Run scripted conversations through the chat pipeline; results are written as they finish"""
+    manager = get_manager(request)
+    if not body.conversations:
+        raise HTTPException(status_code=400, detail="No conversations")
+    for index, conversation in enumerate(body.conversations):
+        if not conversation.turns or not all(turn.strip() for turn in conversation.turns):
+            raise HTTPException(status_code=400, detail=f"Conversation {index} has an empty turn list or turn")
+        if conversation.language is not None and conversation.language not in LANGUAGES:
+            raise HTTPException(status_code=400, detail=f"Conversation {index}: unknown language {conversation.language}")
+        if conversation.level is not None and conversation.level not in LEVELS:
+            raise HTTPException(status_code=400, detail=f"Conversation {index}: level must be one of {', '.join(LEVELS)}")
+    job = await manager.submit([c.model_dump() for c in body.conversations], body.save_audio, body.name)
+    return {"status": "success", **job.progress()}
+
+@router.get("/jobs")
+async def list_batch_jobs(request: Request):
+    """Progress of all batch jobs"""
+    manager = get_manager(request)
+    return {
+        "status": "success",
+        **manager.get_stats(),
+        "jobs": [job.progress() for job in manager.jobs.values()]
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_batch_job(job_id: str, request: Request):
+    """Progress of one batch job"""
+    return {"status": "success", **get_job(request, job_id).progress()}
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_batch_job(job_id: str, request: Request):
+    """Stop a batch job (results written so far are kept)"""
+    job = get_job(request, job_id)
+    await get_manager(request).cancel(job_id)
+    return {"status": "success", **job.progress()}
@@ -0,0 +1,167 @@
+"""
+Text Chat Endpoints (Server-Sent Events)
+
+For clients that cannot keep a WebSocket open (kiosks, server-to-server
+integrations, proxies that mishandle upgrades). A turn posted to
+``/chat/stream`` runs through the same ``ChatHandler`` as the WebSocket, so
+the client's live memory (and its turn lock), the LLM scheduler and its
+connection pools, the response cache and TTS are shared. The handler's messages are streamed as events named after
+their ``type``.
+"""
+import asyncio
+import base64
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+from app.api.websocket.channel import MessageChannel
+from app.config.settings import settings
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+log = get_logger("chat_endpoints")
+router = APIRouter()
+
+AUDIO_MODES = ("inline", "url")
+
+class ChatTurnRequest(BaseModel):
+    client_id: str
+    text: str
+    language: Optional[str] = None
+    level: Optional[str] = None
+    voice: Optional[str] = None
+    # "inline": base64 in each ai_audio_chunk event; "url": fetch from /chat/audio/{id}
+    audio: str = "inline"
+
+class AudioClipStore:
+    """Reply audio streamed as URLs, fetchable for ``CHAT_SSE_AUDIO_TTL_S``"""
+
+    def __init__(self, ttl_s: Optional[float] = None, max_clips: Optional[int] = None):
+        self.ttl_s = ttl_s or settings.CHAT_SSE_AUDIO_TTL_S
+        self.max_clips = max_clips or settings.CHAT_SSE_AUDIO_MAX_CLIPS
+        # clip id -> (stored at, wav bytes)
+        self._clips: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def put(self, audio: bytes) -> str:
+        now = time.monotonic()
+        self._prune(now)
+        clip_id = uuid.uuid4().hex
+        self._clips[clip_id] = (now, audio)
+        while len(self._clips) > self.max_clips:
+            self._clips.popitem(last=False)
+        return clip_id
+
+    def get(self, clip_id: str) -> Optional[bytes]:
+        self._prune(time.monotonic())
+        clip = self._clips.get(clip_id)
+        return clip[1] if clip is not None else None
+
+    def _prune(self, now: float):
+        while self._clips and now - next(iter(self._clips.values()))[0] > self.ttl_s:
+            self._clips.popitem(last=False)
+
+clips = AudioClipStore()
+
+class SSEChannel(MessageChannel):
+    """ChatHandler sends to it, the response streams from it"""
+
+    def __init__(self, audio_mode: str, audio_path):
+        super().__init__()
+        self.audio_mode = audio_mode
+        # clip id -> URL path of the audio endpoint
+        self.audio_path = audio_path
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_message(self, payload: Dict[str, Any]):
+        self.queue.put_nowait(payload)
+
+    def close(self):
+        super().close()
+        self.queue.put_nowait(None)
+
+    def event(self, payload: Dict[str, Any]) -> str:
+        """One handler message as an SSE event"""
+        if payload.get("type") == "ai_audio_chunk" and self.audio_mode == "url" and payload.get("audio_base64"):
+            # The handler's dict, not a decoded copy: leave it as it was sent
+            payload = dict(payload)
+            audio = base64.b64decode(payload.pop("audio_base64"))
+            payload["audio_url"] = self.audio_path(clips.put(audio))
+        return format_event(payload.get("type", "message"), payload)
+
+def format_event(event: str, payload: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+async def stream_turn(handler, body: ChatTurnRequest, request: Request):
+    """Run one turn through the WebSocket pipeline and yield its messages as SSE"""
+    conn_id = f"sse-{uuid.uuid4().hex[:8]}"
+    cid = handler.client_key(body.client_id)
+    channel = SSEChannel(body.audio, lambda clip_id: request.app.url_path_for("get_chat_audio", clip_id=clip_id))
+    # The same memory object as the client's WebSocket, if it has one open;
+    # the turn waits for any turn of that client already running
+    client = handler.attach_client(cid, conn_id)
+    turn = None
+    try:
+        prefs = {key: value for key, value in (("language", body.language), ("level", body.level),
+                                               ("voice", body.voice)) if value is not None}
+        if prefs:
+            await handler.handle_client_prefs(channel, prefs, client.mem, client.mem_store, conn_id)
+        turn = handler.start_turn(conn_id, handler.handle_final_transcript(
+            channel, {"text": body.text}, client.mem, client.mem_store, conn_id
+        ))
+        turn.add_done_callback(lambda _: channel.close())
+        metrics.incr("chat_sse_turns")
+        log.info(f"[{conn_id}] 📨 Text chat turn for {cid} (audio={body.audio})")
+        while True:
+            try:
+                payload = await asyncio.wait_for(channel.queue.get(), settings.CHAT_SSE_KEEPALIVE_S)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if payload is None:
+                break
+            yield channel.event(payload)
+        if turn.done():
+            yield format_event("done", {"type": "done", "client_id": cid})
+    finally:
+        # Client went away mid-reply: stop generating, like a WebSocket disconnect
+        if turn is not None and not turn.done():
+            metrics.incr("chat_sse_disconnects")
+            turn.cancel()
+            await asyncio.gather(turn, return_exceptions=True)
+        handler.prefiller.forget(conn_id)
+        handler.speculator.forget(conn_id)
+        handler.release_client(cid)
+
+@router.post("/stream")
+async def stream_chat(body: ChatTurnRequest, request: Request):
+    """Send one utterance and stream the reply (text chunks, then audio) as Server-Sent Events"""
+    handler = getattr(request.app.state, "chat_handler", None)
+    if handler is None:
+        raise HTTPException(status_code=503, detail="Chat handler not initialized")
+    body.text = body.text.strip()
+    if not body.text:
+        raise HTTPException(status_code=400, detail="text is empty")
+    if body.audio not in AUDIO_MODES:
+        raise HTTPException(status_code=400, detail=f"audio must be one of {', '.join(AUDIO_MODES)}")
+    return StreamingResponse(
+        stream_turn(handler, body, request),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/audio/{clip_id}", name="get_chat_audio")
+async def get_chat_audio(clip_id: str):
+    """Audio of one reply chunk streamed with audio=url"""
+    audio = clips.get(clip_id)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio clip not found or expired")
+    return Response(content=audio, media_type="audio/wav")
@@ -1,11 +1,13 @@
 """
 Health Check Endpoints
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from app.config.settings import settings
 from app.utils.logger import get_logger
 from app.services.llm_service import LLMService
 from app.services.session_service import session_service
+from app.config.prompts import GRAMMAR_PROMPT
+from app.utils.metrics import metrics
 
 log = get_logger("health_endpoints")
 router = APIRouter()
@@ -42,35 +44,17 @@ async def test_grammar_correction():
         llm_service = LLMService()
         
         # Create test messages with grammar correction prompt
-        grammar_prompt = """IMPORTANT: If the user's input contains grammatical errors, spelling mistakes, or unclear language, respond in this EXACT format:
-
-GRAMMAR_CORRECTION_START
-INCORRECT: [exactly what the user said]
-CORRECT: [the grammatically correct version]
-GRAMMAR_CORRECTION_END
-
-Then provide your normal response to their question.
-
-EXAMPLE:
-User says: "what your name"
-You respond:
-GRAMMAR_CORRECTION_START
-INCORRECT: what your name
-CORRECT: What is your name?
-GRAMMAR_CORRECTION_END
-
-My name is SHCI. How can I help you?
-
-If the input is grammatically correct, respond normally without any grammar correction."""
-        
         messages = [
             {"role": "system", "content": "You are a helpful voice assistant."},
-            {"role": "system", "content": grammar_prompt},
+            {"role": "system", "content": GRAMMAR_PROMPT},
             {"role": "user", "content": test_input}
         ]
         
         # Get response
-        response = await llm_service.generate_response(messages)
+        try:
+            response = await llm_service.generate_response(messages)
+        finally:
+            await llm_service.close()
         
         # Check if grammar correction is present
         has_grammar_correction = "GRAMMAR_CORRECTION_START" in response
@@ -110,3 +94,22 @@ async def get_session_stats():
             "status": "error",
             "error": str(e)
         }
+
+@router.get("/metrics")
+async def get_metrics():
+    """Get pipeline metrics (turn latency, prompt evaluation, token counts)"""
+    return {
+        "status": "success",
+        "metrics": metrics.snapshot()
+    }
+
+@router.get("/llm")
+async def get_llm_backends(request: Request):
+    """Get LLM backend routing state (latency EWMA, circuit breaker, slots)"""
+    llm_service = getattr(request.app.state, "llm_service", None)
+    if llm_service is None:
+        return {"status": "error", "error": "LLM service not initialized"}
+    return {
+        "status": "success",
+        **llm_service.get_stats()
+    }
@@ -129,7 +129,8 @@ async def get_conversation_topics(client_id: str):
         raise HTTPException(status_code=500, detail=f"Error retrieving conversation topics: {str(e)}")
 
 @router.get("/conversation/{client_id}/context")
-async def get_conversation_context_for_llm(client_id: str, max_length: int = 1000):
+async def get_conversation_context_for_llm(client_id: str, max_tokens: Optional[int] = None,
+                                           max_length: Optional[int] = None):
     """Get optimized conversation context for LLM"""
     try:
         memory_store = MemoryStore(client_id)
@@ -147,12 +148,14 @@ async def get_conversation_context_for_llm(client_id: str, max_length: int = 100
         temp_memory = SessionMemory()
         temp_memory.load_from_dict(memory_data)
         
-        context = temp_memory.get_context_for_llm(max_length=max_length)
+        context = temp_memory.get_context_for_llm(max_tokens=max_tokens, max_length=max_length)
         
         return {
             "client_id": client_id,
             "context": context,
             "context_length": len(context),
+            "context_tokens": temp_memory.last_context_tokens,
+            "max_tokens": max_tokens or temp_memory.max_context_tokens,
             "max_length": max_length
         }
         
@@ -0,0 +1,33 @@
+"""
+Message Channels
+
+``ChatHandler`` talks to a WebSocket through ``client_state`` and
+``send_text``. A ``MessageChannel`` offers the same two, so turns can run
+through the full pipeline for clients that are not on a WebSocket (the SSE
+text chat, batch evaluation jobs). The handler hands channels each message
+as a dict through ``send_payload``, without encoding it, and awaits
+``on_message``, so a slow consumer holds up the turn like a slow socket would.
+"""
+import json
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, Dict
+
+class MessageChannel(ABC):
+    """Stands in for the WebSocket a ChatHandler turn sends to"""
+
+    def __init__(self):
+        self.client_state = SimpleNamespace(name="CONNECTED")
+
+    async def send_payload(self, payload: Dict[str, Any]):
+        await self.on_message(payload)
+
+    async def send_text(self, text: str):
+        await self.on_message(json.loads(text))
+
+    @abstractmethod
+    async def on_message(self, payload: Dict[str, Any]):
+        """Receive one message the handler sent"""
+
+    def close(self):
+        self.client_state.name = "DISCONNECTED"
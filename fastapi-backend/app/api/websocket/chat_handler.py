@@ -5,23 +5,56 @@ import json
 import uuid
 import asyncio
 import base64
+import copy
 import re
 import time
-from typing import Optional
+from contextlib import nullcontext
+from typing import Dict, Optional, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
-from collections import deque
+from collections import deque, OrderedDict
 
 from app.config.settings import settings
 from app.config.languages import LANGUAGES, DEFAULT_LANGUAGE
 from app.utils.logger import get_logger, log_exception
 from app.models.session_memory import SessionMemory, MemoryStore
-from app.services.llm_service import LLMService
+from app.services.llm_service import LLMService, LLMStreamStats
+from app.services.llm_scheduler import HIGH
 from app.services.tts_service import TTSService
 from app.services.database_service import DatabaseService
 from app.services.session_service import session_service
+from app.services.prompt_builder import PromptBuilder
+from app.services.summarizer import ConversationSummarizer
+from app.services.response_cache import ResponseCache
+from app.services.intent_router import IntentRouter
+from app.services.prefill import PromptPrefiller
+from app.services.speech_pipeline import SpeechPipeline
+from app.services.tts_chunk_policy import TTSChunkPolicy, TTSSpeedTracker
+from app.services.speculation import Speculator
+from app.services.filler_audio import FillerBank
+from app.services.turn_deadline import SLOController, TurnDeadline
+from app.api.websocket.channel import MessageChannel
+from app.api.websocket.outbound import OutboundQueue
+from app.api.websocket.replay import ReplayBuffer, REPLAYABLE
+from app.utils.metrics import metrics
+from app.utils.grammar_stream import GrammarCorrectionSplitter, format_correction
+from app.utils.length_controller import ResponseLengthController
+from app.utils.sentence_segmenter import SentenceSegmenter
+from app.config.prompts import LEVEL_STYLES
 
 log = get_logger("chat_handler")
 
+class LiveClient:
+    """The one in-memory SessionMemory of a client, shared by its WebSocket and HTTP turns"""
+    __slots__ = ("mem", "mem_store", "lock", "refs")
+
+    def __init__(self, mem: SessionMemory, mem_store: MemoryStore):
+        self.mem = mem
+        self.mem_store = mem_store
+        # One turn at a time changes the history
+        self.lock = asyncio.Lock()
+        # Connections and requests currently using it
+        self.refs = 0
+
 class ChatHandler:
     """Handles WebSocket chat connections and AI interactions"""
     
@@ -29,11 +62,54 @@ class ChatHandler:
         self.llm_service = llm_service
         self.tts_service = tts_service
         self.db_service = db_service
+        self.prompt_builder = PromptBuilder()
+        self.summarizer = ConversationSummarizer(llm_service)
+        self.response_cache = ResponseCache()
+        self.intent_router = IntentRouter()
+        # Real-time factor of each voice, shared by all connections
+        self.tts_speed = TTSSpeedTracker()
+        # Per-turn latency deadlines and the degradations that protect them
+        self.slo = SLOController(llm_service, self.tts_speed)
+        self.prefiller = PromptPrefiller(llm_service, self.prompt_builder)
+        # Per-connection writer tasks (see open_outbound)
+        self._outbound: Dict[int, OutboundQueue] = {}
+        # conn_id -> the connection's in-flight turn (see start_turn)
+        self._turns: Dict[str, asyncio.Task] = {}
+        # Sequence numbers and recent reply messages per client id, for resuming
+        self.replay = ReplayBuffer()
+        # id(websocket) -> client id
+        self._replay_keys: Dict[int, str] = {}
+        # client id -> (reply left running after its connection dropped, that socket)
+        self._detached: Dict[str, Tuple[asyncio.Task, WebSocket]] = {}
+        # id(dropped socket) -> the socket that resumed its reply
+        self._redirects: Dict[int, WebSocket] = {}
+        # client id -> its live memory (see attach_client); least recently used first
+        self._clients: "OrderedDict[str, LiveClient]" = OrderedDict()
+        self.max_idle_clients = 1000
+        # conn_id -> client id the WebSocket attached to
+        self._conn_clients: Dict[str, str] = {}
+        # LLM requests started from stable partial transcripts
+        self.speculator = Speculator()
+        # Pre-synthesized "let me think" clips for replies that are slow to start
+        self.fillers = FillerBank(tts_service)
+
+    async def close(self):
+        """Stop background work (pending summaries, prefills, speculative replies,
+        filler clips and detached replies)"""
+        detached = [task for task, _ in self._detached.values()]
+        for task in detached:
+            task.cancel()
+        await asyncio.gather(*detached, return_exceptions=True)
+        await self.speculator.close()
+        await self.fillers.close()
+        await self.prefiller.close()
+        await self.summarizer.close()
 
     async def handle_websocket(self, websocket: WebSocket):
         """Handle WebSocket connection with persistent session memory"""
         await websocket.accept()
         conn_id = uuid.uuid4().hex[:8]
+        self.open_outbound(websocket, conn_id)
         
         # Clean up expired sessions
         session_service.cleanup_expired_sessions()
@@ -60,14 +136,17 @@ class ChatHandler:
             if mem.total_interactions > 0:
                 # Returning session - send welcome back message
                 welcome_back_text = f"Welcome back! I remember our conversation about {', '.join(mem.conversation_topics[-3:]) if mem.conversation_topics else 'various topics'}. How can I help you today?"
-                await self.send_json(websocket, {"type": "ai_text", "text": welcome_back_text})
                 mem.add_history("assistant", welcome_back_text)
+                # Warm the model server's prompt cache while the greeting goes out
+                self.prefiller.schedule(mem, conn_id)
+                await self.send_json(websocket, {"type": "ai_text", "text": welcome_back_text})
                 log.info(f"[{conn_id}] 🔄 Welcome back - {mem.total_interactions} previous interactions")
             else:
                 # New session - send intro message
                 intro_text = LANGUAGES[mem.language]["intro_line"]
-                await self.send_json(websocket, {"type": "ai_text", "text": intro_text})
                 mem.add_history("assistant", intro_text)
+                self.prefiller.schedule(mem, conn_id)
+                await self.send_json(websocket, {"type": "ai_text", "text": intro_text})
                 log.info(f"[{conn_id}] 🆕 New session started")
             
             mem.greeted = True
@@ -130,9 +209,21 @@ class ChatHandler:
                         
                         if typ == "final_transcript":
                             log.info(f"[{conn_id}] 🎤 FINAL_TRANSCRIPT MESSAGE RECEIVED: {data}")
-                            await self.handle_final_transcript(websocket, data, mem, mem_store, conn_id)
+                            # Barge-in: a new utterance replaces the reply still in flight
+                            await self.interrupt_turn(websocket, conn_id, "new_transcript")
+                            self.start_turn(conn_id, self.handle_final_transcript(websocket, data, mem, mem_store, conn_id))
+                        elif typ in ("partial_transcript", "interim_transcript"):
+                            self.speculator.on_partial(
+                                conn_id, data.get("text", ""),
+                                lambda text: self.start_speculation(text, mem, conn_id)
+                            )
+                        elif typ == "interrupt":
+                            await self.interrupt_turn(websocket, conn_id, "client")
+                        elif typ == "resume":
+                            await self.handle_resume(websocket, data, conn_id)
                         elif typ == "client_prefs":
-                            await self.handle_client_prefs(websocket, data, mem, mem_store, conn_id)
+                            # Sending a client id switches to that client's shared memory
+                            mem, mem_store = await self.handle_client_prefs(websocket, data, mem, mem_store, conn_id)
                             
                     except Exception as e:
                         log_exception(log, f"[{conn_id}] control_message", e)
@@ -158,12 +249,166 @@ class ChatHandler:
                     log.info(f"[{conn_id}] 💾 Emergency memory save on error - {mem.total_interactions} interactions")
                 except:
                     pass
+        finally:
+            if not self.detach_turn(websocket, conn_id):
+                await self.interrupt_turn(websocket, conn_id, "disconnect", notify=False)
+                await self.close_outbound(websocket)
+            self.prefiller.forget(conn_id)
+            self.speculator.forget(conn_id)
+            if conn_id in self._conn_clients:
+                self.release_client(self._conn_clients.pop(conn_id))
+            else:
+                self.release_llm_session(mem.client_id or conn_id)
+
+    def start_turn(self, conn_id: str, coro) -> asyncio.Task:
+        """Run a turn as its own task so the receive loop keeps reading the socket"""
+        task = asyncio.create_task(coro)
+        self._turns[conn_id] = task
+
+        def forget(done: asyncio.Task):
+            if self._turns.get(conn_id) is done:
+                del self._turns[conn_id]
+
+        task.add_done_callback(forget)
+        return task
+
+    async def interrupt_turn(self, websocket: WebSocket, conn_id: str, reason: str, notify: bool = True) -> bool:
+        """Cancel the connection's in-flight turn (LLM stream and TTS jobs)
+
+        The client is told to flush the audio it has queued, and reply text and
+        audio still waiting in the send queue are dropped. When notifying, a
+        reply still running from the client's previous connection counts too.
+        """
+        task = self._turns.pop(conn_id, None)
+        key = self._replay_keys.get(id(websocket))
+        if (task is None or task.done()) and notify and key in self._detached:
+            task, _ = self._detached.pop(key)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        metrics.incr("turns_interrupted")
+        log.info(f"[{conn_id}] ✋ Turn interrupted ({reason})")
+        if notify:
+            outbound = self._outbound.get(id(websocket))
+            if outbound is not None:
+                outbound.discard({"ai_text_chunk", "ai_audio_chunk"})
+            await self.send_json(websocket, {"type": "ai_interrupted", "reason": reason, "flush_audio": True})
+        return True
+
+    def detach_turn(self, websocket: WebSocket, conn_id: str) -> bool:
+        """Let a reply in flight when the socket dropped finish into the replay buffer
+
+        The client can fetch it with a ``resume`` message after reconnecting
+        instead of asking again. Only for clients that sent their client id;
+        the reply is cancelled if it runs past ``REPLAY_TTL_S``.
+        """
+        key = self._replay_keys.get(id(websocket))
+        task = self._turns.get(conn_id)
+        if not self.replay.enabled or key is None or task is None or task.done():
+            return False
+        finisher = asyncio.create_task(self._finish_detached(websocket, key, task))
+        self._detached[key] = (finisher, websocket)
+        metrics.incr("turns_detached")
+        log.info(f"[{conn_id}] 📼 Connection dropped mid-reply, finishing it for resume by {key}")
+        return True
+
+    async def _finish_detached(self, websocket: WebSocket, key: str, task: asyncio.Task):
+        try:
+            await asyncio.wait_for(asyncio.shield(task), self.replay.ttl_s)
+        except asyncio.TimeoutError:
+            task.cancel()
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            await asyncio.gather(task, return_exceptions=True)
+            if self._detached.get(key, (None, None))[0] is asyncio.current_task():
+                del self._detached[key]
+            await self.close_outbound(websocket)
+
+    @staticmethod
+    def client_key(client_id) -> str:
+        """Client id as sent by the browser, made safe for storage keys"""
+        return re.sub(r"[^A-Za-z0-9_\-\.]", "_", str(client_id))[:64]
+
+    def bind_client(self, websocket: WebSocket, client_id) -> str:
+        """Number this socket's reply messages under the client's stable id"""
+        key = self.client_key(client_id)
+        self._replay_keys[id(websocket)] = key
+        return key
+
+    async def handle_resume(self, websocket: WebSocket, data: dict, conn_id: str):
+        """Replay the reply messages a reconnecting client missed"""
+        try:
+            last_seq = int(data.get("last_seq") or 0)
+        except (TypeError, ValueError):
+            last_seq = 0
+        key = self.client_key(data["client_id"]) if data.get("client_id") else self._replay_keys.get(id(websocket))
+        if key is None or not self.replay.enabled:
+            await self.send_json(websocket, {"type": "resume_complete", "replayed": 0, "last_seq": last_seq, "gap": True})
+            return
+        # Live messages of a detached reply wait until the missed ones are out
+        async with self.replay.lock(key):
+            self.bind_client(websocket, key)
+            if key in self._detached:
+                # The rest of the dropped connection's reply comes here
+                self._redirects[id(self._detached[key][1])] = websocket
+            missing, gap = self.replay.since(key, last_seq)
+            for payload in missing:
+                await self._send(websocket, payload)
+            await self._send(websocket, {
+                "type": "resume_complete",
+                "replayed": len(missing),
+                "last_seq": self.replay.last_seq(key),
+                "gap": gap,
+                "reply_in_progress": key in self._detached
+            })
+        log.info(f"[{conn_id}] 📼 Resumed {key} after seq {last_seq}: replayed {len(missing)} messages"
+                 + (" (some expired)" if gap else ""))
+
+    def open_outbound(self, websocket: WebSocket, conn_id: str) -> Optional[OutboundQueue]:
+        """Route this connection's messages through its own writer task"""
+        if not settings.WS_SEND_QUEUE_ENABLED:
+            return None
+        # Keyed by id(): Starlette's WebSocket is a Mapping and not hashable
+        outbound = self._outbound[id(websocket)] = OutboundQueue(websocket, conn_id).start()
+        return outbound
+
+    async def close_outbound(self, websocket: WebSocket):
+        self._replay_keys.pop(id(websocket), None)
+        self._redirects.pop(id(websocket), None)
+        outbound = self._outbound.pop(id(websocket), None)
+        if outbound is not None:
+            await outbound.close()
 
     async def send_json(self, websocket: WebSocket, payload: dict):
-        """Send JSON message through WebSocket"""
+        """Send JSON message through WebSocket
+
+        Reply messages of clients that sent their client id are numbered and
+        kept for replay; a dropped connection's reply goes to the socket that
+        resumed it.
+        """
+        key = self._replay_keys.get(id(websocket))
+        if key is not None and self.replay.enabled and payload.get("type") in REPLAYABLE:
+            async with self.replay.lock(key):
+                payload = self.replay.stamp(key, payload)
+                await self._send(self._redirects.get(id(websocket), websocket), payload)
+            return
+        await self._send(websocket, payload)
+
+    async def _send(self, websocket: WebSocket, payload: dict):
+        outbound = self._outbound.get(id(websocket))
+        if outbound is not None:
+            await outbound.send(payload)
+            return
         try:
             if websocket.client_state.name == "CONNECTED":
-                await websocket.send_text(json.dumps(payload))
+                if isinstance(websocket, MessageChannel):
+                    # Consumed as a dict: no need to encode it
+                    await websocket.send_payload(payload)
+                else:
+                    await websocket.send_text(json.dumps(payload))
             else:
                 log.warning("WebSocket connection is closed, cannot send message")
         except Exception as e:
@@ -178,48 +423,41 @@ class ChatHandler:
                 return
 
             log.info(f"[{conn_id}] 📝 Processing transcript: {transcript}")
+            # The latency budget starts when the user stops speaking
+            deadline = self.slo.new_deadline(mem.client_id or conn_id, mem.language, mem.voice, conn_id)
             
-            # Add to memory
-            mem.add_history("user", transcript)
-            
-            # Generate AI response
-            await self.generate_and_send_response(websocket, transcript, mem, mem_store, conn_id)
-            
-            # Save memory
-            if mem_store:
-                mem_store.save(mem)
+            # Turns of the same client (other tabs, the HTTP text chat) take turns
+            async with self.turn_lock(mem):
+                # Generate AI response (adds the transcript to memory)
+                await self.generate_and_send_response(websocket, transcript, mem, mem_store, conn_id, deadline)
+                
+                # Save memory
+                if mem_store:
+                    mem_store.save(mem)
                 
         except Exception as e:
             log_exception(log, f"[{conn_id}] final_transcript", e)
 
     async def handle_client_prefs(self, websocket: WebSocket, data: dict, mem: SessionMemory, 
                                 mem_store: Optional[MemoryStore], conn_id: str):
-        """Handle client preferences"""
+        """Handle client preferences
+        
+        Returns the memory (and its store) the connection uses from now on:
+        the client's shared live memory once it sent its client id.
+        """
         try:
             changed = False
             
-            if "client_id" in data and not mem.client_id:
-                cid = re.sub(r"[^A-Za-z0-9_\-\.]", "_", str(data["client_id"]))[:64]
-                mem.client_id = cid
-                mem_store = MemoryStore(cid)
-                
-                # Load persisted memory
-                persisted = mem_store.load()
-                if persisted:
-                    mem.load_from_dict(persisted)
-                    log.info(f"[{conn_id}] Loaded memory for {cid}")
-                
-                # Load role play config from database
-                mem.load_role_play_from_db(cid)
-                
-                # If role play is enabled in DB, ensure memory reflects it
-                db_config = self.db_service.get_role_play_config(cid)
-                if db_config and db_config.role_play_enabled:
-                    mem.role_play_enabled = True
-                    mem.role_play_template = db_config.role_play_template
-                    mem.organization_name = db_config.organization_name
-                    mem.organization_details = db_config.organization_details
-                    mem.role_title = db_config.role_title
+            if data.get("client_id"):
+                cid = self.bind_client(websocket, data["client_id"])
+                if self._conn_clients.get(conn_id) != cid:
+                    if conn_id in self._conn_clients:
+                        self.release_client(self._conn_clients.pop(conn_id))
+                    else:
+                        self.release_llm_session(mem.client_id or conn_id)
+                    client = self.attach_client(cid, conn_id)
+                    self._conn_clients[conn_id] = cid
+                    mem, mem_store = client.mem, client.mem_store
 
             if "language" in data:
                 new_language = data["language"]
@@ -253,9 +491,78 @@ class ChatHandler:
                         mem.history = mem.history[-mem._context_isolation_threshold:]
                     changed = True
                     log.info(f"[{conn_id}] Level={new_level} (was {old_level})")
+            
+            # Re-prefill if language, level or role play changed the static prompt
+            self.prefiller.schedule(mem, conn_id)
 
         except Exception as e:
             log_exception(log, f"[{conn_id}] client_prefs", e)
+        return mem, mem_store
+
+    def attach_client(self, cid: str, conn_id: str) -> LiveClient:
+        """The client's live memory, loaded from the store on first use
+        
+        Every path that runs turns for a client id (WebSocket, HTTP text chat)
+        uses this one object, so their turns land in the same history and
+        saving one never overwrites the other's. Call release_client when done.
+        """
+        client = self._clients.get(cid)
+        if client is None:
+            mem = SessionMemory(language=DEFAULT_LANGUAGE)
+            mem_store = self.restore_client_memory(mem, cid, conn_id)
+            client = self._clients[cid] = LiveClient(mem, mem_store)
+            self._prune_clients()
+        client.refs += 1
+        self._clients.move_to_end(cid)
+        return client
+
+    def release_client(self, cid: str):
+        client = self._clients.get(cid)
+        if client is not None:
+            client.refs = max(0, client.refs - 1)
+            if client.refs == 0:
+                self.release_llm_session(cid)
+
+    def release_llm_session(self, session_id: str):
+        """Free the model server slot of an LLM session that has ended"""
+        release = getattr(self.llm_service, "release_session", None)
+        if release is not None:
+            release(session_id)
+
+    def _prune_clients(self):
+        """Forget idle clients beyond ``max_idle_clients`` (their memory is saved after every turn)"""
+        idle = [cid for cid, client in self._clients.items() if client.refs == 0 and not client.lock.locked()]
+        for cid in idle[:max(0, len(idle) - self.max_idle_clients)]:
+            del self._clients[cid]
+
+    def turn_lock(self, mem: SessionMemory):
+        """Lock serializing the turns of ``mem``'s client (a no-op for unattached memory)"""
+        client = self._clients.get(mem.client_id) if mem.client_id else None
+        return client.lock if client is not None and client.mem is mem else nullcontext()
+
+    def restore_client_memory(self, mem: SessionMemory, cid: str, conn_id: str) -> MemoryStore:
+        """Load a client's persisted memory and role play config into ``mem``"""
+        mem.client_id = cid
+        mem_store = MemoryStore(cid)
+        
+        # Load persisted memory
+        persisted = mem_store.load()
+        if persisted:
+            mem.load_from_dict(persisted)
+            log.info(f"[{conn_id}] Loaded memory for {cid}")
+        
+        # Load role play config from database
+        mem.load_role_play_from_db(cid)
+        
+        # If role play is enabled in DB, ensure memory reflects it
+        db_config = self.db_service.get_role_play_config(cid) if self.db_service else None
+        if db_config and db_config.role_play_enabled:
+            mem.role_play_enabled = True
+            mem.role_play_template = db_config.role_play_template
+            mem.organization_name = db_config.organization_name
+            mem.organization_details = db_config.organization_details
+            mem.role_title = db_config.role_title
+        return mem_store
 
     async def handle_audio_data(self, websocket: WebSocket, msg: dict, mem: SessionMemory, 
                               conn_id: str, pre_buffer: deque, triggered: bool, 
@@ -265,24 +572,40 @@ class ChatHandler:
         pass
 
     async def generate_and_send_response(self, websocket: WebSocket, transcript: str, 
-                                       mem: SessionMemory, mem_store: Optional[MemoryStore], conn_id: str):
-        """Generate AI response with real-time streaming TTS"""
+                                       mem: SessionMemory, mem_store: Optional[MemoryStore], conn_id: str,
+                                       deadline: Optional[TurnDeadline] = None, use_cache: bool = True):
+        """Generate AI response with real-time streaming TTS
+
+        ``use_cache=False`` neither answers from nor fills the response cache
+        (batch evaluation turns must not see or leave cached replies).
+        """
+        pipeline = None
+        speculation = None
         try:
-            # Get language configuration
-            lang_config = LANGUAGES[mem.language]
-            persona = lang_config["persona"]
+            turn_start = time.perf_counter()
+            if deadline is None:
+                deadline = self.slo.new_deadline(mem.client_id or conn_id, mem.language, mem.voice, conn_id)
+            first_turn = self.prefiller.before_turn(conn_id)
             
             # Create context messages with enhanced conversation memory
+            # (collected before the current transcript is added to history)
             context_messages = self.llm_service.create_context_messages(mem.get_context_for_llm())
             
+            # Memory/identity questions are answered directly; repeated short
+            # utterances come from the response cache (its key depends on the
+            # last assistant turn, so look up before adding history)
+            cache_key = None
+            direct_response = self.intent_router.route(transcript, mem)
+            if direct_response is None and use_cache:
+                cache_key = self.response_cache.make_key(transcript, mem)
+                direct_response = self.response_cache.get(cache_key, deadline.cache_threshold())
+            
             # Add user message to memory
             mem.add_history("user", transcript)
             
             # Generate streaming AI response with real-time audio
             full_response = ""
             is_first_chunk = True
-            text_buffer = ""
-            word_count = 0
             
             # Send audio start signal
             await self.send_json(websocket, {
@@ -296,116 +619,124 @@ class ChatHandler:
             except:
                 pass  # Ignore pre-warm errors
             
-            # Get conversation summary for better context
-            conversation_summary = mem.get_conversation_summary()
-            
-            # Create enhanced system prompt with conversation context
-            enhanced_persona = f"""{persona}
-
-CONVERSATION CONTEXT:
-- User Name: {conversation_summary.get('user_name', 'Unknown')}
-- Session Duration: {conversation_summary.get('session_duration', 0):.1f} seconds
-- Total Interactions: {conversation_summary.get('total_interactions', 0)}
-- Topics Discussed: {', '.join(conversation_summary.get('topics_discussed', [])[-5:])}
-- Language: {conversation_summary.get('language', 'en')}
-- Difficulty Level: {conversation_summary.get('level', 'medium')}
-
-IMPORTANT: You are a VOICE agent with FULL CONVERSATION MEMORY. 
-- Remember previous conversations and topics discussed
-- Reference past interactions naturally when relevant
-- Keep responses SHORT (1-2 sentences max) but contextually aware
-- Speak naturally and concisely. No long explanations or detailed lists.
-- Use the user's name and conversation history to create a more personal experience."""
-            
-            # Create messages with enhanced system prompt
-            messages = [
-                {"role": "system", "content": enhanced_persona}
-            ]
-            
-            # Add grammar correction prompt
-            grammar_prompt = """IMPORTANT: If the user's input contains grammatical errors, spelling mistakes, or unclear language, respond in this EXACT format:
-
-GRAMMAR_CORRECTION_START
-INCORRECT: [exactly what the user said]
-CORRECT: [the grammatically correct version]
-GRAMMAR_CORRECTION_END
-
-Then provide your normal response to their question.
-
-EXAMPLE:
-User says: "what your name"
-You respond:
-GRAMMAR_CORRECTION_START
-INCORRECT: what your name
-CORRECT: What is your name?
-GRAMMAR_CORRECTION_END
-
-My name is SHCI. How can I help you?
-
-If the input is grammatically correct, respond normally without any grammar correction."""
-            
-            messages.append({"role": "system", "content": grammar_prompt})
-            messages.extend(context_messages)
-            messages.append({"role": "user", "content": transcript})
+            llm_stats = LLMStreamStats(context_tokens=mem.last_context_tokens)
+            if direct_response is not None:
+                log.info(f"[{conn_id}] ⚡ Answering without the LLM (intent router / response cache)")
+                text_source = self.replay_text(direct_response)
+                self.speculator.forget(conn_id)
+            else:
+                # A reply speculatively started from the partial transcript is
+                # reused if it was made for this transcript and this prompt
+                speculation = self.speculator.claim(
+                    conn_id, transcript, self.turn_signature(mem, context_messages, deadline)
+                )
+                if speculation is not None:
+                    llm_stats = speculation.stats
+                    text_source = speculation.stream()
+                else:
+                    text_source = self.stream_llm_reply(
+                        mem, context_messages, transcript, llm_stats, mem.client_id or conn_id,
+                        on_queued=lambda waited_ms: self.send_thinking(websocket, waited_ms, conn_id),
+                        deadline=deadline
+                    )
             
-            async for text_chunk in self.llm_service.generate_streaming_response(
-                messages=messages,
-                temperature=0.7,
-                max_tokens=100  # Reduced for faster response
-            ):
-                if text_chunk:
+            # Grammar corrections go to their own message and are never spoken
+            grammar_splitter = GrammarCorrectionSplitter()
+            # Ends the reply at a sentence boundary once the level budget is spent
+            length_control = ResponseLengthController.for_level(mem.level) if settings.LENGTH_CONTROL_ENABLED else None
+            spoken_text = ""
+            # The faster voice tier when the turn is short on budget
+            tts_voice = deadline.voice(mem.language, mem.voice)
+            # Segmenting, synthesis and audio sending run as concurrent stages;
+            # this loop only reads tokens, sends text and feeds the pipeline
+            pipeline = SpeechPipeline(
+                synthesize=lambda chunk: self.generate_audio_for_text_chunk(
+                    ' '.join(chunk.split()), mem, conn_id, voice=tts_voice
+                ),
+                emit_audio=lambda chunk, audio: self.send_audio_message(websocket, chunk, audio),
+                segmenter=SentenceSegmenter(mem.language),
+                workers=settings.TTS_PIPELINE_WORKERS,
+                max_pending=settings.TTS_PIPELINE_QUEUE,
+                policy=TTSChunkPolicy(self.tts_speed, tts_voice)
+            ).start()
+            filler = None
+            if self.fillers.enabled:
+                filler = asyncio.create_task(self.send_filler_when_slow(websocket, pipeline, mem, turn_start, conn_id))
+            try:
+                async for text_chunk in text_source:
+                    if not text_chunk:
+                        continue
                     full_response += text_chunk
-                    text_buffer += text_chunk
+                    speech_text, corrections = grammar_splitter.feed(text_chunk)
+                    for correction in corrections:
+                        await self.send_grammar_correction(websocket, correction, conn_id)
+                    if length_control is not None:
+                        speech_text = length_control.feed(speech_text)
+                        if length_control.done:
+                            # Closing the stream ends this loop and stops generation on the server
+                            await text_source.aclose()
+                            llm_stats.stopped_early = True
+                    if not speech_text:
+                        continue
+                    spoken_text += speech_text
                     
                     # Send text chunk to frontend for real-time display
                     await self.send_json(websocket, {
                         "type": "ai_text_chunk", 
-                        "text": text_chunk,
+                        "text": speech_text,
                         "is_final": False,
                         "is_first_chunk": is_first_chunk
                     })
                     is_first_chunk = False
-                    
-                    # Generate audio for text chunk if it contains complete sentences
-                    if self.should_generate_audio_chunk(text_buffer):
-                        # Clean up text for better speech
-                        clean_text = text_buffer.strip()
-                        # Remove extra spaces and normalize text
-                        clean_text = ' '.join(clean_text.split())
-                        
-                        audio_chunk = await self.generate_audio_for_text_chunk(
-                            clean_text, mem, conn_id
-                        )
-                        if audio_chunk:
-                            await self.send_json(websocket, {
-                                "type": "ai_audio_chunk",
-                                "text": clean_text,
-                                "audio_base64": audio_chunk,
-                                "audio_size": len(audio_chunk),
-                                "is_final": False
-                            })
-                            text_buffer = ""  # Clear buffer after generating audio
-            
-            # Generate audio for any remaining text
-            if text_buffer.strip():
-                # Clean up final text for better speech
-                clean_text = text_buffer.strip()
-                clean_text = ' '.join(clean_text.split())
+                    await pipeline.feed(speech_text)
                 
-                audio_chunk = await self.generate_audio_for_text_chunk(
-                    clean_text, mem, conn_id
-                )
-                if audio_chunk:
-                    await self.send_json(websocket, {
-                        "type": "ai_audio_chunk",
-                        "text": clean_text,
-                        "audio_base64": audio_chunk,
-                        "audio_size": len(audio_chunk),
-                        "is_final": False
-                    })
+                if not llm_stats.stopped_early:
+                    speech_text, corrections = grammar_splitter.flush()
+                    for correction in corrections:
+                        await self.send_grammar_correction(websocket, correction, conn_id)
+                    if length_control is not None:
+                        speech_text = length_control.feed(speech_text)
+                        length_control.finish()
+                    spoken_text += speech_text
+                    await pipeline.feed(speech_text)
+                
+                # Synthesize any remaining text and wait for the last audio chunk
+                await pipeline.finish()
+            finally:
+                if filler is not None:
+                    filler.cancel()
+                await pipeline.close()
+            first_audio_at = pipeline.first_audio_at
+            for synth_ms in pipeline.synth_ms:
+                metrics.observe("tts_synth_ms", synth_ms)
+            metrics.observe("tts_chunks_per_turn", pipeline.chunks)
+            for decision in pipeline.policy.decisions:
+                metrics.observe("tts_chunk_words", decision["words"])
+            if pipeline.policy.decisions:
+                log.info(f"[{conn_id}] 🎚️ TTS chunks: {pipeline.policy.summary()}")
+            
+            if length_control is not None and length_control.done:
+                # The final text is what was spoken, behind any correction block
+                full_response = "".join(map(format_correction, grammar_splitter.corrections)) + spoken_text.strip()
+                metrics.incr("responses_stopped_early")
+                log.info(f"[{conn_id}] ✂️ Reply cut at {length_control.sentences} sentences / "
+                         f"{length_control.words} words (level {mem.level}) after {llm_stats.chunks} tokens")
+            if length_control is not None:
+                metrics.observe("reply_sentences", length_control.sentences)
+                metrics.observe("reply_words", length_control.words)
+            
+            deadline.finish(first_audio_at, conn_id)
+            if first_audio_at is not None:
+                first_audio_ms = (first_audio_at - turn_start) * 1000
+                metrics.observe("time_to_first_audio_ms", first_audio_ms)
+                if grammar_splitter.corrections:
+                    metrics.observe("time_to_first_audio_with_correction_ms", first_audio_ms)
+                log.info(f"[{conn_id}] 🔊 Time to first audio: {first_audio_ms:.0f}ms"
+                         + (" (with grammar correction)" if grammar_splitter.corrections else ""))
             
             if full_response:
-                # Send final complete text
+                # Send final complete text (still carries the correction block,
+                # which the frontend renders from aiText)
                 await self.send_json(websocket, {
                     "type": "ai_text", 
                     "text": full_response,
@@ -418,9 +749,17 @@ If the input is grammatically correct, respond normally without any grammar corr
                     "is_final": True
                 })
                 
+            # A reply shortened or left uncorrected to meet the deadline is not shared with later turns
+            if (cache_key is not None and direct_response is None and full_response
+                    and not deadline.request_degradations()):
+                self.response_cache.put(cache_key, full_response, mem)
+            
             # Add complete response to memory
             mem.add_history("assistant", full_response)
             
+            self.record_turn_metrics(llm_stats, turn_start, conn_id, first_turn)
+            self.record_outbound_metrics(websocket, conn_id)
+            
             # Save memory after each complete interaction for better persistence
             if mem_store:
                 mem_store.save(mem)
@@ -428,12 +767,190 @@ If the input is grammatically correct, respond normally without any grammar corr
                 
                 # Send updated conversation context to frontend
                 await self.send_conversation_context(websocket, mem, conn_id)
+                
+                # Compact old turns in the background once the turn is answered
+                self.summarizer.schedule(mem, mem_store, conn_id)
             else:
                 log.warning(f"[{conn_id}] No AI response generated")
                 
+        except asyncio.CancelledError:
+            if speculation is not None:
+                speculation.cancel()
+            # Barge-in: remember only the part of the reply the user actually heard
+            heard = pipeline.heard_text() if pipeline is not None else ""
+            if heard:
+                mem.add_history("assistant", heard)
+            if mem_store:
+                mem_store.save(mem)
+            log.info(f"[{conn_id}] ✋ Reply cut off after {len(heard.split())} spoken words")
+            raise
         except Exception as e:
             log_exception(log, f"[{conn_id}] generate_response", e)
     
+    def stream_llm_reply(self, mem: SessionMemory, context_messages: list, transcript: str,
+                         stats: LLMStreamStats, session_id: str, on_queued=None,
+                         deadline: Optional[TurnDeadline] = None):
+        """Start the LLM stream for a turn"""
+        # Static cached prefix (persona, grammar rules, role play) first, then
+        # history, then the per-turn context so the server can reuse its KV cache
+        skip_grammar = deadline is not None and deadline.degraded("grammar")
+        messages = self.prompt_builder.build_messages(mem, context_messages, transcript, skip_grammar=skip_grammar)
+        level_style = LEVEL_STYLES.get(mem.level, LEVEL_STYLES["medium"])
+        return self.llm_service.generate_streaming_response(
+            messages=messages,
+            temperature=0.7,
+            max_tokens=level_style["max_tokens"],
+            stop=level_style["stop"],
+            coalesce=True,  # One text chunk per network read
+            stats=stats,
+            session_id=session_id,
+            on_queued=on_queued,
+            deadline=deadline
+        )
+
+    def turn_signature(self, mem: SessionMemory, context_messages: list,
+                       deadline: Optional[TurnDeadline] = None) -> tuple:
+        """What a turn's LLM request depends on besides the transcript (the
+        volatile context block is left out; only its session duration changes
+        between a partial and the final transcript)"""
+        return (
+            self.prompt_builder.prefix_key(mem),
+            mem.running_summary,
+            mem.user_name,
+            tuple((m["role"], m["content"]) for m in context_messages),
+            deadline.request_degradations() if deadline is not None else ()
+        )
+
+    def start_speculation(self, text: str, mem: SessionMemory, conn_id: str):
+        """Start the LLM request a final transcript of ``text`` would make
+
+        Runs the turn's preparation on a copy of the session memory so nothing
+        is remembered unless the final transcript commits the reply.
+        """
+        if conn_id in self._turns:
+            # Mid-reply, the final transcript barges in and changes the history
+            return None
+        scheduler = getattr(self.llm_service, "scheduler", None)
+        if scheduler is not None and scheduler.queued(HIGH):
+            # Real turns are already waiting for the model; do not add to the queue
+            metrics.incr("speculation_skipped_busy")
+            return None
+        mem = copy.deepcopy(mem)
+        context_messages = self.llm_service.create_context_messages(mem.get_context_for_llm())
+        self.intent_router.extract_memory_updates(text, mem)
+        if self.intent_router.answer(text, mem) is not None:
+            # Answered without the LLM anyway
+            return None
+        # Degraded like a turn starting now, so a turn that degrades the same way can commit it
+        deadline = self.slo.new_deadline(mem.client_id or conn_id, mem.language, mem.voice, conn_id, speculative=True)
+        stats = LLMStreamStats(context_tokens=mem.last_context_tokens)
+        stream = self.stream_llm_reply(mem, context_messages, text, stats, mem.client_id or conn_id,
+                                       deadline=deadline)
+        return self.turn_signature(mem, context_messages, deadline), stats, stream
+
+    async def send_audio_message(self, websocket: WebSocket, text: str, audio_chunk: str, is_filler: bool = False):
+        """Send one synthesized chunk (base64 audio) with its text"""
+        # Remove extra spaces and normalize text for better speech
+        clean_text = ' '.join(text.split())
+        payload = {
+            "type": "ai_audio_chunk",
+            "text": clean_text,
+            "audio_base64": audio_chunk,
+            "audio_size": len(audio_chunk),
+            "is_final": False
+        }
+        if is_filler:
+            payload["is_filler"] = True
+        await self.send_json(websocket, payload)
+
+    async def send_filler_when_slow(self, websocket: WebSocket, pipeline: SpeechPipeline, mem: SessionMemory,
+                                    turn_start: float, conn_id: str):
+        """Play a filler clip if the reply has no audio ready after FILLER_DELAY_MS"""
+        await asyncio.sleep(max(0.0, turn_start + self.fillers.delay_s - time.perf_counter()))
+        if pipeline.chunks:
+            return
+        clip = self.fillers.pick(mem.language, mem.level, mem.voice)
+        if clip is None:
+            return
+        sent = await pipeline.emit_filler(
+            clip.text, clip.audio,
+            emit=lambda text, audio: self.send_audio_message(websocket, text, audio, is_filler=True)
+        )
+        if sent:
+            self.fillers.sent += 1
+            metrics.incr("fillers_sent")
+            log.info(f"[{conn_id}] 🫧 No audio after {self.fillers.delay_s * 1000:.0f}ms, "
+                     f"playing filler '{clip.text}' ({clip.duration_s:.1f}s)")
+    
+    async def send_thinking(self, websocket: WebSocket, waited_ms: float, conn_id: str):
+        """Tell the client its request is queued behind other users"""
+        log.info(f"[{conn_id}] 🤔 LLM busy, queued for {waited_ms:.0f}ms")
+        await self.send_json(websocket, {
+            "type": "thinking",
+            "status": "queued",
+            "waited_ms": round(waited_ms),
+            "queued_requests": self.llm_service.scheduler.queued()
+        })
+    
+    async def send_grammar_correction(self, websocket: WebSocket, correction: dict, conn_id: str):
+        """Send a parsed grammar correction on its own channel"""
+        metrics.incr("grammar_corrections")
+        await self.send_json(websocket, {
+            "type": "grammar_correction",
+            "incorrect": correction["incorrect"],
+            "correct": correction["correct"],
+            "text": correction["text"]
+        })
+        log.info(f"[{conn_id}] ✍️ Grammar correction: '{correction['incorrect']}' -> '{correction['correct']}'")
+    
+    async def replay_text(self, text: str):
+        """Yield a cached response like a stream so it takes the normal TTS path"""
+        yield text
+    
+    def record_turn_metrics(self, llm_stats: LLMStreamStats, turn_start: float, conn_id: str,
+                            first_turn: bool = False):
+        """Log and record per-turn prompt evaluation metrics
+        
+        The first turn of a connection is also recorded separately, since that
+        is the one the prompt prefill is meant to speed up.
+        """
+        stats = llm_stats.to_dict()
+        turn_ms = (time.perf_counter() - turn_start) * 1000
+        if stats["completion_tokens"] is None and llm_stats.stopped_early:
+            # The server's usage event never arrives when we close the stream
+            stats["completion_tokens"] = llm_stats.chunks
+        
+        metrics.incr("turns")
+        metrics.observe("turn_ms", turn_ms)
+        for name in ("ttft_ms", "prompt_ms", "prompt_tokens", "cached_tokens",
+                     "processed_prompt_tokens", "cache_reuse_ratio", "completion_tokens", "context_tokens",
+                     "queue_ms"):
+            if stats[name] is not None:
+                metrics.observe(f"llm_{name}", stats[name])
+                if first_turn and name in ("ttft_ms", "prompt_ms", "processed_prompt_tokens"):
+                    metrics.observe(f"llm_first_turn_{name}", stats[name])
+        
+        log.info(
+            f"[{conn_id}] ⏱️ Turn metrics: ttft={stats['ttft_ms'] or 0:.0f}ms "
+            f"prompt_eval={stats['prompt_ms'] if stats['prompt_ms'] is not None else 'n/a'}ms "
+            f"prompt_tokens={stats['prompt_tokens']} processed={stats['processed_prompt_tokens']} "
+            f"cached={stats['cached_tokens']} context_tokens={stats['context_tokens']} slot={stats['slot']} "
+            f"completion_tokens={stats['completion_tokens']}{' (stopped early)' if llm_stats.stopped_early else ''} "
+            f"turn={turn_ms:.0f}ms"
+        )
+
+    def record_outbound_metrics(self, websocket: WebSocket, conn_id: str):
+        """Record messages and bytes the connection's writer handled since the last turn"""
+        outbound = self._outbound.get(id(websocket))
+        if outbound is None:
+            return
+        stats = outbound.turn_stats()
+        metrics.observe("ws_messages_queued_per_turn", stats["queued"])
+        metrics.observe("ws_messages_sent_per_turn", stats["sent"])
+        metrics.observe("ws_bytes_per_turn", stats["bytes"])
+        log.info(f"[{conn_id}] 📤 Outbound: {stats['queued']} messages queued, {stats['sent']} sent "
+                 f"({stats['coalesced']} text chunks merged), {stats['bytes'] / 1024:.1f} KB")
+
     async def send_conversation_context(self, websocket: WebSocket, mem: SessionMemory, conn_id: str):
         """Send conversation context information to frontend"""
         try:
@@ -457,26 +974,6 @@ If the input is grammatically correct, respond normally without any grammar corr
         except Exception as e:
             log_exception(log, f"[{conn_id}] send_conversation_context", e)
 
-    def should_generate_audio_chunk(self, text_buffer: str) -> bool:
-        """Determine if we should generate audio for the current text buffer"""
-        if not text_buffer.strip():
-            return False
-        
-        # Generate audio only for complete sentences to sound natural
-        words = text_buffer.split()
-        sentence_endings = ['.', '!', '?', ';', ':', '\n']
-        
-        # Check for sentence endings - this is the main trigger for natural speech
-        if any(text_buffer.rstrip().endswith(ending) for ending in sentence_endings):
-            return True
-        
-        # Only generate audio for longer phrases (8+ words) to avoid robotic word-by-word playback
-        # This ensures natural human-like speech flow
-        if len(words) >= 8:
-            return True
-            
-        return False
-
     def split_text_into_sentences(self, text: str) -> list:
         """Split text into natural sentence chunks for better audio flow"""
         import re
@@ -496,7 +993,8 @@ If the input is grammatically correct, respond normally without any grammar corr
         
         return result
 
-    async def generate_audio_for_text_chunk(self, text: str, mem: SessionMemory, conn_id: str) -> str:
+    async def generate_audio_for_text_chunk(self, text: str, mem: SessionMemory, conn_id: str,
+                                            voice: Optional[str] = None) -> str:
         """Generate audio for a text chunk and return base64 encoded audio"""
         try:
             if not text.strip():
@@ -506,7 +1004,7 @@ If the input is grammatically correct, respond normally without any grammar corr
             audio_data = await self.tts_service.synthesize_text(
                 text=text,
                 language=mem.language,
-                voice=mem.voice,
+                voice=voice or mem.voice,
                 length_scale=self.tts_service.length_scale * self.tts_service.adjust_speed_for_level(mem.level)
             )
             
@@ -552,8 +1050,7 @@ If the input is grammatically correct, respond normally without any grammar corr
                 text_stream=text_stream(),
                 language=mem.language,
                 voice=mem.voice,
-                level=mem.level,
-                chunk_size=50
+                level=mem.level
             ):
                 if audio_chunk and audio_chunk.get('audio_data'):
                     audio_b64 = base64.b64encode(audio_chunk['audio_data']).decode("utf-8")
@@ -0,0 +1,170 @@
+"""
+Outbound WebSocket Queue
+
+One writer task per connection sends everything the handler produces, so
+generation never waits on a slow socket for text. Messages go out in the
+order they were queued, with two exceptions to one-message-per-call:
+
+- ``ai_text_chunk`` messages queued back to back are merged into one (a
+  chunk waits up to ``coalesce_ms`` at the head of the queue so the next
+  tokens can join it)
+- when the queue is full, text still merges into the last queued chunk;
+  other messages (audio above all) are never dropped, the producer waits
+  for room instead
+
+JSON is encoded with orjson when it is installed.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from fastapi import WebSocket
+
+from app.config.settings import settings
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+log = get_logger("outbound")
+
+TEXT_CHUNK = "ai_text_chunk"
+
+def encode_json(payload: Dict[str, Any]) -> str:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload)
+
+class OutboundQueue:
+    """Bounded, coalescing send queue with its own writer task"""
+
+    def __init__(self, websocket: WebSocket, conn_id: str, max_messages: Optional[int] = None,
+                 coalesce_ms: Optional[float] = None):
+        self.websocket = websocket
+        self.conn_id = conn_id
+        self.max_messages = max(1, max_messages or settings.WS_SEND_QUEUE_SIZE)
+        self.coalesce_s = (settings.WS_TEXT_COALESCE_MS if coalesce_ms is None else coalesce_ms) / 1000
+        self.closed = False
+        # Counters since the last turn_stats() call
+        self.queued = 0
+        self.sent = 0
+        self.bytes_sent = 0
+        self.coalesced = 0
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._queued_at: Deque[float] = deque()
+        self._wakeup = asyncio.Event()
+        self._room = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> "OutboundQueue":
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer())
+        return self
+
+    async def send(self, payload: Dict[str, Any]):
+        """Queue a message (waits only when the queue is full and it cannot be merged)"""
+        if self.closed:
+            return
+        self.queued += 1
+        if payload.get("type") == TEXT_CHUNK and self._merge(payload):
+            return
+        while len(self._pending) >= self.max_messages and not self.closed:
+            metrics.incr("ws_send_queue_full")
+            self._room.clear()
+            await self._room.wait()
+        if self.closed:
+            return
+        # Copied so merging never changes the caller's dict
+        self._pending.append(dict(payload))
+        self._queued_at.append(time.perf_counter())
+        self._idle.clear()
+        self._wakeup.set()
+
+    def _merge(self, payload: Dict[str, Any]) -> bool:
+        """Append text to the last queued chunk if it is still unsent"""
+        if not self._pending or self._pending[-1].get("type") != TEXT_CHUNK:
+            return False
+        self._pending[-1]["text"] += payload.get("text", "")
+        if "seq" in payload:
+            # The merged chunk now ends with this message's text
+            self._pending[-1]["seq"] = payload["seq"]
+        self.coalesced += 1
+        metrics.incr("ws_text_chunks_coalesced")
+        return True
+
+    def discard(self, types) -> int:
+        """Drop queued, unsent messages of the given types (e.g. an interrupted reply)"""
+        kept = [(p, t) for p, t in zip(self._pending, self._queued_at) if p.get("type") not in types]
+        dropped = len(self._pending) - len(kept)
+        self._pending = deque(p for p, _ in kept)
+        self._queued_at = deque(t for _, t in kept)
+        if dropped:
+            self._room.set()
+        if not self._pending:
+            self._idle.set()
+        return dropped
+
+    async def drain(self):
+        """Wait until everything queued so far has been sent"""
+        await self._idle.wait()
+
+    async def close(self, timeout: float = 1.0):
+        """Send what is left (bounded by ``timeout``) and stop the writer"""
+        if self._task is not None and not self.closed:
+            try:
+                await asyncio.wait_for(self.drain(), timeout)
+            except asyncio.TimeoutError:
+                log.warning(f"[{self.conn_id}] Dropping {len(self._pending)} unsent messages on close")
+        self._shutdown()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def turn_stats(self) -> Dict[str, int]:
+        """Messages queued/sent and bytes sent since the previous call"""
+        stats = {"queued": self.queued, "sent": self.sent, "bytes": self.bytes_sent, "coalesced": self.coalesced}
+        self.queued = self.sent = self.bytes_sent = self.coalesced = 0
+        return stats
+
+    def _shutdown(self):
+        self.closed = True
+        self._pending.clear()
+        self._queued_at.clear()
+        self._room.set()
+        self._idle.set()
+
+    async def _writer(self):
+        while not self.closed:
+            if not self._pending:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if self._pending[0].get("type") == TEXT_CHUNK and self.coalesce_s > 0:
+                # Let the next tokens merge into this chunk before it goes out
+                remaining = self._queued_at[0] + self.coalesce_s - time.perf_counter()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    # The chunk may have been discarded meanwhile
+                    continue
+            payload = self._pending.popleft()
+            self._queued_at.popleft()
+            self._room.set()
+            text = encode_json(payload)
+            try:
+                await self.websocket.send_text(text)
+            except Exception as e:
+                log.warning(f"[{self.conn_id}] Failed to send WebSocket message: {e}")
+                self._shutdown()
+                return
+            self.sent += 1
+            self.bytes_sent += len(text)
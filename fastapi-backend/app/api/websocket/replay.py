@@ -0,0 +1,156 @@
+"""
+Replay Buffer for Resumable Replies
+
+Every reply message sent to a client (text chunks, audio chunks, the final
+text and the start/complete/interrupted markers) carries a sequence number
+that keeps increasing across the client's connections. The last messages
+are kept per client id for ``REPLAY_TTL_S``, bounded by count and size per
+client and by ``REPLAY_TOTAL_BYTES`` across clients, so a client that
+reconnects mid-reply can send
+``{"type": "resume", "client_id": ..., "last_seq": N}`` and receive only
+what it missed. A reply still being generated when the socket drops keeps
+running into the buffer (see ``ChatHandler.detach_turn``).
+
+Clients that went quiet are dropped once their newest message expires; a
+client whose log was dropped starts again at ``seq`` 1 (``resume_complete``
+carries the new ``last_seq``).
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.utils.metrics import metrics
+
+REPLAYABLE = {
+    "ai_audio_start", "ai_text_chunk", "ai_audio_chunk", "ai_text", "ai_audio_complete",
+    "ai_interrupted", "grammar_correction"
+}
+
+def _size(payload: Dict[str, Any]) -> int:
+    """Approximate size of a message (its string fields dominate)"""
+    return sum(len(value) for value in payload.values() if isinstance(value, str))
+
+class _ClientLog:
+    __slots__ = ("next_seq", "messages", "bytes", "lock", "touched")
+
+    def __init__(self):
+        self.next_seq = 1
+        # (seq, stored at, payload)
+        self.messages: Deque[Tuple[int, float, Dict[str, Any]]] = deque()
+        self.bytes = 0
+        self.lock = asyncio.Lock()
+        # When the last message was stored
+        self.touched = time.monotonic()
+
+class ReplayBuffer:
+    """Sequence numbers and a short, bounded history of reply messages per client"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        max_messages: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_s: Optional[float] = None,
+        max_total_bytes: Optional[int] = None,
+        max_clients: int = 1000
+    ):
+        self.enabled = settings.REPLAY_ENABLED if enabled is None else enabled
+        self.max_messages = max_messages or settings.REPLAY_BUFFER_MESSAGES
+        self.max_bytes = max_bytes or settings.REPLAY_BUFFER_BYTES
+        self.ttl_s = ttl_s or settings.REPLAY_TTL_S
+        self.max_total_bytes = max_total_bytes or settings.REPLAY_TOTAL_BYTES
+        self.max_clients = max_clients
+        # Least recently used first
+        self._clients: "OrderedDict[str, _ClientLog]" = OrderedDict()
+        self.total_bytes = 0
+        self.resumes = 0
+        self.replayed = 0
+        self.gaps = 0
+
+    def _log(self, client_id: str) -> _ClientLog:
+        log = self._clients.get(client_id)
+        if log is None:
+            self._sweep(time.monotonic(), keep=client_id)
+            log = self._clients[client_id] = _ClientLog()
+        self._clients.move_to_end(client_id)
+        return log
+
+    def lock(self, client_id: str) -> asyncio.Lock:
+        """Held while stamping and sending, so a resume never interleaves with live messages"""
+        return self._log(client_id).lock
+
+    def stamp(self, client_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Number a reply message and keep a copy for replay"""
+        log = self._log(client_id)
+        payload = dict(payload, seq=log.next_seq)
+        log.next_seq += 1
+        now = time.monotonic()
+        size = _size(payload)
+        log.messages.append((payload["seq"], now, payload))
+        log.bytes += size
+        self.total_bytes += size
+        log.touched = now
+        self._prune(log, now)
+        self._sweep(now, keep=client_id)
+        return payload
+
+    def last_seq(self, client_id: str) -> int:
+        log = self._clients.get(client_id)
+        return log.next_seq - 1 if log is not None else 0
+
+    def since(self, client_id: str, last_seq: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """Messages after ``last_seq``, and whether some of them are no longer held"""
+        log = self._clients.get(client_id)
+        if log is None:
+            # Never seen, or dropped after going quiet: anything it missed is gone
+            return [], last_seq > 0
+        self._prune(log, time.monotonic())
+        missing = [payload for seq, _, payload in log.messages if seq > last_seq]
+        first_kept = log.messages[0][0] if log.messages else log.next_seq
+        gap = first_kept > last_seq + 1
+        self.resumes += 1
+        self.replayed += len(missing)
+        metrics.incr("replay_resumes")
+        metrics.observe("replay_messages", len(missing))
+        if gap:
+            self.gaps += 1
+            metrics.incr("replay_gaps")
+        return missing, gap
+
+    def _prune(self, log: _ClientLog, now: float):
+        # The newest message is kept even when it alone is over the size bound
+        while log.messages and (
+            (len(log.messages) > 1 and (len(log.messages) > self.max_messages or log.bytes > self.max_bytes))
+            or now - log.messages[0][1] > self.ttl_s
+        ):
+            _, _, payload = log.messages.popleft()
+            size = _size(payload)
+            log.bytes -= size
+            self.total_bytes -= size
+
+    def _sweep(self, now: float, keep: str):
+        """Drop clients that went quiet, then the least recently used ones while
+        over the client count or total size bound (never ``keep`` or a client
+        that is being resumed)"""
+        for client_id, log in list(self._clients.items()):
+            over = len(self._clients) > self.max_clients or self.total_bytes > self.max_total_bytes
+            if not over and now - log.touched <= self.ttl_s:
+                # Later clients were used more recently
+                break
+            if client_id == keep or log.lock.locked():
+                continue
+            del self._clients[client_id]
+            self.total_bytes -= log.bytes
+            metrics.incr("replay_clients_dropped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "clients": len(self._clients),
+            "bytes": self.total_bytes,
+            "resumes": self.resumes,
+            "replayed": self.replayed,
+            "gaps": self.gaps
+        }
@@ -11,14 +11,62 @@ LANGUAGES = {
         "intro_line": f'Hi — I\'m "{settings.ASSISTANT_NAME}", developed by {settings.ASSISTANT_AUTHOR}. What\'s your name?',
         "shortcut_patterns": {
             "name": r"\b(what's your name|who are you|what is your name)\b",
-            "destination": r"\b(where did I want to go|where was I planning to go)\b",
-            "my_name": r"\b(what's my name|what is my name)\b",
+            "destination": r"\b(where did I want to go|where was I planning to go|where did I plan to go|what was my (?:destination|plan))\b",
+            "my_name": r"\b(what's my name|what is my name|do you (?:know|remember) my name)\b",
+            "my_birthday": r"\b(when is my birthday|when's my birthday|do you (?:know|remember) my birthday)\b",
+        },
+        "memory_patterns": {
+            # "call me X" only when X ends the sentence ("call me Anna." but not "call me back soon")
+            "name": r"\b(?:my\s+name\s+is|call\s+me(?=\s+[A-Za-z][A-Za-z\-']*\s*(?:[.,!?;:]|$)))\s+([A-Za-z][A-Za-z\-']{1,30})\b",
+            # Words captured as a name that are not one ("my name is not important", "call me later")
+            "not_a_name": r"(?:not|later|tomorrow|today|tonight|back|when|whenever|now|soon|again|anytime|sometime|after|before|please|maybe|if|just|so|the|a|an|that|this|what|whatever|going|gonna|here|there|up|on)",
+            "destination": r"\b(?:want(?:\s+to)?\s+go\s+to|going\s+to\s+go\s+to|planning\s+to\s+go\s+to|travel(?:l?ing)?\s+to|fly(?:ing)?\s+to|trip\s+to)\s+([A-Za-z][A-Za-z\s\-']{2,60})",
+            "likes": r"\bI\s+(?:really\s+)?(?:like|love)\s+([A-Za-z0-9\s\-']{2,60})",
+            "birthday": r"\bmy\s+birthday\s+is\s+([A-Za-z0-9\s,\/\-]+)",
+            "remember": r"\bremember\s+that\s+(.+)$",
+            # Words that end a captured phrase ("Rome next summer" -> "Rome")
+            "clause_break": r"\s+(?:and|but|because|with|for|next|this|tomorrow|today|someday|soon)\b",
         },
         "responses": {
             "destination_remembered": "You said {name} wanted to go to {destination}.",
             "no_destination": "I don't have a destination remembered yet.",
             "name_remembered": "Your name is {name}.",
-            "no_name": "You haven't told me your name yet."
+            "no_name": "You haven't told me your name yet.",
+            "birthday_remembered": "Your birthday is {birthday}.",
+            "no_birthday": "You haven't told me your birthday yet.",
+            "you": "you"
+        },
+        # Level-aware phrasing for answers given without the LLM
+        "level_phrasing": {
+            "assistant_name": {
+                "easy": "I'm {who}. Nice to meet you.",
+                "medium": "I'm {who}. It's a pleasure to make your acquaintance.",
+                "fast": "I'm {who}. Delighted to meet you and begin our conversation."
+            },
+            "remembered_prefix": {
+                "easy": "",
+                "medium": "I remember! ",
+                "fast": "Ah yes, I recall it. "
+            },
+            "confirmed_prefix": {
+                "easy": "",
+                "medium": "That's right! ",
+                "fast": "Absolutely! "
+            }
+        },
+        # Played while a slow reply is still being generated (see app/services/filler_audio.py)
+        "fillers": {
+            "easy": ["Hmm, let me think.", "Okay, one moment."],
+            "medium": ["Hmm, let me think about that.", "Good question, give me a second."],
+            "fast": ["Hmm, let me think about that for a moment.", "That's a good question, let me see."]
+        },
+        # Streaming TTS segmentation (see app/utils/sentence_segmenter.py)
+        "segmentation": {
+            "sentence_end": ".!?…",
+            # A period after these does not end a sentence ("Dr. Smith", "e.g. this")
+            "abbreviations": ["mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "e.g", "i.e",
+                              "a.m", "p.m", "no", "approx", "dept", "fig", "jan", "feb", "mar", "apr", "jun",
+                              "jul", "aug", "sep", "sept", "oct", "nov", "dec", "u.s", "u.k"],
         },
         "persona": "",  # Will be set after AGENT_PERSONA_EN is defined
     },
@@ -28,14 +76,54 @@ LANGUAGES = {
         "intro_line": f'Ciao — Sono "{settings.ASSISTANT_NAME}", sviluppata da {settings.ASSISTANT_AUTHOR}. Come ti chiami?',
         "shortcut_patterns": {
             "name": r"\b(come\s+ti\s+chiami|chi\s+sei|qual\s+è\s+il\s+tuo\s+nome)\b",
-            "destination": r"\b(dove\s+volevo\s+andare|dove\s+avevo\s+programmato\s+di\s+andare)\b",
+            "destination": r"\b(dove\s+volevo\s+andare|dove\s+avevo\s+programmato\s+di\s+andare|qual\s+era\s+la\s+mia\s+(?:destinazione|meta))\b",
             "my_name": r"\b(come\s+mi\s+chiamo|qual\s+è\s+il\s+mio\s+nome)\b",
+            "my_birthday": r"\b(quando\s+è\s+il\s+mio\s+compleanno|ti\s+ricordi\s+il\s+mio\s+compleanno)\b",
+        },
+        "memory_patterns": {
+            "name": r"\b(?:mi\s+chiamo|il\s+mio\s+nome\s+è)\s+([A-Za-zÀ-ÿ][A-Za-zÀ-ÿ\-']{1,30})\b",
+            "not_a_name": r"(?:non|domani|dopo|oggi|adesso|poi|più)",
+            "destination": r"\b(?:voglio\s+andare\s+a|sto\s+andando\s+a|viaggio\s+a|vado\s+a|pianifico\s+di\s+andare\s+a)\s+([A-Za-zÀ-ÿ][A-Za-zÀ-ÿ\s\-']{2,60})",
+            "likes": r"\b(?:mi\s+piace|adoro)\s+([A-Za-zÀ-ÿ0-9\s\-']{2,60})",
+            "birthday": r"\bil\s+mio\s+compleanno\s+è\s+([A-Za-zÀ-ÿ0-9\s,\/\-]+)",
+            "remember": r"\bricorda\s+che\s+(.+)$",
+            "clause_break": r"\s+(?:e|ma|perché|con|per|il\s+prossimo|la\s+prossima|domani|oggi|presto)\b",
         },
         "responses": {
             "destination_remembered": "Hai detto che {name} voleva andare a {destination}.",
             "no_destination": "Non ho ancora ricordato una destinazione.",
             "name_remembered": "Il tuo nome è {name}.",
-            "no_name": "Non mi hai ancora detto il tuo nome."
+            "no_name": "Non mi hai ancora detto il tuo nome.",
+            "birthday_remembered": "Il tuo compleanno è {birthday}.",
+            "no_birthday": "Non mi hai ancora detto il tuo compleanno.",
+            "you": "tu"
+        },
+        "level_phrasing": {
+            "assistant_name": {
+                "easy": "Sono {who}. Piacere di conoscerti.",
+                "medium": "Sono {who}. È un piacere fare la tua conoscenza.",
+                "fast": "Sono {who}. Sono lieta di conoscerti e di iniziare la nostra conversazione."
+            },
+            "remembered_prefix": {
+                "easy": "",
+                "medium": "Mi ricordo! ",
+                "fast": "Ah sì, me lo ricordo bene. "
+            },
+            "confirmed_prefix": {
+                "easy": "",
+                "medium": "Esatto! ",
+                "fast": "Certamente! "
+            }
+        },
+        "fillers": {
+            "easy": ["Mmh, ci penso.", "Va bene, un momento."],
+            "medium": ["Mmh, fammi pensare.", "Bella domanda, dammi un secondo."],
+            "fast": ["Mmh, lasciami riflettere un momento.", "È una bella domanda, vediamo un po'."]
+        },
+        "segmentation": {
+            "sentence_end": ".!?…",
+            "abbreviations": ["sig", "sig.ra", "sigg", "dott", "dott.ssa", "prof", "prof.ssa", "ing", "avv",
+                              "arch", "ecc", "es", "pag", "n", "nr", "tel", "p.es", "c.a", "s.p.a"],
         },
         "persona": "",  # Will be set after AGENT_PERSONA_IT is defined
     },
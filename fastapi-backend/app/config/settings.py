@@ -22,9 +22,109 @@ class Settings:
     LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60.0"))
     LLM_RETRIES = int(os.getenv("LLM_RETRIES", "1"))
     
+    # ---- LLM Routing (multiple OpenAI-compatible backends) ----
+    # Comma-separated list; defaults to LLM_API_URL alone
+    LLM_API_URLS = [url.strip() for url in os.getenv("LLM_API_URLS", "").split(",") if url.strip()]
+    LLM_FIRST_TOKEN_TIMEOUT = float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT", "20.0"))
+    LLM_HEDGE_AFTER_MS = float(os.getenv("LLM_HEDGE_AFTER_MS", "1500"))
+    LLM_EWMA_ALPHA = float(os.getenv("LLM_EWMA_ALPHA", "0.3"))
+    LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "3"))
+    LLM_CIRCUIT_OPEN_SECONDS = float(os.getenv("LLM_CIRCUIT_OPEN_SECONDS", "30.0"))
+    LLM_HEALTH_CHECK_INTERVAL = float(os.getenv("LLM_HEALTH_CHECK_INTERVAL", "15.0"))
+    
+    # ---- LLM Scheduling (fair admission of concurrent requests) ----
+    LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", "0"))  # 0 = unbounded (scheduler off)
+    LLM_MAX_BACKGROUND_INFLIGHT = int(os.getenv("LLM_MAX_BACKGROUND_INFLIGHT", "1"))
+    LLM_THINKING_NOTICE_MS = float(os.getenv("LLM_THINKING_NOTICE_MS", "700"))
+    
+    # ---- Ollama (native /api/chat options) and Keep-Warm ----
+    OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "0"))  # 0 = model default
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "").strip()  # e.g. "30m"; empty = server default
+    LLM_KEEP_WARM_INTERVAL = float(os.getenv("LLM_KEEP_WARM_INTERVAL", "0"))  # Seconds between pings; 0 = off
+    LLM_KEEP_WARM_WINDOW = float(os.getenv("LLM_KEEP_WARM_WINDOW", "1800"))  # Keep warm this long after the last request
+    
+    # ---- Prompt Prefill (warm the server's prompt cache when a session opens) ----
+    LLM_PREFILL_ENABLED = os.getenv("LLM_PREFILL_ENABLED", "true").lower() == "true"
+    
+    # ---- LLM Context Budget ----
+    LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "1024"))  # History tokens per request
+    LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", "heuristic").strip()  # heuristic | tiktoken:<enc> | hf:<name>
+    
+    # ---- Conversation Summarization (background compaction of old turns) ----
+    SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+    SUMMARY_TRIGGER_TURNS = int(os.getenv("SUMMARY_TRIGGER_TURNS", "16"))  # Unsummarized turns before compacting
+    SUMMARY_KEEP_TURNS = int(os.getenv("SUMMARY_KEEP_TURNS", "6"))  # Newest turns always kept verbatim
+    SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "160"))
+    SUMMARY_RETRY_SECONDS = float(os.getenv("SUMMARY_RETRY_SECONDS", "30"))  # First wait after a failed summary
+    
+    # ---- Response Cache (repeated short utterances) ----
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_FUZZY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_FUZZY_THRESHOLD", "0.8"))
+    RESPONSE_CACHE_MAX_WORDS = int(os.getenv("RESPONSE_CACHE_MAX_WORDS", "12"))
+    
+    # ---- Response Length (per-level budgets in LEVEL_STYLES) ----
+    LENGTH_CONTROL_ENABLED = os.getenv("LENGTH_CONTROL_ENABLED", "true").lower() == "true"
+    
+    # ---- LLM Slot Affinity (llama.cpp id_slot / cache_prompt) ----
+    LLM_SLOT_AFFINITY = os.getenv("LLM_SLOT_AFFINITY", "false").lower() == "true"
+    LLM_SLOT_COUNT = int(os.getenv("LLM_SLOT_COUNT", "4"))
+    
+    # ---- WebSocket Output (per-connection writer task) ----
+    WS_SEND_QUEUE_ENABLED = os.getenv("WS_SEND_QUEUE_ENABLED", "true").lower() == "true"
+    WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))  # Messages before audio producers wait
+    WS_TEXT_COALESCE_MS = float(os.getenv("WS_TEXT_COALESCE_MS", "15"))  # Merge ai_text_chunk messages within this window
+    
+    # ---- Resumable Replies (sequence numbers + per-client replay buffer) ----
+    REPLAY_ENABLED = os.getenv("REPLAY_ENABLED", "true").lower() == "true"
+    REPLAY_TTL_S = float(os.getenv("REPLAY_TTL_S", "60"))  # How long reply messages stay replayable
+    REPLAY_BUFFER_MESSAGES = int(os.getenv("REPLAY_BUFFER_MESSAGES", "256"))  # Per client
+    REPLAY_BUFFER_BYTES = int(os.getenv("REPLAY_BUFFER_BYTES", "4000000"))  # Per client (audio dominates)
+    REPLAY_TOTAL_BYTES = int(os.getenv("REPLAY_TOTAL_BYTES", "64000000"))  # All clients; least recently used dropped first
+    
+    # ---- HTTP Text Chat (Server-Sent Events, same pipeline as the WebSocket) ----
+    CHAT_SSE_KEEPALIVE_S = float(os.getenv("CHAT_SSE_KEEPALIVE_S", "15"))  # Comment line sent while idle, for proxies
+    CHAT_SSE_AUDIO_TTL_S = float(os.getenv("CHAT_SSE_AUDIO_TTL_S", "120"))  # How long audio=url clips can be fetched
+    CHAT_SSE_AUDIO_MAX_CLIPS = int(os.getenv("CHAT_SSE_AUDIO_MAX_CLIPS", "512"))  # Oldest clips dropped beyond this
+    
+    # ---- Batch Jobs (scripted conversations for evaluation runs) ----
+    BATCH_RESULTS_DIR = os.getenv("BATCH_RESULTS_DIR", "batch_results")  # One directory per job
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))  # Conversations in flight across all jobs
+    BATCH_KEEP_FINISHED = int(os.getenv("BATCH_KEEP_FINISHED", "50"))  # Finished jobs kept in memory; the oldest go first
+    
+    # ---- Speculative Replies (LLM request started from a stable partial transcript) ----
+    SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "true").lower() == "true"
+    SPECULATION_STABLE_MS = float(os.getenv("SPECULATION_STABLE_MS", "300"))  # Partial unchanged this long before speculating
+    SPECULATION_MAX_INFLIGHT = int(os.getenv("SPECULATION_MAX_INFLIGHT", "4"))  # Speculative LLM requests per process
+    
     # ---- TTS System Configuration ----
     TTS_SYSTEM = os.getenv("TTS_SYSTEM", "piper").lower()
     
+    # ---- Response Pipeline (segmenter -> TTS workers -> ordered sender) ----
+    TTS_PIPELINE_WORKERS = int(os.getenv("TTS_PIPELINE_WORKERS", "2"))  # 0 = synthesize inline, one chunk at a time
+    TTS_PIPELINE_QUEUE = int(os.getenv("TTS_PIPELINE_QUEUE", "4"))  # Chunks in flight before the reader waits
+    TTS_ADAPTIVE_CHUNKS = os.getenv("TTS_ADAPTIVE_CHUNKS", "true").lower() == "true"
+    TTS_FIRST_CHUNK_WORDS = int(os.getenv("TTS_FIRST_CHUNK_WORDS", "6"))
+    TTS_MAX_CHUNK_WORDS = int(os.getenv("TTS_MAX_CHUNK_WORDS", "40"))
+    
+    # ---- Filler Audio (played while a slow reply has no audio yet) ----
+    FILLER_AUDIO_ENABLED = os.getenv("FILLER_AUDIO_ENABLED", "true").lower() == "true"
+    FILLER_DELAY_MS = float(os.getenv("FILLER_DELAY_MS", "900"))  # Silence after the transcript before a filler clip plays
+    
+    # ---- Latency SLO (per-turn deadline, degradations under load) ----
+    SLO_ENABLED = os.getenv("SLO_ENABLED", "true").lower() == "true"
+    SLO_FIRST_AUDIO_MS = float(os.getenv("SLO_FIRST_AUDIO_MS", "1500"))  # Final transcript -> first reply audio
+    SLO_RISK_RATIO = float(os.getenv("SLO_RISK_RATIO", "0.8"))  # Degrade when the prediction reaches this share of the budget
+    SLO_DEGRADE_STEP = float(os.getenv("SLO_DEGRADE_STEP", "0.25"))  # One more degradation per this share over
+    SLO_DEGRADATIONS = [d.strip() for d in os.getenv("SLO_DEGRADATIONS", "cache,grammar,max_tokens,voice").split(",") if d.strip()]
+    SLO_MAX_TOKENS_RATIO = float(os.getenv("SLO_MAX_TOKENS_RATIO", "0.6"))
+    SLO_CACHE_FUZZY_THRESHOLD = float(os.getenv("SLO_CACHE_FUZZY_THRESHOLD", "0.6"))
+    # Faster voice per language, e.g. "en=en_US-lessac-low,it=it_IT-riccardo-x_low"
+    SLO_FAST_VOICES = dict(
+        pair.strip().split("=", 1) for pair in os.getenv("SLO_FAST_VOICES", "").split(",") if "=" in pair
+    )
+    
     # ---- Piper TTS Configuration ----
     PIPER_MODEL_NAME = os.getenv("PIPER_MODEL_NAME", "en_US-ljspeech-medium").strip()
     PIPER_LENGTH_SCALE = float(os.getenv("PIPER_LENGTH_SCALE", "1.5"))
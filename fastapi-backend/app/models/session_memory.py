@@ -7,6 +7,7 @@ import sqlite3
 from typing import Optional, Dict, Any, List
 from app.config.settings import settings
 from app.utils.logger import get_logger
+from app.utils.tokenizer import get_token_counter, TokenCounter
 
 log = get_logger("session_memory")
 
@@ -48,7 +49,16 @@ class SessionMemory:
         
         # Memory management settings
         self.max_conversation_history: int = 50  # Maximum conversation turns to keep
-        self.max_context_length: int = 1000  # Maximum context length for LLM
+        self.max_context_length: int = 1000  # Optional character cap for LLM context
+        self.max_context_tokens: int = settings.LLM_CONTEXT_TOKENS  # Token budget for LLM context
+        
+        # Rolling summary of older turns (maintained by the background summarizer)
+        self.running_summary: str = ""
+        self.summarized_until: int = 0  # interaction_id of the last summarized turn
+        
+        # Size of the most recently packed LLM context
+        self.last_context_tokens: int = 0
+        self.last_context_turns: int = 0
 
     def add_history(self, role: str, content: str):
         """Add interaction to history with enhanced context tracking"""
@@ -62,13 +72,15 @@ class SessionMemory:
         })
         
         # Add to enhanced conversation context
-        self.conversation_context.append({
+        turn = {
             "role": role,
             "content": content,
             "timestamp": current_time,
             "interaction_id": self.total_interactions + 1,
             "session_duration": current_time - self.session_start_time
-        })
+        }
+        self._turn_tokens(turn, get_token_counter())
+        self.conversation_context.append(turn)
         
         # Update interaction tracking
         self.total_interactions += 1
@@ -150,29 +162,63 @@ class SessionMemory:
         if len(self.history) > self.max_conversation_history:
             self.history = self.history[-self.max_conversation_history:]
     
-    def get_context_for_llm(self, max_length: int = None) -> List[Dict[str, str]]:
-        """Get optimized context for LLM with length management"""
-        max_length = max_length or self.max_context_length
-        
-        # Get recent context
-        recent_context = self.get_enhanced_context(max_turns=15)
+    @staticmethod
+    def _turn_tokens(turn: Dict[str, Any], counter: TokenCounter) -> int:
+        """Get a turn's token count, caching it on the turn"""
+        if turn.get("tokenizer") != counter.name or "tokens" not in turn:
+            turn["tokens"] = counter.count_message(turn["content"])
+            turn["tokenizer"] = counter.name
+        return turn["tokens"]
+
+    def get_unsummarized_turns(self) -> List[Dict[str, Any]]:
+        """Get the turns not yet folded into the running summary"""
+        return [item for item in self.conversation_context
+                if item.get("interaction_id", 0) > self.summarized_until]
+
+    def get_compaction_block(self, keep_turns: int) -> List[Dict[str, Any]]:
+        """Get the oldest unsummarized turns, leaving the newest ``keep_turns`` verbatim"""
+        pending = self.get_unsummarized_turns()
+        return pending[:-keep_turns] if keep_turns > 0 else pending
+
+    def apply_summary(self, summary: str, until_interaction_id: int):
+        """Replace the running summary after the turns up to an id were compacted"""
+        self.running_summary = summary
+        self.summarized_until = max(self.summarized_until, until_interaction_id)
+
+    def get_context_for_llm(self, max_tokens: int = None, max_length: int = None) -> List[Dict[str, str]]:
+        """Get the most recent turns that fit the token budget
         
-        # Convert to LLM format and manage length
-        llm_context = []
-        current_length = 0
+        Turns are packed newest-first and returned in chronological order. Token
+        counts are cached on each turn, so packing never re-tokenizes history.
+        Turns covered by the running summary are left out. ``max_length``
+        optionally caps the total characters as well.
+        """
+        max_tokens = max_tokens or self.max_context_tokens
+        counter = get_token_counter()
         
-        for item in recent_context:
+        packed = []
+        total_tokens = 0
+        total_length = 0
+        for item in reversed(self.conversation_context):
+            if item.get("interaction_id", 0) <= self.summarized_until:
+                break
+            tokens = self._turn_tokens(item, counter)
             content = item["content"]
-            if current_length + len(content) > max_length:
+            if total_tokens + tokens > max_tokens:
                 break
-            
-            llm_context.append({
+            if max_length and total_length + len(content) > max_length:
+                break
+            packed.append({
                 "role": item["role"],
                 "content": content
             })
-            current_length += len(content)
+            total_tokens += tokens
+            total_length += len(content)
         
-        return llm_context
+        packed.reverse()
+        self.last_context_tokens = total_tokens
+        self.last_context_turns = len(packed)
+        return packed
 
     def load_from_dict(self, data: Dict[str, Any]):
         """Load memory from dictionary with enhanced conversation context"""
@@ -193,6 +239,8 @@ class SessionMemory:
         self.total_interactions = data.get("total_interactions", 0)
         self.conversation_topics = data.get("conversation_topics", [])
         self.user_preferences = data.get("user_preferences", {})
+        self.running_summary = data.get("running_summary", "")
+        self.summarized_until = data.get("summarized_until", 0)
         
         # Role play data
         self.role_play_enabled = data.get("role_play_enabled", False)
@@ -219,6 +267,8 @@ class SessionMemory:
             "total_interactions": self.total_interactions,
             "conversation_topics": self.conversation_topics,
             "user_preferences": self.user_preferences,
+            "running_summary": self.running_summary,
+            "summarized_until": self.summarized_until,
             "role_play_enabled": self.role_play_enabled,
             "role_play_template": self.role_play_template,
             "organization_name": self.organization_name,
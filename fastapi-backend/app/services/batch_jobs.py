@@ -0,0 +1,307 @@
+"""
+Batch Conversation Jobs
+
+Evaluation runs replay scripted conversations through the same pipeline as
+live turns (``ChatHandler.generate_and_send_response``: prompt building,
+intent router, LLM scheduler, TTS pipeline). The turns of a
+conversation run in order; conversations run concurrently, up to
+``BATCH_CONCURRENCY`` across all jobs. Each conversation is its own LLM
+scheduler session, so the global ``LLM_MAX_INFLIGHT`` cap and the
+round-robin between sessions still apply, and each turn synthesizes with
+``TTS_PIPELINE_WORKERS`` like a live one.
+
+Turns get a latency deadline with no degradations and bypass the response
+cache: the load a batch creates must not change the replies being
+evaluated, and scripted turns must not fill the cache live sessions use.
+
+Each job writes to ``BATCH_RESULTS_DIR/<job id>/`` while it runs:
+
+- ``request.json``   the submitted conversations (written once)
+- ``job.json``       progress, rewritten as conversations finish
+- ``results.jsonl``  one line per turn: reply text, audio files, stage timings
+- ``audio/``         ``c<conversation>_t<turn>_<chunk>.wav``
+
+Files are written from worker threads so the event loop serving live turns
+never blocks on disk. Only the newest ``BATCH_KEEP_FINISHED`` finished jobs
+stay in memory; older ones are left to their directories.
+"""
+import asyncio
+import base64
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.api.websocket.channel import MessageChannel
+from app.config.languages import DEFAULT_LANGUAGE
+from app.config.settings import settings
+from app.models.session_memory import SessionMemory
+from app.services.turn_deadline import TurnDeadline
+from app.utils.logger import get_logger, log_exception
+from app.utils.metrics import metrics
+
+log = get_logger("batch_jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+async def run_io(fn, *args):
+    """Run blocking file I/O in a thread; it completes even if the caller is cancelled"""
+    write = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+    try:
+        await asyncio.shield(write)
+    except asyncio.CancelledError:
+        await write
+        raise
+
+def write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+def write_json(path: str, data: Any):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def append_line(path: str, line: str):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+class TurnRecorder(MessageChannel):
+    """Collects one turn's messages and when each stage was reached"""
+
+    def __init__(self, audio_dir: Optional[str], prefix: str):
+        super().__init__()
+        self.started_at = time.perf_counter()
+        self.audio_dir = audio_dir
+        self.prefix = prefix
+        self.reply = ""
+        self.spoken = ""
+        self.corrections: List[Dict[str, str]] = []
+        self.audio_files: List[str] = []
+        self.filler = None
+        # stage -> ms since the turn started (first time reached)
+        self.timings: Dict[str, float] = {}
+
+    def mark(self, stage: str):
+        if stage not in self.timings:
+            self.timings[stage] = round((time.perf_counter() - self.started_at) * 1000, 1)
+
+    async def on_message(self, payload: Dict[str, Any]):
+        typ = payload.get("type")
+        if typ == "thinking":
+            self.mark("llm_queued_ms")
+        elif typ == "ai_text_chunk":
+            self.mark("first_text_ms")
+            self.spoken += payload.get("text", "")
+        elif typ == "grammar_correction":
+            self.corrections.append({"incorrect": payload["incorrect"], "correct": payload["correct"]})
+        elif typ == "ai_audio_chunk":
+            if payload.get("is_filler"):
+                self.mark("filler_audio_ms")
+                self.filler = payload.get("text")
+                return
+            self.mark("first_audio_ms")
+            if self.audio_dir and payload.get("audio_base64"):
+                name = f"{self.prefix}_{len(self.audio_files):02d}.wav"
+                self.audio_files.append(os.path.join("audio", name))
+                await run_io(write_file, os.path.join(self.audio_dir, name), base64.b64decode(payload["audio_base64"]))
+        elif typ == "ai_text":
+            self.mark("text_complete_ms")
+            self.reply = payload.get("text", "")
+        elif typ == "ai_audio_complete":
+            self.mark("audio_complete_ms")
+
+class BatchJob:
+    """One submitted set of conversations and its progress"""
+
+    def __init__(self, job_id: str, conversations: List[Dict[str, Any]], save_audio: bool,
+                 name: Optional[str] = None):
+        self.id = job_id
+        self.name = name
+        self.conversations = conversations
+        self.save_audio = save_audio
+        self.results_dir = os.path.join(settings.BATCH_RESULTS_DIR, job_id)
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.total_turns = sum(len(c["turns"]) for c in conversations)
+        self.completed_turns = 0
+        self.failed_turns = 0
+        self.completed_conversations = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # results.jsonl lines from concurrent conversations must not interleave
+        self._results_lock = asyncio.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (COMPLETED, CANCELLED, FAILED)
+
+    def progress(self) -> Dict[str, Any]:
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "error": self.error,
+            "conversations": len(self.conversations),
+            "completed_conversations": self.completed_conversations,
+            "total_turns": self.total_turns,
+            "completed_turns": self.completed_turns,
+            "failed_turns": self.failed_turns,
+            "progress": round(self.completed_turns / self.total_turns, 4) if self.total_turns else 1.0,
+            "elapsed_s": round(elapsed, 1),
+            "turns_per_s": round(self.completed_turns / elapsed, 2) if elapsed > 0 else 0.0,
+            "results_dir": self.results_dir
+        }
+
+    async def write_request(self):
+        await run_io(os.makedirs, os.path.join(self.results_dir, "audio") if self.save_audio else self.results_dir,
+                     0o777, True)
+        await run_io(write_json, os.path.join(self.results_dir, "request.json"),
+                     {"name": self.name, "save_audio": self.save_audio, "conversations": self.conversations})
+
+    async def write_state(self):
+        await run_io(write_json, os.path.join(self.results_dir, "job.json"), self.progress())
+
+    async def write_result(self, result: Dict[str, Any]):
+        line = json.dumps(result, ensure_ascii=False)
+        async with self._results_lock:
+            await run_io(append_line, os.path.join(self.results_dir, "results.jsonl"), line)
+
+class BatchJobManager:
+    """Runs batch jobs through a ChatHandler and tracks their progress"""
+
+    def __init__(self, chat_handler, concurrency: Optional[int] = None, keep_finished: Optional[int] = None):
+        self.chat_handler = chat_handler
+        self.concurrency = concurrency or settings.BATCH_CONCURRENCY
+        self.keep_finished = settings.BATCH_KEEP_FINISHED if keep_finished is None else keep_finished
+        # Conversations in flight across all jobs
+        self._slots = asyncio.Semaphore(self.concurrency)
+        # In submission order, so the first finished ones are the oldest
+        self.jobs: Dict[str, BatchJob] = {}
+
+    async def submit(self, conversations: List[Dict[str, Any]], save_audio: bool = True,
+                     name: Optional[str] = None) -> BatchJob:
+        """Start a job; it runs in the background"""
+        job = BatchJob(uuid.uuid4().hex[:12], conversations, save_audio, name)
+        await job.write_request()
+        await job.write_state()
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job))
+        metrics.incr("batch_jobs")
+        log.info(f"📦 Batch job {job.id}: {len(conversations)} conversations, {job.total_turns} turns "
+                 f"-> {job.results_dir}")
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self.jobs.get(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[BatchJob]:
+        """Stop a job; turns already written stay in its results"""
+        job = self.jobs.get(job_id)
+        if job is None or job.done or job.task is None:
+            return job
+        job.task.cancel()
+        await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    async def close(self):
+        for job in list(self.jobs.values()):
+            await self.cancel(job.id)
+
+    async def _run(self, job: BatchJob):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            await asyncio.gather(*(self._run_conversation(job, index) for index in range(len(job.conversations))))
+            job.status = COMPLETED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            log.info(f"📦 Batch job {job.id} cancelled after {job.completed_turns}/{job.total_turns} turns")
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            log_exception(log, f"Batch job {job.id}", e)
+        finally:
+            job.finished_at = time.time()
+            await job.write_state()
+            self._evict_finished()
+        if job.status == COMPLETED:
+            log.info(f"📦 Batch job {job.id} completed: {job.completed_turns} turns "
+                     f"({job.failed_turns} without a reply) in {job.finished_at - job.started_at:.1f}s")
+
+    def _evict_finished(self):
+        """Forget the oldest finished jobs beyond ``keep_finished``; their results stay on disk"""
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job.id]
+
+    async def _run_conversation(self, job: BatchJob, index: int):
+        spec = job.conversations[index]
+        handler = self.chat_handler
+        conn_id = f"batch-{job.id[:6]}-{index}"
+        async with self._slots:
+            mem = SessionMemory(language=spec.get("language") or DEFAULT_LANGUAGE)
+            # Also the LLM session: one scheduler queue and server slot per conversation
+            mem.client_id = conn_id
+            mem.level = spec.get("level") or mem.level
+            mem.voice = spec.get("voice") or mem.voice
+            role_play = spec.get("role_play")
+            if role_play:
+                mem.role_play_enabled = True
+                mem.role_play_template = role_play.get("template") or mem.role_play_template
+                mem.organization_name = role_play.get("organization_name", "")
+                mem.organization_details = role_play.get("organization_details", "")
+                mem.role_title = role_play.get("role_title", "")
+            audio_dir = os.path.join(job.results_dir, "audio") if job.save_audio else None
+            try:
+                for turn_index, text in enumerate(spec["turns"]):
+                    recorder = TurnRecorder(audio_dir, f"c{index:04d}_t{turn_index:02d}")
+                    # Not persisted: scripted turns stay out of user memory
+                    await handler.generate_and_send_response(
+                        recorder, text, mem, None, conn_id, TurnDeadline(handler.slo.budget_ms), use_cache=False
+                    )
+                    recorder.mark("total_ms")
+                    await self._record_turn(job, spec, index, turn_index, text, recorder)
+            finally:
+                handler.prefiller.forget(conn_id)
+                handler.speculator.forget(conn_id)
+                handler.release_llm_session(conn_id)
+        job.completed_conversations += 1
+        await job.write_state()
+
+    async def _record_turn(self, job: BatchJob, spec: Dict[str, Any], index: int, turn_index: int,
+                     text: str, recorder: TurnRecorder):
+        job.completed_turns += 1
+        if not recorder.reply:
+            job.failed_turns += 1
+            metrics.incr("batch_turns_failed")
+        metrics.incr("batch_turns")
+        await job.write_result({
+            "conversation": index,
+            "conversation_id": spec.get("id"),
+            "turn": turn_index,
+            "language": spec.get("language") or DEFAULT_LANGUAGE,
+            "level": spec.get("level"),
+            "user": text,
+            "reply": recorder.reply,
+            "spoken": recorder.spoken.strip(),
+            "grammar_corrections": recorder.corrections,
+            "audio": recorder.audio_files,
+            "filler": recorder.filler,
+            "timings_ms": recorder.timings,
+            "error": None if recorder.reply else "no reply"
+        })
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "jobs": len(self.jobs),
+            "running": sum(1 for job in self.jobs.values() if job.status == RUNNING)
+        }
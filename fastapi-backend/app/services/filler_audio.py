@@ -0,0 +1,124 @@
+"""
+Filler Audio
+
+When the model server is busy the first sentence of a reply can take well
+over a second, and the user hears nothing. ``FillerBank`` keeps short
+pre-synthesized clips ("Hmm, let me think…") in memory per language, level
+and voice, so a turn that has no audio ready after ``FILLER_DELAY_MS`` can
+play one at once. The phrases live under ``"fillers"`` in ``LANGUAGES``.
+
+Clips for the default voice are synthesized at startup; other voices are
+synthesized the first time they are asked for, and used from then on.
+Fillers are audio only: they are never added to the conversation history.
+"""
+import asyncio
+import base64
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.languages import LANGUAGES
+from app.config.settings import settings
+from app.services.tts_chunk_policy import wav_duration_s
+from app.services.tts_service import TTSService
+from app.utils.logger import get_logger, log_exception
+from app.utils.metrics import metrics
+
+log = get_logger("filler_audio")
+
+LEVELS = ("easy", "medium", "fast")
+
+# (language, level, voice)
+ClipKey = Tuple[str, str, Optional[str]]
+
+class FillerClip:
+    """One pre-synthesized filler phrase (base64 WAV, like reply chunks)"""
+
+    def __init__(self, text: str, audio: str):
+        self.text = text
+        self.audio = audio
+        self.duration_s = wav_duration_s(audio)
+
+class FillerBank:
+    """Resident filler clips, rotated so the same phrase is not heard twice in a row"""
+
+    def __init__(self, tts_service: TTSService, enabled: Optional[bool] = None, delay_ms: Optional[float] = None):
+        self.tts_service = tts_service
+        self.enabled = settings.FILLER_AUDIO_ENABLED if enabled is None else enabled
+        self.delay_s = (settings.FILLER_DELAY_MS if delay_ms is None else delay_ms) / 1000
+        self._clips: Dict[ClipKey, List[FillerClip]] = {}
+        self._rotation: Dict[ClipKey, Any] = {}
+        self._loading: Dict[ClipKey, asyncio.Task] = {}
+        self.sent = 0
+        self.unavailable = 0
+
+    @staticmethod
+    def phrases(language: str, level: str) -> List[str]:
+        fillers = LANGUAGES.get(language, {}).get("fillers", {})
+        return fillers.get(level) or fillers.get("medium", [])
+
+    def _key(self, language: str, level: str, voice: Optional[str]) -> ClipKey:
+        # No voice means the TTS default, which sessions usually name explicitly
+        return language, level, voice or getattr(self.tts_service, "piper_model", None)
+
+    def start(self):
+        """Synthesize the default voice's clips in the background"""
+        if not self.enabled:
+            return
+        for language in LANGUAGES:
+            for level in LEVELS:
+                self._schedule(self._key(language, level, None))
+
+    async def load(self, language: str, level: str, voice: Optional[str] = None) -> List[FillerClip]:
+        """Synthesize (once) and keep the clips for a language, level and voice"""
+        key = self._key(language, level, voice)
+        if key not in self._clips:
+            length_scale = self.tts_service.length_scale * self.tts_service.adjust_speed_for_level(level)
+            clips = []
+            for text in self.phrases(language, level):
+                audio = await self.tts_service.synthesize_text(text, language, key[2], length_scale=length_scale)
+                if audio:
+                    clips.append(FillerClip(text, base64.b64encode(audio).decode("utf-8")))
+            self._clips[key] = clips
+            self._rotation[key] = itertools.cycle(clips)
+            log.info(f"🫧 {len(clips)} filler clips ready for {language}/{level}/{key[2] or 'default'}")
+        return self._clips[key]
+
+    def pick(self, language: str, level: str, voice: Optional[str] = None) -> Optional[FillerClip]:
+        """The next resident clip, or None (and start synthesizing) if there is none yet"""
+        key = self._key(language, level, voice)
+        if self._clips.get(key):
+            return next(self._rotation[key])
+        if key not in self._clips:
+            self._schedule(key)
+        self.unavailable += 1
+        metrics.incr("filler_unavailable")
+        return None
+
+    def _schedule(self, key: ClipKey):
+        if key in self._loading:
+            return
+        task = self._loading[key] = asyncio.create_task(self._load_quietly(key))
+        task.add_done_callback(lambda _: self._loading.pop(key, None))
+
+    async def _load_quietly(self, key: ClipKey):
+        try:
+            await self.load(*key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log_exception(log, f"filler clips {key}", e)
+
+    async def close(self):
+        tasks = list(self._loading.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "delay_ms": self.delay_s * 1000,
+            "clip_sets": len(self._clips),
+            "sent": self.sent,
+            "unavailable": self.unavailable
+        }
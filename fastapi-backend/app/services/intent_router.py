@@ -0,0 +1,157 @@
+"""
+Intent Router Service
+
+Fast path in front of the LLM. Every utterance is scanned for facts worth
+remembering (name, destination, likes, birthday, "remember that ..."), and
+deterministic questions about the assistant or the session memory ("what's
+your name", "what's my name", "where did I want to go") are answered directly
+with level-aware phrasing instead of a full LLM round trip.
+
+Patterns come from ``LANGUAGES`` and are compiled once per language.
+"""
+import re
+from typing import Dict, Any, List, Optional, Pattern, Tuple
+
+from app.config.languages import LANGUAGES, DEFAULT_LANGUAGE
+from app.models.session_memory import SessionMemory
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+log = get_logger("intent_router")
+
+class LanguageIntents:
+    """Compiled patterns and phrasing of one language"""
+
+    def __init__(self, language: str, config: Dict[str, Any]):
+        self.language = language
+        self.config = config
+        flags = re.I | re.UNICODE
+        self.shortcuts: Dict[str, Pattern] = {
+            name: re.compile(pattern, flags) for name, pattern in config["shortcut_patterns"].items()
+        }
+        memory_patterns = dict(config.get("memory_patterns", {}))
+        clause_break = memory_patterns.pop("clause_break", None)
+        self.clause_break: Optional[Pattern] = re.compile(clause_break, flags) if clause_break else None
+        not_a_name = memory_patterns.pop("not_a_name", None)
+        self.not_a_name: Optional[Pattern] = re.compile(not_a_name, flags) if not_a_name else None
+        self.extractors: Dict[str, Pattern] = {
+            name: re.compile(pattern, flags) for name, pattern in memory_patterns.items()
+        }
+
+    def phrase(self, key: str, level: str) -> str:
+        options = self.config["level_phrasing"][key]
+        return options.get(level, options["medium"])
+
+    def is_name(self, value: str) -> bool:
+        """False for words the name pattern captured that are not a name ("not", "later")"""
+        return self.not_a_name is None or not self.not_a_name.fullmatch(value)
+
+    def clean(self, value: str) -> str:
+        """Trim a captured phrase at the first clause break and drop trailing punctuation"""
+        if self.clause_break is not None:
+            value = self.clause_break.split(value, maxsplit=1)[0]
+        return value.strip().rstrip("?.,!;:")
+
+class IntentRouter:
+    """Updates session facts and answers deterministic intents without the LLM"""
+
+    def __init__(self):
+        self._languages: Dict[str, LanguageIntents] = {
+            code: LanguageIntents(code, config) for code, config in LANGUAGES.items()
+        }
+        self.hits = 0
+        self.misses = 0
+        self.intent_counts: Dict[str, int] = {}
+
+    def for_language(self, language: str) -> LanguageIntents:
+        return self._languages.get(language) or self._languages[DEFAULT_LANGUAGE]
+
+    def extract_memory_updates(self, text: str, mem: SessionMemory) -> List[str]:
+        """Store facts the user shares in session memory, returning the updated fields"""
+        intents = self.for_language(mem.language)
+        text = text.strip()
+        updated = []
+
+        if (m := intents.extractors["name"].search(text)) and intents.is_name(m.group(1)):
+            mem.user_name = m.group(1).strip().title()
+            updated.append("user_name")
+        if (m := intents.extractors["destination"].search(text)):
+            destination = intents.clean(m.group(1))
+            if destination:
+                mem.last_destination = destination
+                updated.append("last_destination")
+        if (m := intents.extractors["likes"].search(text)):
+            like = intents.clean(m.group(1))
+            likes = mem.traits.setdefault("likes", [])
+            if like and like not in likes:
+                likes.append(like)
+                updated.append("likes")
+        if (m := intents.extractors["birthday"].search(text)):
+            mem.facts["birthday"] = intents.clean(m.group(1))
+            updated.append("birthday")
+        if (m := intents.extractors["remember"].search(text)):
+            mem.facts.setdefault("notes", []).append(m.group(1).strip())
+            updated.append("notes")
+
+        if updated:
+            log.info(f"🧠 Memory updated from utterance: {', '.join(updated)}")
+        return updated
+
+    def answer(self, text: str, mem: SessionMemory) -> Optional[Tuple[str, str]]:
+        """Match a deterministic intent, returning (intent, response)"""
+        intents = self.for_language(mem.language)
+        responses = intents.config["responses"]
+        level = mem.level
+
+        # In role play the assistant is a character, so let the LLM answer for it
+        if not mem.role_play_enabled and intents.shortcuts["name"].search(text):
+            who = intents.config["assistant_name"]
+            return "assistant_name", intents.phrase("assistant_name", level).format(who=who)
+
+        if intents.shortcuts["destination"].search(text):
+            if not mem.last_destination:
+                return "destination", responses["no_destination"]
+            who = mem.user_name or responses["you"]
+            base = responses["destination_remembered"].format(name=who, destination=mem.last_destination)
+            return "destination", intents.phrase("remembered_prefix", level) + base
+
+        if intents.shortcuts["my_name"].search(text):
+            if not mem.user_name:
+                return "my_name", responses["no_name"]
+            base = responses["name_remembered"].format(name=mem.user_name)
+            return "my_name", intents.phrase("confirmed_prefix", level) + base
+
+        if intents.shortcuts["my_birthday"].search(text):
+            birthday = mem.facts.get("birthday")
+            if not birthday:
+                return "my_birthday", responses["no_birthday"]
+            base = responses["birthday_remembered"].format(birthday=birthday)
+            return "my_birthday", intents.phrase("remembered_prefix", level) + base
+
+        return None
+
+    def route(self, text: str, mem: SessionMemory) -> Optional[str]:
+        """Update memory from an utterance and answer it directly when possible"""
+        self.extract_memory_updates(text, mem)
+        match = self.answer(text, mem)
+        if match is None:
+            self.misses += 1
+            metrics.incr("intent_router_misses")
+            return None
+
+        intent, response = match
+        self.hits += 1
+        self.intent_counts[intent] = self.intent_counts.get(intent, 0) + 1
+        metrics.incr("intent_router_hits")
+        metrics.incr(f"intent_{intent}")
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fast-path hit statistics"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "intents": dict(self.intent_counts)
+        }
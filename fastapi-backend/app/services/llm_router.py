@@ -0,0 +1,267 @@
+"""
+LLM Backend Router
+
+Routes requests over a list of OpenAI-compatible backends:
+- latency-aware selection using an EWMA of time-to-first-token
+- per-backend circuit breaker (closed -> open -> half-open -> closed)
+- periodic background health checks against ``/models``
+- session stickiness so server-side KV caches keep being reused
+
+The breaker and health checks exist to fail over. With a single backend there
+is nowhere to go, so its circuit never opens and it is not probed: a turn
+always tries the model rather than failing fast.
+"""
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Iterable
+
+import aiohttp
+
+from app.services.ollama import is_native_chat_url, api_base
+from app.services.slot_manager import SlotAffinityManager
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+log = get_logger("llm_router")
+
+class LLMBackend:
+    """One chat endpoint (OpenAI-compatible or Ollama's native /api/chat) and its health state"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, url: str, model: str, api_key: str = "", slot_count: int = 0):
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.native_ollama = is_native_chat_url(url)
+        # id_slot pinning is a llama.cpp feature
+        self.slots = SlotAffinityManager(0 if self.native_ollama else slot_count)
+
+        self.ewma_ttft_ms: Optional[float] = None
+        self.inflight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self.last_health_check: Optional[float] = None
+        # False once /models answered 404: there is nothing to probe
+        self.models_route = True
+        self.last_request_at: Optional[float] = None
+        self.model_loads = 0
+        self.last_load_ms: Optional[float] = None
+        self.last_load_at: Optional[float] = None
+
+    @property
+    def models_url(self) -> str:
+        """Model listing endpoint used for health checks"""
+        if self.native_ollama:
+            return api_base(self.url) + "/api/tags"
+        if self.url.endswith("/chat/completions"):
+            return self.url[:-len("/chat/completions")] + "/models"
+        return self.url.rstrip("/") + "/models"
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}" if self.api_key else ""
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "ewma_ttft_ms": self.ewma_ttft_ms,
+            "inflight": self.inflight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "native_ollama": self.native_ollama,
+            "model_loads": self.model_loads,
+            "last_load_ms": self.last_load_ms,
+            "last_load_at": self.last_load_at,
+            "slots": self.slots.get_stats()
+        }
+
+
+class LLMRouter:
+    """Chooses a backend per request and tracks backend health"""
+
+    def __init__(
+        self,
+        backends: List[LLMBackend],
+        ewma_alpha: float = 0.3,
+        failure_threshold: int = 3,
+        open_seconds: float = 30.0,
+        health_check_interval: float = 15.0,
+        sticky_tolerance: float = 1.5
+    ):
+        self.backends = backends
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.health_check_interval = health_check_interval
+        self.sticky_tolerance = sticky_tolerance
+        self._sticky: Dict[str, LLMBackend] = {}
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def can_fail_over(self) -> bool:
+        return len(self.backends) > 1
+
+    # ---- Selection ----
+
+    def is_available(self, backend: LLMBackend) -> bool:
+        """Check the circuit breaker, moving open circuits to half-open after the cool-down"""
+        if backend.state == LLMBackend.OPEN:
+            if time.monotonic() - backend.opened_at < self.open_seconds:
+                return False
+            backend.state = LLMBackend.HALF_OPEN
+            log.info(f"🟡 Circuit half-open for {backend.url}")
+        if backend.state == LLMBackend.HALF_OPEN:
+            # Only one trial request at a time while half-open
+            return backend.inflight == 0
+        return True
+
+    @staticmethod
+    def score(backend: LLMBackend) -> float:
+        """Lower is better: expected TTFT inflated by current load"""
+        # Backends without samples score 0 so they get explored
+        return (backend.ewma_ttft_ms or 0.0) * (1 + backend.inflight)
+
+    def candidates(self, session_id: Optional[str] = None,
+                   exclude: Iterable[LLMBackend] = ()) -> List[LLMBackend]:
+        """Available backends ordered by preference"""
+        excluded = set(id(b) for b in exclude)
+        available = [b for b in self.backends if id(b) not in excluded and self.is_available(b)]
+        available.sort(key=self.score)
+
+        sticky = self._sticky.get(session_id) if session_id else None
+        if sticky is not None and sticky in available and available[0] is not sticky:
+            best = self.score(available[0])
+            if best == 0 or self.score(sticky) <= best * self.sticky_tolerance:
+                available.remove(sticky)
+                available.insert(0, sticky)
+        return available
+
+    def bind_session(self, session_id: Optional[str], backend: LLMBackend):
+        """Remember the backend that served a session (keeps its KV cache warm)"""
+        if session_id:
+            self._sticky[session_id] = backend
+
+    def unbind_session(self, session_id: str):
+        """Forget the backend of a session that has ended"""
+        self._sticky.pop(session_id, None)
+
+    # ---- Outcome tracking ----
+
+    def record_ttft(self, backend: LLMBackend, ttft_ms: float):
+        """Fold a time-to-first-token sample into the backend's EWMA"""
+        if backend.ewma_ttft_ms is None:
+            backend.ewma_ttft_ms = ttft_ms
+        else:
+            backend.ewma_ttft_ms += self.ewma_alpha * (ttft_ms - backend.ewma_ttft_ms)
+        metrics.observe("llm_backend_ttft_ms", ttft_ms)
+
+    def record_model_load(self, backend: LLMBackend, load_ms: float):
+        """Record a cold model load reported by the backend"""
+        backend.model_loads += 1
+        backend.last_load_ms = load_ms
+        backend.last_load_at = time.time()
+        metrics.incr("llm_model_loads")
+        metrics.observe("llm_model_load_ms", load_ms)
+        log.warning(f"🧊 {backend.url} had to load the model ({load_ms:.0f}ms)")
+
+    def record_slow(self, backend: LLMBackend, elapsed_ms: float):
+        """Record a lower bound for a request abandoned before its first token"""
+        if backend.ewma_ttft_ms is None or elapsed_ms > backend.ewma_ttft_ms:
+            self.record_ttft(backend, elapsed_ms)
+
+    def record_success(self, backend: LLMBackend):
+        if backend.state != LLMBackend.CLOSED:
+            log.info(f"🟢 Circuit closed for {backend.url}")
+        backend.state = LLMBackend.CLOSED
+        backend.consecutive_failures = 0
+
+    def record_failure(self, backend: LLMBackend, error: str):
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        backend.last_error = error
+        metrics.incr("llm_backend_failures")
+        if not self.can_fail_over:
+            return
+        if backend.state == LLMBackend.HALF_OPEN or backend.consecutive_failures >= self.failure_threshold:
+            if backend.state != LLMBackend.OPEN:
+                log.warning(f"🔴 Circuit opened for {backend.url} after {backend.consecutive_failures} failures: {error}")
+                metrics.incr("llm_circuit_opened")
+            backend.state = LLMBackend.OPEN
+            backend.opened_at = time.monotonic()
+
+    # ---- Health checks ----
+
+    async def check_backend(self, session: aiohttp.ClientSession, backend: LLMBackend) -> Optional[bool]:
+        """Probe one backend's model listing endpoint (None if it has no such route)"""
+        if not backend.models_route:
+            return None
+        backend.last_health_check = time.time()
+        try:
+            timeout = aiohttp.ClientTimeout(total=5.0)
+            async with session.get(backend.models_url, headers=backend.headers, timeout=timeout) as response:
+                if response.status == 404:
+                    # No /models route: leave this backend's health to its real requests
+                    backend.models_route = False
+                    log.info(f"🩺 {backend.models_url} not found, no health checks for {backend.url}")
+                    return None
+                # 401/403 and the like mean requests will fail too
+                healthy = 200 <= response.status < 300
+                if not healthy:
+                    error = f"health check returned {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            healthy = False
+            error = f"health check failed: {e!r}"
+
+        if healthy:
+            # A passing probe closes an open circuit early
+            if backend.state != LLMBackend.CLOSED:
+                self.record_success(backend)
+        else:
+            self.record_failure(backend, error)
+        return healthy
+
+    async def check_all(self, session: aiohttp.ClientSession):
+        await asyncio.gather(*(self.check_backend(session, b) for b in self.backends))
+
+    def start_health_checks(self, session_factory):
+        """Start the periodic background health check task"""
+        if self._health_task is not None or self.health_check_interval <= 0 or not self.can_fail_over:
+            return
+
+        async def loop():
+            while True:
+                try:
+                    await self.check_all(await session_factory())
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log.warning(f"Health check loop error: {e}")
+                await asyncio.sleep(self.health_check_interval)
+
+        self._health_task = asyncio.create_task(loop())
+        log.info(f"🩺 LLM health checks every {self.health_check_interval}s for {len(self.backends)} backend(s)")
+
+    async def stop_health_checks(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        return [b.get_stats() for b in self.backends]
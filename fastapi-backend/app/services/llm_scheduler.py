@@ -0,0 +1,211 @@
+"""
+LLM Request Scheduler
+
+Bounds the load we put on the model servers:
+
+- a global cap on in-flight requests
+- at most one in-flight request per session
+- round-robin between sessions that are waiting, so one chatty client
+  cannot starve the others
+- low priority for background jobs (summaries), which only run when no
+  foreground request is waiting and never take the last free slot
+"""
+import asyncio
+import itertools
+import time
+from collections import deque, OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+log = get_logger("llm_scheduler")
+
+HIGH = "high"
+LOW = "low"
+
+class _Waiter:
+    __slots__ = ("session_id", "priority", "future", "enqueued_at")
+
+    def __init__(self, session_id: str, priority: str, future: asyncio.Future):
+        self.session_id = session_id
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+class LLMScheduler:
+    """Fair admission control for LLM requests"""
+
+    def __init__(self, max_inflight: int = 4, max_background: int = 1, per_session: int = 1):
+        self.max_inflight = max_inflight
+        self.max_background = max_background
+        self.per_session = per_session
+        self.inflight = 0
+        self.background_inflight = 0
+        self._session_inflight: Dict[str, int] = {}
+        # priority -> session_id -> FIFO of waiters (sessions in arrival order)
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {HIGH: OrderedDict(), LOW: OrderedDict()}
+        # Round-robin: the least recently served waiting session goes next
+        self._last_served: Dict[str, int] = {}
+        self._served = 0
+        self._anonymous = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_inflight > 0
+
+    def queued(self, priority: Optional[str] = None) -> int:
+        """Number of waiting requests"""
+        priorities = [priority] if priority else [HIGH, LOW]
+        return sum(len(q) for p in priorities for q in self._queues[p].values())
+
+    def position(self, session_id: str) -> int:
+        """Rough queue position of a session's next request (1 = next)"""
+        for index, waiting in enumerate(self._queues[HIGH]):
+            if waiting == session_id:
+                return index + 1
+        return self.queued(HIGH) + 1
+
+    @asynccontextmanager
+    async def slot(self, session_id: Optional[str] = None, priority: str = HIGH,
+                   on_wait: Optional[Callable[[float], Awaitable[Any]]] = None, wait_notice_ms: float = 0):
+        """Hold an in-flight slot for the duration of a request
+
+        ``on_wait`` is awaited once if the request is still queued after
+        ``wait_notice_ms`` (used to tell the client we are thinking).
+        """
+        if not self.enabled:
+            yield 0.0
+            return
+        key = session_id or f"anonymous-{next(self._anonymous)}"
+        queued_ms = await self.acquire(key, priority, on_wait, wait_notice_ms)
+        try:
+            yield queued_ms
+        finally:
+            self.release(key, priority)
+
+    async def acquire(self, session_id: str, priority: str = HIGH,
+                      on_wait: Optional[Callable[[float], Awaitable[Any]]] = None,
+                      wait_notice_ms: float = 0) -> float:
+        """Wait for a slot, returning the time spent queued in ms"""
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(session_id, priority, loop.create_future())
+        self._queues[priority].setdefault(session_id, deque()).append(waiter)
+        self._dispatch()
+
+        notice_task = None
+        if on_wait is not None and not waiter.future.done():
+            notice_task = asyncio.create_task(self._notify_after(waiter, on_wait, wait_notice_ms))
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self.release(session_id, priority)
+            else:
+                self._discard(waiter)
+            raise
+        finally:
+            if notice_task is not None:
+                notice_task.cancel()
+
+        queued_ms = (time.perf_counter() - waiter.enqueued_at) * 1000
+        metrics.observe("llm_queue_ms" if priority == HIGH else "llm_background_queue_ms", queued_ms)
+        if queued_ms > 100:
+            log.info(f"⏳ LLM request for {session_id} waited {queued_ms:.0f}ms in queue ({priority})")
+        return queued_ms
+
+    def release(self, session_id: str, priority: str = HIGH):
+        """Free a slot and admit the next waiter"""
+        self.inflight -= 1
+        if priority == LOW:
+            self.background_inflight -= 1
+        remaining = self._session_inflight.get(session_id, 1) - 1
+        if remaining > 0:
+            self._session_inflight[session_id] = remaining
+        else:
+            self._session_inflight.pop(session_id, None)
+        if len(self._last_served) > 4096:
+            self._prune_history()
+        self._dispatch()
+
+    def _prune_history(self):
+        """Forget round-robin history of sessions that are neither queued nor running"""
+        active = set(self._session_inflight)
+        for queues in self._queues.values():
+            active.update(queues)
+        self._last_served = {s: n for s, n in self._last_served.items() if s in active}
+
+    async def _notify_after(self, waiter: _Waiter, on_wait, wait_notice_ms: float):
+        await asyncio.sleep(wait_notice_ms / 1000)
+        if not waiter.future.done():
+            metrics.incr("llm_thinking_notices")
+            try:
+                await on_wait((time.perf_counter() - waiter.enqueued_at) * 1000)
+            except Exception as e:
+                log.debug(f"Queue notice failed: {e}")
+
+    def _discard(self, waiter: _Waiter):
+        queue = self._queues[waiter.priority].get(waiter.session_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[waiter.priority][waiter.session_id]
+
+    def _dispatch(self):
+        """Admit waiters round-robin while there is capacity"""
+        while self.inflight < self.max_inflight:
+            waiter = self._next_waiter(HIGH)
+            if waiter is None:
+                # Background work never takes the last free slot
+                headroom = 1 if self.max_inflight > 1 else 0
+                if (self.background_inflight >= self.max_background
+                        or self.inflight >= self.max_inflight - headroom):
+                    return
+                waiter = self._next_waiter(LOW)
+                if waiter is None:
+                    return
+                self.background_inflight += 1
+            self.inflight += 1
+            self._session_inflight[waiter.session_id] = self._session_inflight.get(waiter.session_id, 0) + 1
+            waiter.future.set_result(None)
+
+    def _next_waiter(self, priority: str) -> Optional[_Waiter]:
+        """Pop the first waiter of the least recently served session that may run"""
+        queues = self._queues[priority]
+        chosen = None
+        for session_id in list(queues):
+            queue = queues[session_id]
+            while queue and queue[0].future.done():
+                queue.popleft()  # cancelled while waiting
+            if not queue:
+                del queues[session_id]
+                continue
+            if self._session_inflight.get(session_id, 0) >= self.per_session:
+                continue
+            if chosen is None or self._last_served.get(session_id, -1) < self._last_served.get(chosen, -1):
+                chosen = session_id
+        if chosen is None:
+            return None
+
+        queue = queues[chosen]
+        waiter = queue.popleft()
+        if not queue:
+            del queues[chosen]
+        self._served += 1
+        self._last_served[chosen] = self._served
+        return waiter
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_inflight": self.max_inflight,
+            "inflight": self.inflight,
+            "background_inflight": self.background_inflight,
+            "queued": self.queued(HIGH),
+            "background_queued": self.queued(LOW)
+        }
@@ -4,12 +4,141 @@ LLM Service for AI interactions
 import asyncio
 import aiohttp
 import json
-from typing import Dict, Any, Optional, AsyncGenerator
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Awaitable, Callable
 from app.config.settings import settings
 from app.utils.logger import get_logger, log_exception
+from app.utils.metrics import metrics
+from app.utils.sse_parser import SSEParser, extract_delta_content, DONE
+from app.services.llm_router import LLMRouter, LLMBackend
+from app.services import ollama
+from app.services.llm_scheduler import LLMScheduler, HIGH, LOW
+from app.services.turn_deadline import TurnDeadline
+
+# Sentinel pushed by a stream attempt when it has finished
+_END = object()
+
+class LLMBackendError(Exception):
+    """A backend failed to produce a response"""
 
 log = get_logger("llm_service")
 
+@dataclass
+class LLMStreamStats:
+    """Per-request statistics collected from a streaming completion"""
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    chunks: int = 0
+    prompt_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    prompt_eval_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    slot: Optional[int] = None
+    prompt_ms: Optional[float] = None
+    predicted_ms: Optional[float] = None
+    backend: Optional[str] = None
+    hedged: bool = False
+    context_tokens: Optional[int] = None
+    queue_ms: Optional[float] = None
+    stopped_early: bool = False
+    load_ms: Optional[float] = None
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        """Client-side time to first token"""
+        if self.first_token_at is None:
+            return None
+        return (self.first_token_at - self.started_at) * 1000
+
+    @property
+    def total_ms(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at) * 1000
+
+    @property
+    def processed_prompt_tokens(self) -> Optional[int]:
+        """Prompt tokens the server actually had to evaluate this turn"""
+        if self.prompt_eval_tokens is not None:
+            return self.prompt_eval_tokens
+        if self.prompt_tokens is None:
+            return None
+        return self.prompt_tokens - (self.cached_tokens or 0)
+
+    @property
+    def cache_reuse_ratio(self) -> Optional[float]:
+        """Share of the prompt served from the server's KV cache"""
+        if not self.prompt_tokens or self.cached_tokens is None:
+            return None
+        return self.cached_tokens / self.prompt_tokens
+
+    def update_from_event(self, data: Dict[str, Any]):
+        """Pick up server-reported usage/timings from a stream event"""
+        usage = data.get("usage") or {}
+        if usage:
+            self.prompt_tokens = usage.get("prompt_tokens", self.prompt_tokens)
+            self.completion_tokens = usage.get("completion_tokens", self.completion_tokens)
+            details = usage.get("prompt_tokens_details") or {}
+            if details.get("cached_tokens") is not None:
+                self.cached_tokens = details["cached_tokens"]
+        # llama.cpp server reports prompt evaluation timings directly;
+        # prompt_n only counts tokens evaluated, cache_n the ones reused
+        timings = data.get("timings") or {}
+        if timings:
+            self.prompt_ms = timings.get("prompt_ms", self.prompt_ms)
+            self.predicted_ms = timings.get("predicted_ms", self.predicted_ms)
+            if timings.get("prompt_n") is not None:
+                self.prompt_eval_tokens = timings["prompt_n"]
+            if timings.get("cache_n") is not None:
+                self.cached_tokens = timings["cache_n"]
+                if self.prompt_eval_tokens is not None:
+                    self.prompt_tokens = self.prompt_eval_tokens + self.cached_tokens
+            if timings.get("predicted_n") is not None:
+                self.completion_tokens = timings["predicted_n"]
+
+    def update_from_ollama(self, data: Dict[str, Any]):
+        """Pick up counts and durations (ns) from the final /api/chat object"""
+        if data.get("prompt_eval_count") is not None:
+            self.prompt_eval_tokens = data["prompt_eval_count"]
+            self.prompt_tokens = data["prompt_eval_count"]
+        if data.get("eval_count") is not None:
+            self.completion_tokens = data["eval_count"]
+        if data.get("prompt_eval_duration") is not None:
+            self.prompt_ms = data["prompt_eval_duration"] / 1e6
+        if data.get("eval_duration") is not None:
+            self.predicted_ms = data["eval_duration"] / 1e6
+        self.load_ms = ollama.load_ms(data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ttft_ms": self.ttft_ms,
+            "total_ms": self.total_ms,
+            "chunks": self.chunks,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "processed_prompt_tokens": self.processed_prompt_tokens,
+            "cache_reuse_ratio": self.cache_reuse_ratio,
+            "completion_tokens": self.completion_tokens,
+            "context_tokens": self.context_tokens,
+            "queue_ms": self.queue_ms,
+            "stopped_early": self.stopped_early,
+            "prompt_ms": self.prompt_ms,
+            "predicted_ms": self.predicted_ms,
+            "load_ms": self.load_ms,
+            "slot": self.slot,
+            "backend": self.backend,
+            "hedged": self.hedged
+        }
+
+    def merge_from(self, other: "LLMStreamStats"):
+        """Adopt the results of the attempt that won, keeping our start time"""
+        for name in ("first_token_at", "finished_at", "chunks", "prompt_tokens", "cached_tokens",
+                     "prompt_eval_tokens", "completion_tokens", "prompt_ms", "predicted_ms", "load_ms", "slot",
+                     "backend"):
+            setattr(self, name, getattr(other, name))
+
 class LLMService:
     """Service for interacting with Large Language Models"""
     
@@ -19,20 +148,144 @@ class LLMService:
         self.api_key = settings.LLM_API_KEY
         self.timeout = settings.LLM_TIMEOUT
         self.retries = settings.LLM_RETRIES
+        self.hedge_after_ms = settings.LLM_HEDGE_AFTER_MS
+        self.first_token_timeout = settings.LLM_FIRST_TOKEN_TIMEOUT
+        
+        slot_count = settings.LLM_SLOT_COUNT if settings.LLM_SLOT_AFFINITY else 0
+        urls = settings.LLM_API_URLS or [self.api_url]
+        self.router = LLMRouter(
+            [LLMBackend(url, self.model, self.api_key, slot_count) for url in urls],
+            ewma_alpha=settings.LLM_EWMA_ALPHA,
+            failure_threshold=settings.LLM_CIRCUIT_FAILURES,
+            open_seconds=settings.LLM_CIRCUIT_OPEN_SECONDS,
+            health_check_interval=settings.LLM_HEALTH_CHECK_INTERVAL
+        )
+        self.scheduler = LLMScheduler(
+            max_inflight=settings.LLM_MAX_INFLIGHT,
+            max_background=settings.LLM_MAX_BACKGROUND_INFLIGHT
+        )
+        self.thinking_notice_ms = settings.LLM_THINKING_NOTICE_MS
+        self.ollama_num_ctx = settings.OLLAMA_NUM_CTX
+        self.ollama_keep_alive = settings.OLLAMA_KEEP_ALIVE
+        self.keep_warm_interval = settings.LLM_KEEP_WARM_INTERVAL
+        self.keep_warm_window = settings.LLM_KEEP_WARM_WINDOW
+        # Last user-facing request; keep-warm stops once traffic has been idle for the window
+        self.last_traffic_at: Optional[float] = None
+        self._keep_warm_task: Optional[asyncio.Task] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session so connections to the model servers are pooled"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=10.0)
+            )
+        return self._session
+
+    async def start(self):
+        """Start background tasks (backend health checks, keep-warm)"""
+        self.router.start_health_checks(self.get_session)
+        if self.keep_warm_interval > 0 and self._keep_warm_task is None:
+            self._keep_warm_task = asyncio.create_task(self._keep_warm_loop())
+            log.info(f"🔥 Keeping LLM models warm every {self.keep_warm_interval}s "
+                     f"for {self.keep_warm_window}s after the last request")
+
+    async def close(self):
+        """Stop background tasks and close pooled connections"""
+        await self.router.stop_health_checks()
+        if self._keep_warm_task is not None:
+            self._keep_warm_task.cancel()
+            try:
+                await self._keep_warm_task
+            except asyncio.CancelledError:
+                pass
+            self._keep_warm_task = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _keep_warm_loop(self):
+        while True:
+            await asyncio.sleep(self.keep_warm_interval)
+            try:
+                await self.keep_warm_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"Keep-warm loop error: {e}")
+
+    async def keep_warm_once(self) -> int:
+        """Ping backends that served no request for a keep-warm interval, returning how many
+        
+        Nothing is sent once user traffic has been idle for ``LLM_KEEP_WARM_WINDOW``,
+        so the server can unload the model when nobody is using it.
+        """
+        now = time.monotonic()
+        if self.last_traffic_at is None or now - self.last_traffic_at > self.keep_warm_window:
+            return 0
+        idle = [b for b in self.router.backends
+                if b.state == LLMBackend.CLOSED
+                and (b.last_request_at is None or now - b.last_request_at >= self.keep_warm_interval)]
+        results = await asyncio.gather(*(self.warm_backend(b) for b in idle))
+        return sum(results)
+
+    async def warm_backend(self, backend: LLMBackend) -> bool:
+        """Send the cheapest request that keeps a backend's model loaded"""
+        if backend.native_ollama:
+            # An empty generate request only loads the model (and resets keep_alive)
+            url = ollama.api_base(backend.url) + "/api/generate"
+            body = {"model": backend.model}
+            if self.ollama_keep_alive:
+                body["keep_alive"] = self.ollama_keep_alive
+        else:
+            url = backend.url
+            body = {"model": backend.model, "messages": [{"role": "user", "content": "hi"}],
+                    "max_tokens": 1, "stream": False}
+        
+        backend.last_request_at = time.monotonic()
+        session = await self.get_session()
+        try:
+            async with self.scheduler.slot(None, LOW):
+                async with session.post(url, json=body, headers=backend.headers) as response:
+                    if response.status != 200:
+                        log.debug(f"Keep-warm ping to {url} returned {response.status}")
+                        return False
+                    data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            log.debug(f"Keep-warm ping to {url} failed: {e!r}")
+            return False
+        
+        metrics.incr("llm_keep_warm_pings")
+        loaded_ms = ollama.load_ms(data) if isinstance(data, dict) else None
+        if loaded_ms is not None and loaded_ms >= ollama.MODEL_LOAD_THRESHOLD_MS:
+            # The model had been unloaded already; at least the next user will not wait
+            self.router.record_model_load(backend, loaded_ms)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-backend routing statistics"""
+        return {"backends": self.router.get_stats(), "scheduler": self.scheduler.get_stats()}
 
     async def generate_response(
         self, 
         messages: list, 
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        session_id: Optional[str] = None,
+        priority: str = HIGH
     ) -> Optional[str]:
-        """Generate response from LLM"""
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}" if self.api_key else ""
-        }
+        """Generate response from LLM
         
+        Requests are admitted by the scheduler; background jobs pass
+        ``priority="low"``.
+        """
+        if priority == HIGH:
+            self.last_traffic_at = time.monotonic()
+        async with self.scheduler.slot(session_id, priority):
+            return await self._generate_response(messages, temperature, max_tokens)
+
+    async def _generate_response(self, messages: list, temperature: float,
+                                 max_tokens: Optional[int]) -> Optional[str]:
         payload = {
             "model": self.model,
             "messages": messages,
@@ -44,27 +297,28 @@ class LLMService:
             payload["max_tokens"] = max_tokens
         
         for attempt in range(self.retries):
-            try:
-                log.info(f"🔄 LLM request attempt {attempt + 1}/{self.retries} to {self.api_url}")
-                timeout_config = aiohttp.ClientTimeout(total=self.timeout, connect=10.0)
-                async with aiohttp.ClientSession(timeout=timeout_config) as session:
-                    async with session.post(self.api_url, json=payload, headers=headers) as response:
-                        log.info(f"📡 LLM API response status: {response.status}")
-                        if response.status == 200:
-                            data = await response.json()
-                            content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                            log.info(f"✅ LLM response received: {len(content)} characters")
-                            return content
-                        else:
-                            error_text = await response.text()
-                            log.warning(f"⚠️ LLM API returned status {response.status}: {error_text}")
-                            
-            except asyncio.TimeoutError:
-                log.warning(f"⏰ LLM request timeout after {self.timeout}s (attempt {attempt + 1}/{self.retries})")
-            except aiohttp.ClientError as e:
-                log.warning(f"🌐 LLM connection error (attempt {attempt + 1}/{self.retries}): {str(e)}")
-            except Exception as e:
-                log_exception(log, f"❌ LLM request error (attempt {attempt + 1}/{self.retries})", e)
+            tried = []
+            while True:
+                candidates = self.router.candidates(exclude=tried)
+                if not candidates:
+                    break
+                backend = candidates[0]
+                tried.append(backend)
+                try:
+                    log.info(f"🔄 LLM request attempt {attempt + 1}/{self.retries} to {backend.url}")
+                    content = await self._complete_once(backend, payload)
+                    self.router.record_success(backend)
+                    log.info(f"✅ LLM response received: {len(content)} characters")
+                    return content
+                except asyncio.TimeoutError:
+                    log.warning(f"⏰ LLM request timeout after {self.timeout}s (attempt {attempt + 1}/{self.retries})")
+                    self.router.record_failure(backend, "timeout")
+                except (aiohttp.ClientError, LLMBackendError) as e:
+                    log.warning(f"🌐 LLM connection error (attempt {attempt + 1}/{self.retries}): {str(e)}")
+                    self.router.record_failure(backend, str(e))
+                except Exception as e:
+                    log_exception(log, f"❌ LLM request error (attempt {attempt + 1}/{self.retries})", e)
+                    self.router.record_failure(backend, str(e))
                 
             if attempt < self.retries - 1:
                 wait_time = (attempt + 1) * 2  # Exponential backoff
@@ -73,64 +327,383 @@ class LLMService:
         
         return None
 
+    async def _complete_once(self, backend: LLMBackend, payload: dict) -> str:
+        """Run one non-streaming completion against a backend"""
+        session = await self.get_session()
+        backend.inflight += 1
+        backend.requests += 1
+        backend.last_request_at = time.monotonic()
+        if backend.native_ollama:
+            payload = ollama.build_chat_payload(payload, self.ollama_num_ctx, self.ollama_keep_alive)
+        started = time.perf_counter()
+        try:
+            async with session.post(backend.url, json=payload, headers=backend.headers) as response:
+                log.info(f"📡 LLM API response status: {response.status}")
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise LLMBackendError(f"status {response.status}: {error_text[:200]}")
+                data = await response.json()
+                self.router.record_ttft(backend, (time.perf_counter() - started) * 1000)
+                if backend.native_ollama:
+                    self._finish_ollama(backend, data, LLMStreamStats())
+                    return data.get("message", {}).get("content", "")
+                return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        finally:
+            backend.inflight -= 1
+
+    def estimate_ttft_ms(self, session_id: Optional[str] = None) -> Optional[float]:
+        """Rough TTFT of a request sent now: the preferred backend's load-adjusted
+        TTFT, stretched by the foreground requests already queued (None before
+        any backend has been measured)"""
+        candidates = self.router.candidates(session_id)
+        if not candidates or candidates[0].ewma_ttft_ms is None:
+            return None
+        ttft_ms = self.router.score(candidates[0])
+        if self.scheduler.enabled:
+            ttft_ms *= 1 + self.scheduler.queued(HIGH) / self.scheduler.max_inflight
+        return ttft_ms
+
+    def release_session(self, session_id: str):
+        """Free the server slots and backend binding of a session that has ended"""
+        self.router.unbind_session(session_id)
+        for backend in self.router.backends:
+            backend.slots.release(session_id)
+
     async def generate_streaming_response(
         self, 
         messages: list, 
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        stop: Optional[list] = None,
+        coalesce: bool = False,
+        stats: Optional[LLMStreamStats] = None,
+        session_id: Optional[str] = None,
+        priority: str = HIGH,
+        on_queued: Optional[Callable[[float], Awaitable[Any]]] = None,
+        deadline: Optional[TurnDeadline] = None
     ):
-        """Generate streaming response from LLM"""
+        """Generate streaming response from LLM
         
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}" if self.api_key else ""
-        }
+        The request first waits for a scheduler slot (global cap, one request
+        per session, round-robin between sessions). If it is still queued after
+        ``LLM_THINKING_NOTICE_MS``, ``on_queued(waited_ms)`` is awaited once so
+        the caller can tell the user it is thinking.
+        
+        With ``coalesce`` enabled, all tokens that arrived in the same network
+        read are yielded as a single string instead of one by one. When a
+        ``stats`` object is passed it is filled with TTFT and the usage/timings
+        the server reports at the end of the stream. A ``session_id`` pins the
+        request to that session's server slot when slot affinity is enabled.
+        
+        The request goes to the preferred backend. If no token has arrived
+        after ``LLM_HEDGE_AFTER_MS`` a hedged copy is sent to the next backend
+        and whichever answers first wins; failures before the first token fail
+        over to the remaining backends.
+        
+        Closing the generator early (``aclose()``) closes the backend
+        connection, which makes the server stop generating.
+        
+        A turn's ``deadline`` may shrink ``max_tokens`` when the turn is
+        short on latency budget.
+        """
+        if deadline is not None:
+            max_tokens = deadline.max_tokens(max_tokens)
         
         payload = {
             "model": self.model,
             "messages": messages,
             "temperature": temperature,
-            "stream": True
+            "stream": True,
+            "stream_options": {"include_usage": True}
         }
         
         if max_tokens:
             payload["max_tokens"] = max_tokens
+        if stop:
+            payload["stop"] = stop
+        
+        if stats is None:
+            stats = LLMStreamStats()
+        stats.started_at = time.perf_counter()
+        if priority == HIGH:
+            self.last_traffic_at = time.monotonic()
+        
+        async with self.scheduler.slot(session_id, priority, on_queued, self.thinking_notice_ms) as queue_ms:
+            stats.queue_ms = queue_ms
+            stream = self._stream_with_failover(payload, stats, coalesce, session_id)
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                # Cancel the backend attempts now rather than when the generator is collected
+                await stream.aclose()
+
+    async def _stream_with_failover(self, payload: dict, stats: LLMStreamStats,
+                                    coalesce: bool, session_id: Optional[str]):
+        """Stream from the preferred backend with hedging and failover"""
+        # Hedging and the first-token deadline count from dispatch, not from queueing
+        dispatched_at = time.perf_counter()
+        candidates = self.router.candidates(session_id)
+        if not candidates:
+            log.warning("⚠️ No LLM backend available (all circuits open)")
+            metrics.incr("llm_no_backend")
+            return
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        attempts: Dict[LLMBackend, asyncio.Task] = {}
+        attempt_stats: Dict[LLMBackend, LLMStreamStats] = {}
+        tried = []
+        
+        def launch(backend: LLMBackend):
+            attempt_stats[backend] = LLMStreamStats(backend=backend.url)
+            attempts[backend] = asyncio.create_task(self._run_attempt(
+                backend, dict(payload), attempt_stats[backend], coalesce, session_id, queue
+            ))
+            tried.append(backend)
+        
+        def next_backend() -> Optional[LLMBackend]:
+            remaining = self.router.candidates(session_id, exclude=tried)
+            return remaining[0] if remaining else None
+        
+        launch(candidates[0])
+        winner: Optional[LLMBackend] = None
+        can_hedge = self.hedge_after_ms > 0 and len(self.router.backends) > 1
+        first_token_deadline = dispatched_at + self.first_token_timeout
         
         try:
-            log.info(f"🔄 LLM streaming request to {self.api_url}")
-            timeout_config = aiohttp.ClientTimeout(total=self.timeout, connect=10.0)
-            async with aiohttp.ClientSession(timeout=timeout_config) as session:
-                async with session.post(self.api_url, json=payload, headers=headers) as response:
-                    log.info(f"📡 LLM streaming API response status: {response.status}")
-                    if response.status == 200:
-                        chunk_count = 0
-                        async for line in response.content:
-                            line = line.decode('utf-8').strip()
-                            if line.startswith('data: '):
-                                data_str = line[6:]  # Remove 'data: ' prefix
-                                if data_str == '[DONE]':
-                                    log.info(f"✅ LLM streaming completed with {chunk_count} chunks")
-                                    break
-                                try:
-                                    data = json.loads(data_str)
-                                    if 'choices' in data and len(data['choices']) > 0:
-                                        delta = data['choices'][0].get('delta', {})
-                                        if 'content' in delta:
-                                            chunk_count += 1
-                                            yield delta['content']
-                                except json.JSONDecodeError as e:
-                                    log.debug(f"JSON decode error in streaming: {e}")
-                                    continue
-                    else:
-                        error_text = await response.text()
-                        log.warning(f"⚠️ LLM streaming API returned status {response.status}: {error_text}")
-                        
+            while True:
+                timeout = None
+                if winner is None:
+                    now = time.perf_counter()
+                    timeout = first_token_deadline - now
+                    if can_hedge:
+                        timeout = min(timeout, dispatched_at + self.hedge_after_ms / 1000 - now)
+                    timeout = max(timeout, 0)
+                
+                try:
+                    backend, item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    if time.perf_counter() >= first_token_deadline:
+                        log.warning(f"⏰ No first token within {self.first_token_timeout}s from any backend")
+                        for backend in attempts:
+                            self.router.record_failure(backend, "first token timeout")
+                        break
+                    can_hedge = False
+                    hedge = next_backend()
+                    if hedge is not None:
+                        log.info(f"🪃 Hedging LLM request to {hedge.url} (no token after {self.hedge_after_ms}ms)")
+                        metrics.incr("llm_hedged_requests")
+                        stats.hedged = True
+                        launch(hedge)
+                    continue
+                
+                if winner is None:
+                    if isinstance(item, Exception) or item is _END:
+                        # Attempt ended before producing anything: fail over
+                        attempts.pop(backend, None)
+                        if isinstance(item, Exception):
+                            self.router.record_failure(backend, str(item))
+                        if not attempts:
+                            fallback = next_backend()
+                            if fallback is None:
+                                break
+                            log.info(f"↪️ Failing over LLM request to {fallback.url}")
+                            metrics.incr("llm_failovers")
+                            launch(fallback)
+                        continue
+                    
+                    winner = backend
+                    self.router.bind_session(session_id, winner)
+                    for other, task in attempts.items():
+                        if other is not winner:
+                            task.cancel()
+                            self.router.record_slow(other, (time.perf_counter() - dispatched_at) * 1000)
+                    if stats.hedged:
+                        metrics.incr("llm_hedge_wins" if winner is not tried[0] else "llm_hedge_losses")
+                
+                if backend is not winner:
+                    continue
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    # Mid-stream failure: the partial answer cannot be restarted elsewhere
+                    self.router.record_failure(backend, str(item))
+                    break
+                yield item
+        finally:
+            for task in attempts.values():
+                if not task.done():
+                    task.cancel()
+            if winner is not None:
+                stats.merge_from(attempt_stats[winner])
+            log.info(f"✅ LLM streaming completed with {stats.chunks} chunks")
+
+    async def _run_attempt(self, backend: LLMBackend, payload: dict, stats: LLMStreamStats,
+                           coalesce: bool, session_id: Optional[str], queue: asyncio.Queue):
+        """Stream one backend into the shared queue, tagging every item with the backend"""
+        backend.inflight += 1
+        backend.requests += 1
+        # Held until the attempt ends, so the slot is not handed to another session mid-stream
+        slot = backend.slots.acquire(session_id) if session_id and not backend.native_ollama else None
+        try:
+            async for chunk in self._stream_backend(backend, payload, stats, coalesce, slot):
+                await queue.put((backend, chunk))
+            await queue.put((backend, _END))
+            self.router.record_success(backend)
+        except asyncio.CancelledError:
+            raise
         except asyncio.TimeoutError:
-            log.warning(f"⏰ LLM streaming timeout after {self.timeout}s")
-        except aiohttp.ClientError as e:
-            log.warning(f"🌐 LLM streaming connection error: {str(e)}")
+            log.warning(f"⏰ LLM streaming timeout after {self.timeout}s ({backend.url})")
+            await queue.put((backend, LLMBackendError("timeout")))
+        except (aiohttp.ClientError, LLMBackendError) as e:
+            log.warning(f"🌐 LLM streaming connection error ({backend.url}): {str(e)}")
+            await queue.put((backend, LLMBackendError(str(e))))
         except Exception as e:
             log_exception(log, "❌ LLM streaming error", e)
+            await queue.put((backend, LLMBackendError(str(e))))
+        finally:
+            backend.inflight -= 1
+            if slot is not None:
+                backend.slots.finish(session_id)
+
+    async def _stream_backend(self, backend: LLMBackend, payload: dict, stats: LLMStreamStats,
+                              coalesce: bool, slot: Optional[int]):
+        """Stream delta content from one backend, raising LLMBackendError on failure"""
+        backend.last_request_at = time.monotonic()
+        if backend.native_ollama:
+            async for chunk in self._stream_ollama(backend, payload, stats, coalesce):
+                yield chunk
+            return
+        
+        if slot is not None:
+            payload["id_slot"] = slot
+            payload["cache_prompt"] = True
+            stats.slot = slot
+        
+        session = await self.get_session()
+        stats.started_at = time.perf_counter()
+        log.info(f"🔄 LLM streaming request to {backend.url}" + (f" (slot {slot})" if slot is not None else ""))
+        response = await session.post(backend.url, json=payload, headers=backend.headers)
+        if response.status != 200 and slot is not None:
+            # Backend rejected or could not serve the pinned slot: retry unpinned
+            error_text = await response.text()
+            response.release()
+            log.warning(f"⚠️ LLM rejected slot {slot} ({response.status}): {error_text[:200]}")
+            if response.status == 400 and "slot" in error_text.lower():
+                # Only a backend that does not understand id_slot turns affinity off;
+                # any other bad request just runs unpinned this once
+                backend.slots.disable("backend rejected id_slot")
+            else:
+                metrics.incr("llm_slot_fallbacks")
+            payload.pop("id_slot", None)
+            stats.slot = None
+            response = await session.post(backend.url, json=payload, headers=backend.headers)
+        
+        async with response:
+            log.info(f"📡 LLM streaming API response status: {response.status}")
+            if response.status != 200:
+                error_text = await response.text()
+                raise LLMBackendError(f"status {response.status}: {error_text[:200]}")
+            
+            parser = SSEParser()
+            done = False
+            async for raw in response.content.iter_any():
+                tokens = []
+                for event in parser.feed(raw):
+                    if event == DONE:
+                        done = True
+                        break
+                    content = self._handle_stream_event(event, stats)
+                    if content:
+                        tokens.append(content)
+                
+                if tokens:
+                    if stats.first_token_at is None:
+                        stats.first_token_at = time.perf_counter()
+                        self.router.record_ttft(backend, (stats.first_token_at - stats.started_at) * 1000)
+                    stats.chunks += len(tokens)
+                    if coalesce:
+                        yield "".join(tokens)
+                    else:
+                        for token in tokens:
+                            yield token
+                if done:
+                    break
+            
+            if not done:
+                for event in parser.flush():
+                    content = self._handle_stream_event(event, stats) if event != DONE else None
+                    if content:
+                        stats.chunks += 1
+                        yield content
+            stats.finished_at = time.perf_counter()
+
+    async def _stream_ollama(self, backend: LLMBackend, payload: dict, stats: LLMStreamStats, coalesce: bool):
+        """Stream message content from Ollama's native /api/chat (NDJSON)"""
+        body = ollama.build_chat_payload(payload, self.ollama_num_ctx, self.ollama_keep_alive)
+        session = await self.get_session()
+        stats.started_at = time.perf_counter()
+        log.info(f"🔄 LLM streaming request to {backend.url} (ollama native)")
+        async with session.post(backend.url, json=body, headers=backend.headers) as response:
+            log.info(f"📡 LLM streaming API response status: {response.status}")
+            if response.status != 200:
+                error_text = await response.text()
+                raise LLMBackendError(f"status {response.status}: {error_text[:200]}")
+            
+            parser = ollama.NDJSONParser()
+            done = False
+            async for raw in response.content.iter_any():
+                tokens = []
+                for data in parser.feed(raw):
+                    if data.get("error"):
+                        raise LLMBackendError(str(data["error"])[:200])
+                    content = (data.get("message") or {}).get("content")
+                    if content:
+                        tokens.append(content)
+                    if data.get("done"):
+                        self._finish_ollama(backend, data, stats)
+                        done = True
+                
+                if tokens:
+                    if stats.first_token_at is None:
+                        stats.first_token_at = time.perf_counter()
+                        self.router.record_ttft(backend, (stats.first_token_at - stats.started_at) * 1000)
+                    stats.chunks += len(tokens)
+                    if coalesce:
+                        yield "".join(tokens)
+                    else:
+                        for token in tokens:
+                            yield token
+                if done:
+                    break
+            
+            if not done:
+                for data in parser.flush():
+                    content = (data.get("message") or {}).get("content")
+                    if content:
+                        stats.chunks += 1
+                        yield content
+                    if data.get("done"):
+                        self._finish_ollama(backend, data, stats)
+            stats.finished_at = time.perf_counter()
+    
+    def _finish_ollama(self, backend: LLMBackend, data: dict, stats: LLMStreamStats):
+        """Collect final counts and note when the request waited for a model load"""
+        stats.update_from_ollama(data)
+        if stats.load_ms is not None and stats.load_ms >= ollama.MODEL_LOAD_THRESHOLD_MS:
+            self.router.record_model_load(backend, stats.load_ms)
+    
+    def _handle_stream_event(self, event: bytes, stats: LLMStreamStats) -> Optional[str]:
+        """Extract delta content from an event, collecting usage/timings on the side"""
+        content = extract_delta_content(event)
+        if content is None and (b'"usage"' in event or b'"timings"' in event):
+            try:
+                data = json.loads(event)
+                if isinstance(data, dict):
+                    stats.update_from_event(data)
+            except ValueError:
+                pass
+        return content
 
     async def generate_with_context(
         self,
@@ -153,9 +726,13 @@ class LLMService:
         
         return await self.generate_response(messages)
 
-    def create_context_messages(self, history: list, max_turns: int = 5) -> list:
-        """Create context messages from conversation history"""
-        recent_history = history[-max_turns:] if len(history) > max_turns else history
+    def create_context_messages(self, history: list, max_turns: Optional[int] = None) -> list:
+        """Create context messages from conversation history
+        
+        History packed by ``SessionMemory.get_context_for_llm`` is already
+        token-budgeted, so no turn limit is applied unless ``max_turns`` is given.
+        """
+        recent_history = history[-max_turns:] if max_turns and len(history) > max_turns else history
         
         context_messages = []
         for entry in recent_history:
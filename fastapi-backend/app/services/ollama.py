@@ -0,0 +1,92 @@
+"""
+Ollama Native API Support
+
+Ollama serves an OpenAI-compatible route (``/v1/chat/completions``) and its
+own ``/api/chat``. The native route streams newline-delimited JSON, accepts
+options the OpenAI route ignores (``num_ctx``, ``keep_alive``) and reports
+``load_duration``, which tells us when a request had to wait for the model to
+be loaded back into memory. Backends whose URL ends in ``/api/chat`` use it.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+NATIVE_CHAT_PATH = "/api/chat"
+OPENAI_CHAT_PATH = "/v1/chat/completions"
+
+# load_duration below this is bookkeeping, not an actual model load
+MODEL_LOAD_THRESHOLD_MS = 250.0
+
+def is_native_chat_url(url: str) -> bool:
+    """Check whether a backend URL is Ollama's native chat endpoint"""
+    return url.rstrip("/").endswith(NATIVE_CHAT_PATH)
+
+def api_base(url: str) -> str:
+    """Server root of an Ollama chat URL (native or OpenAI-compatible)"""
+    url = url.rstrip("/")
+    for path in (NATIVE_CHAT_PATH, OPENAI_CHAT_PATH):
+        if url.endswith(path):
+            return url[:-len(path)]
+    return url
+
+def build_chat_payload(payload: Dict[str, Any], num_ctx: int = 0, keep_alive: str = "") -> Dict[str, Any]:
+    """Translate an OpenAI-style chat payload into an /api/chat request"""
+    options: Dict[str, Any] = {}
+    if payload.get("temperature") is not None:
+        options["temperature"] = payload["temperature"]
+    if payload.get("max_tokens"):
+        options["num_predict"] = payload["max_tokens"]
+    if payload.get("stop"):
+        options["stop"] = payload["stop"]
+    if num_ctx:
+        options["num_ctx"] = num_ctx
+
+    native = {
+        "model": payload["model"],
+        "messages": payload["messages"],
+        "stream": payload.get("stream", False),
+        "options": options
+    }
+    if keep_alive:
+        native["keep_alive"] = keep_alive
+    return native
+
+def load_ms(data: Dict[str, Any]) -> Optional[float]:
+    """Model load time reported in a final response, if any"""
+    if data.get("load_duration") is None:
+        return None
+    return data["load_duration"] / 1e6
+
+class NDJSONParser:
+    """Incremental newline-delimited JSON parser for /api/chat streams"""
+
+    __slots__ = ("_buf",)
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """Consume bytes and return the objects of completed lines"""
+        buf = self._buf
+        buf += chunk
+        boundary = buf.rfind(b"\n")
+        if boundary == -1:
+            return []
+        block = bytes(buf[:boundary])
+        del buf[:boundary + 1]
+        return [self._decode(line) for line in block.split(b"\n") if line.strip()]
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Decode a trailing line that had no newline"""
+        if not self._buf.strip():
+            return []
+        line = bytes(self._buf)
+        self._buf.clear()
+        return [self._decode(line)]
+
+    @staticmethod
+    def _decode(line: bytes) -> Dict[str, Any]:
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
@@ -0,0 +1,113 @@
+"""
+Prompt Prefill Service
+
+The first turn of a session pays for evaluating the whole static prompt
+(persona, voice rules, level style, grammar rules, role play) on the model
+server. ``PromptPrefiller`` sends that prompt ahead of time, as a one-token
+low-priority request, as soon as a connection's language, level and role play
+settings are known, so the server's prefix/KV cache already holds it when the
+user finishes their first utterance. It is re-sent when those settings change.
+
+Prefill requests use the session's id, so they land on the same backend (and
+llama.cpp slot, with slot affinity) as the session's real turns.
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from app.config.settings import settings
+from app.models.session_memory import SessionMemory
+from app.services.llm_service import LLMService, LLMStreamStats
+from app.services.llm_scheduler import LOW
+from app.services.prompt_builder import PromptBuilder
+from app.utils.logger import get_logger, log_exception
+from app.utils.metrics import metrics
+
+log = get_logger("prefill")
+
+class PromptPrefiller:
+    """Warms the model server's prompt cache for each connection's static prefix"""
+
+    def __init__(self, llm_service: LLMService, prompt_builder: PromptBuilder, enabled: Optional[bool] = None):
+        self.llm_service = llm_service
+        self.prompt_builder = prompt_builder
+        self.enabled = settings.LLM_PREFILL_ENABLED if enabled is None else enabled
+        # conn_id -> {"key", "task", "stats", "first_turn"}
+        self._connections: Dict[str, Dict[str, Any]] = {}
+
+    def _state(self, conn_id: str) -> Dict[str, Any]:
+        return self._connections.setdefault(conn_id, {"key": None, "task": None, "stats": None, "first_turn": True})
+
+    def schedule(self, mem: SessionMemory, conn_id: str) -> Optional[asyncio.Task]:
+        """Prefill the connection's static prefix unless it is already cached"""
+        if not self.enabled:
+            return None
+        key = self.prompt_builder.prefix_key(mem)
+        state = self._state(conn_id)
+        if state["key"] == key:
+            return state["task"]
+        if state["task"] is not None and not state["task"].done():
+            # Settings changed before the previous prefill finished
+            state["task"].cancel()
+
+        stats = LLMStreamStats()
+        state.update(key=key, stats=stats, task=asyncio.create_task(self._prefill(mem, stats, conn_id)))
+        return state["task"]
+
+    async def _prefill(self, mem: SessionMemory, stats: LLMStreamStats, conn_id: str):
+        # Same layout as a real turn (prefix, summary, history, context) minus the transcript
+        context_messages = self.llm_service.create_context_messages(mem.get_context_for_llm())
+        messages = self.prompt_builder.build_messages(mem, context_messages)
+        started = time.perf_counter()
+        try:
+            async for _ in self.llm_service.generate_streaming_response(
+                messages=messages, temperature=0.0, max_tokens=1, stats=stats,
+                session_id=mem.client_id or conn_id, priority=LOW
+            ):
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log_exception(log, f"[{conn_id}] prefill", e)
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.incr("llm_prefills")
+        metrics.observe("llm_prefill_ms", elapsed_ms)
+        for name, value in (("llm_prefill_prompt_ms", stats.prompt_ms),
+                            ("llm_prefill_prompt_tokens", stats.processed_prompt_tokens)):
+            if value is not None:
+                metrics.observe(name, value)
+        log.info(f"[{conn_id}] 🔥 Prefilled prompt prefix in {elapsed_ms:.0f}ms "
+                 f"(prompt_eval={stats.prompt_ms}ms, evaluated={stats.processed_prompt_tokens} tokens)")
+
+    def before_turn(self, conn_id: str) -> bool:
+        """Called when a user turn starts; returns whether it is the connection's first
+
+        A prefill still waiting for a scheduler slot is dropped, since the turn
+        itself is about to evaluate the same prefix. A running one is left to
+        finish: the turn waits for it (one request per session) and then reuses
+        the cached prefix.
+        """
+        state = self._state(conn_id)
+        task, stats = state["task"], state["stats"]
+        if task is not None and not task.done() and stats.queue_ms is None:
+            task.cancel()
+            state["key"] = None
+            metrics.incr("llm_prefills_dropped")
+        first_turn = state["first_turn"]
+        state["first_turn"] = False
+        return first_turn
+
+    def forget(self, conn_id: str):
+        """Drop a closed connection, cancelling its pending prefill"""
+        state = self._connections.pop(conn_id, None)
+        if state is not None and state["task"] is not None and not state["task"].done():
+            state["task"].cancel()
+
+    async def close(self):
+        tasks = [s["task"] for s in self._connections.values() if s["task"] is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._connections.clear()
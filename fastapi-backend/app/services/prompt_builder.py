@@ -0,0 +1,129 @@
+"""
+Prompt Builder Service
+
+Lays prompts out so model servers with prefix/KV caching (llama.cpp, Ollama,
+vLLM) can reuse as much work as possible between turns:
+
+    [system] static prefix   persona + voice rules + level style + grammar rules + role play
+    [system] summary         rolling summary of compacted older turns (if any)
+    [...]    history         append-only conversation turns
+    [system] volatile        per-turn conversation context
+    [user]   transcript
+
+The static prefix is rendered once per (language, level, role play config) and
+reused verbatim, so it is byte-identical across turns and across sessions that
+share the same settings.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from app.config.languages import LANGUAGES, DEFAULT_LANGUAGE
+from app.config.prompts import (
+    VOICE_RULES, GRAMMAR_PROMPT, GRAMMAR_SKIP_PROMPT, LEVEL_STYLES, ROLE_PLAY_PROMPT,
+    CONVERSATION_CONTEXT_PROMPT, CONVERSATION_SUMMARY_PROMPT
+)
+from app.config.roleplay import ROLE_PLAY_TEMPLATES
+from app.models.session_memory import SessionMemory
+from app.utils.logger import get_logger
+
+log = get_logger("prompt_builder")
+
+# (language, level, role_play_enabled, template, organization, details, role)
+PrefixKey = Tuple[str, str, bool, str, str, str, str]
+
+class PromptBuilder:
+    """Builds chat messages with a cached static prefix and a volatile tail"""
+
+    def __init__(self, max_cached_prefixes: int = 256):
+        self.max_cached_prefixes = max_cached_prefixes
+        self._prefix_cache: Dict[PrefixKey, str] = {}
+        self.prefix_hits = 0
+        self.prefix_misses = 0
+
+    @staticmethod
+    def prefix_key(mem: SessionMemory) -> PrefixKey:
+        """Get the cache key of the static prefix for a session"""
+        if mem.role_play_enabled:
+            return (mem.language, mem.level, True, mem.role_play_template,
+                    mem.organization_name, mem.organization_details, mem.role_title)
+        return (mem.language, mem.level, False, "", "", "", "")
+
+    def get_static_prefix(self, mem: SessionMemory) -> str:
+        """Get the static system prompt for a session, rendering it at most once"""
+        key = self.prefix_key(mem)
+        prefix = self._prefix_cache.get(key)
+        if prefix is not None:
+            self.prefix_hits += 1
+            return prefix
+
+        self.prefix_misses += 1
+        prefix = self._render_static_prefix(key)
+        if len(self._prefix_cache) >= self.max_cached_prefixes:
+            # Evict the oldest entry (dicts keep insertion order)
+            self._prefix_cache.pop(next(iter(self._prefix_cache)))
+        self._prefix_cache[key] = prefix
+        log.debug(f"Rendered static prompt prefix for {key[:3]} ({len(prefix)} chars)")
+        return prefix
+
+    def _render_static_prefix(self, key: PrefixKey) -> str:
+        """Render the static prefix from templates"""
+        language, level, role_play_enabled, template, organization, details, role_title = key
+        lang_config = LANGUAGES.get(language, LANGUAGES[DEFAULT_LANGUAGE])
+
+        sections = [lang_config["persona"], VOICE_RULES]
+        level_style = LEVEL_STYLES.get(level, LEVEL_STYLES["medium"])
+        sections.append(level_style["prompt"])
+        sections.append(GRAMMAR_PROMPT)
+
+        if role_play_enabled:
+            template_config = ROLE_PLAY_TEMPLATES.get(template, ROLE_PLAY_TEMPLATES["custom"])
+            sections.append(ROLE_PLAY_PROMPT.format(
+                template_name=template_config["name"],
+                role_title=role_title or template_config["defaultRole"],
+                organization_name=organization or template_config["name"],
+                organization_details=details or template_config["description"]
+            ))
+
+        return "\n\n".join(section for section in sections if section)
+
+    def build_volatile_context(self, mem: SessionMemory) -> str:
+        """Render the per-turn conversation context"""
+        summary = mem.get_conversation_summary()
+        return CONVERSATION_CONTEXT_PROMPT.format(
+            user_name=summary.get('user_name') or 'Unknown',
+            session_duration=summary.get('session_duration', 0),
+            total_interactions=summary.get('total_interactions', 0),
+            topics=', '.join(summary.get('topics_discussed', [])[-5:]),
+            language=summary.get('language', 'en'),
+            level=summary.get('level', 'medium')
+        )
+
+    def build_messages(self, mem: SessionMemory, context_messages: List[Dict[str, str]],
+                       transcript: Optional[str] = None, skip_grammar: bool = False) -> List[Dict[str, str]]:
+        """Assemble the full message list for a turn
+
+        ``skip_grammar`` asks for no grammar correction block in this reply
+        (a latency degradation); it goes in the volatile context, so the
+        cached prefix is unchanged.
+        """
+        messages = [{"role": "system", "content": self.get_static_prefix(mem)}]
+        if mem.running_summary:
+            # Only changes when older turns get compacted, so it stays cacheable in between
+            messages.append({"role": "system", "content": CONVERSATION_SUMMARY_PROMPT.format(
+                summary=mem.running_summary
+            )})
+        messages.extend(context_messages)
+        volatile = self.build_volatile_context(mem)
+        if skip_grammar:
+            volatile += "\n\n" + GRAMMAR_SKIP_PROMPT
+        messages.append({"role": "system", "content": volatile})
+        if transcript is not None:
+            messages.append({"role": "user", "content": transcript})
+        return messages
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get prefix cache statistics"""
+        return {
+            "cached_prefixes": len(self._prefix_cache),
+            "prefix_hits": self.prefix_hits,
+            "prefix_misses": self.prefix_misses
+        }
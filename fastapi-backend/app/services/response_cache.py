@@ -0,0 +1,272 @@
+"""
+Response Cache Service
+
+Language learners repeat the same short utterances constantly ("how are you",
+"what your name", greetings). This cache answers them locally instead of
+running the LLM again.
+
+Entries are scoped by (language, level, persona/role play fingerprint, short
+context hash) and keyed by the normalized utterance:
+
+- exact hits: identical normalized utterance in the same scope
+- fuzzy hits: MinHash over character n-grams with an LSH band index, accepted
+  when the estimated Jaccard similarity reaches the threshold
+
+Utterances that reference session memory ("what's my name", "remember that")
+are never cached, nor are responses that mention the user by name.
+"""
+import hashlib
+import random
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.models.session_memory import SessionMemory
+from app.services.prompt_builder import PromptBuilder
+from app.utils.grammar_stream import strip_grammar_correction
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+log = get_logger("response_cache")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_NON_WORD = re.compile(r"[^\w\s']+", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+# Utterances whose answer depends on what the session remembers
+_MEMORY_REFERENCES = re.compile(
+    r"\b(my\s+name|who\s+am\s+i|remember|recall|i\s+told\s+you|i\s+said|did\s+i|last\s+time|"
+    r"earlier|before|my\s+birthday|where\s+did\s+i|what\s+did\s+i|"
+    r"mi\s+chiamo|come\s+mi\s+chiamo|ricord|ti\s+ho\s+detto|prima|il\s+mio\s+nome|"
+    r"il\s+mio\s+compleanno|dove\s+volevo)\b",
+    re.I | re.UNICODE
+)
+
+# (language, level, persona fingerprint, context hash)
+Scope = Tuple[str, str, str, str]
+
+@dataclass
+class CacheEntry:
+    scope: Scope
+    utterance: str
+    response: str
+    signature: Tuple[int, ...]
+    created_at: float
+    hits: int = 0
+
+def normalize_utterance(text: str) -> str:
+    """Casefold, strip punctuation and collapse whitespace"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+class MinHasher:
+    """MinHash signatures over character n-grams"""
+
+    def __init__(self, num_perm: int = 32, ngram: int = 3, seed: int = 7):
+        self.num_perm = num_perm
+        self.ngram = ngram
+        rng = random.Random(seed)
+        self._params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                        for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> Set[int]:
+        padded = f" {text} "
+        if len(padded) <= self.ngram:
+            return {zlib.crc32(padded.encode())}
+        return {zlib.crc32(padded[i:i + self.ngram].encode())
+                for i in range(len(padded) - self.ngram + 1)}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        shingles = self.shingles(text)
+        return tuple(
+            min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self._params
+        )
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+class ResponseCache:
+    """LRU response cache with TTL, exact and MinHash fuzzy lookups"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        fuzzy_threshold: Optional[float] = None,
+        max_words: Optional[int] = None,
+        context_turns: int = 1,
+        num_perm: int = 32,
+        bands: int = 8,
+        enabled: Optional[bool] = None
+    ):
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_SIZE
+        self.ttl_seconds = ttl_seconds or settings.RESPONSE_CACHE_TTL
+        self.fuzzy_threshold = fuzzy_threshold or settings.RESPONSE_CACHE_FUZZY_THRESHOLD
+        self.max_words = max_words or settings.RESPONSE_CACHE_MAX_WORDS
+        self.context_turns = context_turns
+        self.enabled = settings.RESPONSE_CACHE_ENABLED if enabled is None else enabled
+
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        self._entries: "OrderedDict[Tuple[Scope, str], CacheEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple[Scope, int, Tuple[int, ...]], Set[Tuple[Scope, str]]] = {}
+
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    # ---- Keys ----
+
+    def scope_for(self, mem: SessionMemory) -> Scope:
+        """Cache scope: language, level, persona fingerprint and recent context"""
+        persona = hashlib.blake2b(repr(PromptBuilder.prefix_key(mem)).encode(), digest_size=8).hexdigest()
+        context = ""
+        if self.context_turns > 0:
+            recent = [turn["content"] for turn in mem.conversation_context[-self.context_turns:]
+                      if turn["role"] == "assistant"]
+            context = hashlib.blake2b(
+                normalize_utterance(" ".join(recent)).encode(), digest_size=8
+            ).hexdigest()
+        return (mem.language, mem.level, persona, context)
+
+    def is_cacheable(self, utterance: str, mem: SessionMemory) -> bool:
+        """Opt out for long utterances and anything that references session memory"""
+        if not self.enabled or not utterance:
+            return False
+        if len(utterance.split()) > self.max_words:
+            return False
+        if _MEMORY_REFERENCES.search(utterance):
+            return False
+        if mem.user_name and f" {normalize_utterance(mem.user_name)} " in f" {utterance} ":
+            return False
+        return True
+
+    def make_key(self, transcript: str, mem: SessionMemory) -> Optional[Tuple[Scope, str]]:
+        """Build the cache key for a turn, or None when the turn must not be cached"""
+        utterance = normalize_utterance(transcript)
+        if not self.is_cacheable(utterance, mem):
+            self.skipped += 1
+            metrics.incr("response_cache_skipped")
+            return None
+        return (self.scope_for(mem), utterance)
+
+    # ---- Lookups ----
+
+    def _band_keys(self, scope: Scope, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield (scope, band, signature[band * self.rows:(band + 1) * self.rows])
+
+    def _expired(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.created_at > self.ttl_seconds
+
+    def get(self, key: Optional[Tuple[Scope, str]], fuzzy_threshold: Optional[float] = None) -> Optional[str]:
+        """Look a turn up: exact match first, then the fuzzy index
+
+        ``fuzzy_threshold`` overrides the configured threshold for this lookup.
+        """
+        if key is None:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry):
+            self._remove(key)
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.exact_hits += 1
+            metrics.incr("response_cache_exact_hits")
+            return entry.response
+
+        scope, utterance = key
+        signature = self.hasher.signature(utterance)
+        best_key, best_score = None, 0.0
+        for band_key in self._band_keys(scope, signature):
+            for candidate in self._buckets.get(band_key, ()):
+                score = self.hasher.similarity(signature, self._entries[candidate].signature)
+                if score > best_score:
+                    best_key, best_score = candidate, score
+
+        if best_key is not None and best_score >= (fuzzy_threshold or self.fuzzy_threshold):
+            entry = self._entries[best_key]
+            if self._expired(entry):
+                self._remove(best_key)
+            else:
+                self._entries.move_to_end(best_key)
+                entry.hits += 1
+                self.fuzzy_hits += 1
+                metrics.incr("response_cache_fuzzy_hits")
+                log.debug(f"Fuzzy cache hit '{utterance}' ~ '{entry.utterance}' ({best_score:.2f})")
+                # The correction was written for the other utterance
+                return strip_grammar_correction(entry.response) or None
+
+        self.misses += 1
+        metrics.incr("response_cache_misses")
+        return None
+
+    def put(self, key: Optional[Tuple[Scope, str]], response: str, mem: Optional[SessionMemory] = None):
+        """Store the response generated for a turn"""
+        if key is None or not response or not response.strip():
+            return
+        if mem is not None and mem.user_name and mem.user_name.casefold() in response.casefold():
+            # Personalized answers must not leak to other sessions
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        scope, utterance = key
+        entry = CacheEntry(
+            scope=scope,
+            utterance=utterance,
+            response=response,
+            signature=self.hasher.signature(utterance),
+            created_at=time.time()
+        )
+        self._entries[key] = entry
+        for band_key in self._band_keys(scope, entry.signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            metrics.incr("response_cache_evictions")
+
+    def _remove(self, key: Tuple[Scope, str]):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band_key in self._band_keys(entry.scope, entry.signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def clear(self):
+        self._entries.clear()
+        self._buckets.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit statistics"""
+        lookups = self.exact_hits + self.fuzzy_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": (self.exact_hits + self.fuzzy_hits) / lookups if lookups else 0.0
+        }
@@ -0,0 +1,111 @@
+"""
+Model Server Slot Affinity
+
+llama.cpp's server keeps one KV cache per slot (``--parallel N``). Pinning a
+conversation to the same slot on every turn lets ``cache_prompt`` reuse the
+already evaluated prefix + history instead of re-processing the whole prompt.
+
+A slot is held while its session's request streams (``acquire`` ... ``finish``)
+and until the session ends (``release``); only idle sessions lose their slot
+to a newcomer.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+log = get_logger("slot_manager")
+
+class SlotAffinityManager:
+    """Tracks which session owns which server-side slot (LRU eviction)"""
+
+    def __init__(self, slot_count: int):
+        self.slot_count = max(0, slot_count)
+        # session_id -> (slot, last_used, inflight, released), least to most recently used
+        self._owners: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._free_slots = list(range(self.slot_count - 1, -1, -1))
+        self.supported = self.slot_count > 0
+        self.assignments = 0
+        self.hits = 0
+        self.evictions = 0
+        self.busy_misses = 0
+
+    def acquire(self, session_id: str) -> Optional[int]:
+        """Get the slot pinned to a session for one request, assigning one if needed
+        
+        Returns None (send unpinned) when every slot is owned by a session with
+        a request in flight. Call ``finish`` when a pinned request ends.
+        """
+        if not self.supported or not session_id:
+            return None
+
+        owner = self._owners.get(session_id)
+        if owner is not None:
+            owner["last_used"] = time.time()
+            owner["inflight"] += 1
+            owner["released"] = False
+            self._owners.move_to_end(session_id)
+            self.hits += 1
+            metrics.incr("llm_slot_hits")
+            return owner["slot"]
+
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            # Take over the least recently used idle session's slot
+            evicted_session = next((sid for sid, o in self._owners.items() if o["inflight"] == 0), None)
+            if evicted_session is None:
+                self.busy_misses += 1
+                metrics.incr("llm_slot_busy")
+                return None
+            slot = self._owners.pop(evicted_session)["slot"]
+            self.evictions += 1
+            metrics.incr("llm_slot_evictions")
+            log.info(f"♻️ Slot {slot} moved from {evicted_session} to {session_id}")
+
+        self._owners[session_id] = {"slot": slot, "last_used": time.time(), "inflight": 1, "released": False}
+        self.assignments += 1
+        metrics.incr("llm_slot_assignments")
+        return slot
+
+    def finish(self, session_id: str):
+        """A pinned request of a session ended"""
+        owner = self._owners.get(session_id)
+        if owner is None:
+            return
+        owner["inflight"] = max(0, owner["inflight"] - 1)
+        if owner["released"] and owner["inflight"] == 0:
+            self.release(session_id)
+
+    def release(self, session_id: str):
+        """Free the slot of a session that has ended (once its last request finishes)"""
+        owner = self._owners.get(session_id)
+        if owner is None:
+            return
+        if owner["inflight"] > 0:
+            owner["released"] = True
+            return
+        del self._owners[session_id]
+        self._free_slots.append(owner["slot"])
+
+    def disable(self, reason: str):
+        """Stop pinning requests, e.g. when the backend rejects slot ids"""
+        if self.supported:
+            log.warning(f"⚠️ Disabling slot affinity: {reason}")
+            metrics.incr("llm_slot_fallbacks")
+        self.supported = False
+        self._owners.clear()
+        self._free_slots = list(range(self.slot_count - 1, -1, -1))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get slot usage statistics"""
+        return {
+            "supported": self.supported,
+            "slot_count": self.slot_count,
+            "pinned_sessions": len(self._owners),
+            "assignments": self.assignments,
+            "hits": self.hits,
+            "evictions": self.evictions,
+            "busy_misses": self.busy_misses
+        }
@@ -0,0 +1,205 @@
+"""
+Speculative Response Generation
+
+The browser's speech recognizer reports partial transcripts well before the
+final one. Once a partial has stayed the same for ``SPECULATION_STABLE_MS``,
+``Speculator`` starts the LLM request for it (at normal priority, with the
+turn deadline degradations a turn started now would get) and holds the
+output. When the final transcript arrives it is committed if it matches the
+partial (normalized like response cache keys) and the turn's prompt and
+request degradations would be the same; the turn then replays the held
+tokens and follows the live stream. Anything else cancels the speculative
+request.
+
+At most ``SPECULATION_MAX_INFLIGHT`` speculative requests run per process, so
+speculation can never crowd out real turns.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.services.llm_service import LLMStreamStats
+from app.services.response_cache import normalize_utterance
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+log = get_logger("speculation")
+
+# What a starter returns: (turn signature, stats, LLM text stream), or None to skip
+Prepared = Optional[Tuple[Hashable, LLMStreamStats, AsyncIterator[str]]]
+
+class SpeculativeRun:
+    """One speculative LLM request and the output held so far"""
+
+    def __init__(self, text: str, normalized: str, signature: Hashable, stats: LLMStreamStats):
+        self.text = text
+        self.normalized = normalized
+        self.signature = signature
+        self.stats = stats
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.started_at = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    async def run(self, source: AsyncIterator[str]):
+        try:
+            async for chunk in source:
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+                self.chunks.append(chunk)
+                self._changed.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._changed.set()
+
+    async def stream(self):
+        """Replay the held output, then follow the live request"""
+        index = 0
+        try:
+            while True:
+                self._changed.clear()
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            # Closed early (length control, barge-in): stop the request too
+            self.cancel()
+
+    def cancel(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+class Speculator:
+    """Starts, holds and commits speculative replies per connection"""
+
+    def __init__(self, enabled: Optional[bool] = None, stable_ms: Optional[float] = None,
+                 max_inflight: Optional[int] = None):
+        self.enabled = settings.SPECULATION_ENABLED if enabled is None else enabled
+        self.stable_s = (settings.SPECULATION_STABLE_MS if stable_ms is None else stable_ms) / 1000
+        self.max_inflight = settings.SPECULATION_MAX_INFLIGHT if max_inflight is None else max_inflight
+        self._runs: Dict[str, SpeculativeRun] = {}
+        # conn_id -> (normalized partial, timer task)
+        self._timers: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.saved_ms_total = 0.0
+
+    def inflight(self) -> int:
+        return sum(1 for run in self._runs.values() if not run.done)
+
+    def on_partial(self, conn_id: str, text: str, start: Callable[[str], Prepared]):
+        """Note a partial transcript; speculate once it has been stable long enough"""
+        normalized = normalize_utterance(text)
+        if not self.enabled or not normalized:
+            return
+        run = self._runs.get(conn_id)
+        if run is not None and run.normalized == normalized:
+            return
+        timer = self._timers.get(conn_id)
+        if timer is not None and timer[0] == normalized and not timer[1].done():
+            return
+        # The partial changed: whatever was held is for different words
+        self._cancel_timer(conn_id)
+        if self._runs.pop(conn_id, None) is not None:
+            run.cancel()
+            self._miss("changed")
+        task = asyncio.create_task(self._start_when_stable(conn_id, text, normalized, start))
+        self._timers[conn_id] = (normalized, task)
+
+    async def _start_when_stable(self, conn_id: str, text: str, normalized: str, start: Callable[[str], Prepared]):
+        await asyncio.sleep(self.stable_s)
+        self._timers.pop(conn_id, None)
+        if self.inflight() >= self.max_inflight:
+            self.skipped += 1
+            metrics.incr("speculation_skipped_cap")
+            return
+        prepared = start(text)
+        if prepared is None:
+            return
+        signature, stats, source = prepared
+        run = SpeculativeRun(text, normalized, signature, stats)
+        run.task = asyncio.create_task(run.run(source))
+        self._runs[conn_id] = run
+        self.started += 1
+        metrics.incr("speculations_started")
+        log.info(f"[{conn_id}] 🔮 Speculating on '{text}'")
+
+    def claim(self, conn_id: str, transcript: str, signature: Hashable) -> Optional[SpeculativeRun]:
+        """Commit the held reply if it was made for this transcript and prompt"""
+        self._cancel_timer(conn_id)
+        run = self._runs.pop(conn_id, None)
+        if run is None:
+            return None
+        if run.normalized != normalize_utterance(transcript):
+            reason = "transcript"
+        elif run.signature != signature:
+            reason = "context"
+        elif run.error is not None:
+            reason = "error"
+        else:
+            now = time.perf_counter()
+            # Time the turn no longer waits for: up to the first token, or as far as it got
+            saved_ms = ((run.first_token_at or now) - run.started_at) * 1000
+            self.hits += 1
+            self.saved_ms_total += saved_ms
+            metrics.incr("speculation_hits")
+            metrics.observe("speculation_saved_ms", saved_ms)
+            log.info(f"[{conn_id}] 🔮 Committed speculative reply ({len(run.chunks)} chunks held, "
+                     f"~{saved_ms:.0f}ms saved)")
+            return run
+        run.cancel()
+        self._miss(reason)
+        return None
+
+    def _miss(self, reason: str):
+        self.misses += 1
+        metrics.incr("speculation_misses")
+        metrics.incr(f"speculation_miss_{reason}")
+
+    def _cancel_timer(self, conn_id: str):
+        timer = self._timers.pop(conn_id, None)
+        if timer is not None:
+            timer[1].cancel()
+
+    def forget(self, conn_id: str):
+        """Drop a closed connection's timer and held reply"""
+        self._cancel_timer(conn_id)
+        run = self._runs.pop(conn_id, None)
+        if run is not None:
+            run.cancel()
+
+    async def close(self):
+        tasks = [task for _, task in self._timers.values()]
+        tasks += [run.task for run in self._runs.values() if run.task is not None]
+        self._timers.clear()
+        self._runs.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        decided = self.hits + self.misses
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped_cap": self.skipped,
+            "hit_rate": self.hits / decided if decided else 0.0,
+            "avg_saved_ms": self.saved_ms_total / self.hits if self.hits else 0.0,
+            "inflight": self.inflight()
+        }
@@ -0,0 +1,245 @@
+"""
+Speech Pipeline
+
+Runs the audio side of a turn as concurrent stages so that reading LLM
+tokens, synthesizing one chunk and sending another overlap instead of
+running strictly in series:
+
+    reader (caller) --text--> segmenter --chunks--> N TTS workers --> ordered sender
+
+The caller is the reader stage: it pushes spoken text with ``feed()`` as
+tokens arrive. Stages are joined by bounded queues, so a slow TTS backs up
+into the reader instead of buffering without limit. The sender emits audio
+strictly in chunk order no matter which worker finishes first.
+
+An optional ``TTSChunkPolicy`` resizes chunks as the turn goes, from the
+measured synthesis speed and the audio already queued on the client.
+
+``emit_filler()`` lets the caller play a filler clip while the first chunk
+is still on its way; it is sent only if no reply audio has gone out yet.
+
+With ``workers=0`` every chunk is synthesized and sent inline from ``feed()``
+(the previous serial behaviour, useful when TTS cannot run in parallel).
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.services.tts_chunk_policy import TTSChunkPolicy, wav_duration_s
+from app.utils.logger import get_logger
+from app.utils.sentence_segmenter import SentenceSegmenter
+
+log = get_logger("speech_pipeline")
+
+_END = object()
+
+class SpeechPipeline:
+    """Concurrent segmenter, TTS workers and in-order sender for one turn"""
+
+    def __init__(
+        self,
+        synthesize: Callable[[str], Awaitable[Optional[Any]]],
+        emit_audio: Callable[[str, Any], Awaitable[Any]],
+        segmenter: SentenceSegmenter,
+        workers: int = 2,
+        max_pending: int = 4,
+        policy: Optional[TTSChunkPolicy] = None
+    ):
+        self.synthesize = synthesize
+        self.emit_audio = emit_audio
+        self.segmenter = segmenter
+        # Sizes chunks from the measured TTS speed and queued audio (optional)
+        self.policy = policy
+        self.workers = workers
+        self.max_pending = max(1, max_pending)
+
+        self.first_audio_at: Optional[float] = None
+        self.chunks = 0
+        self.synth_ms: List[float] = []
+        # (chunk, estimated client playback start) of every chunk sent
+        self.sent_audio: List[Tuple[str, float]] = []
+        self._playback_end: Optional[float] = None
+        self.filler_sent = False
+        # Keeps a filler clip from slipping in between reply chunks
+        self._emit_lock = asyncio.Lock()
+        self._text_q: asyncio.Queue = asyncio.Queue(self.max_pending)
+        # Work for the TTS workers, and the same chunks' futures in order for the sender
+        self._tts_q: asyncio.Queue = asyncio.Queue(self.max_pending)
+        self._order_q: asyncio.Queue = asyncio.Queue(self.max_pending)
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def serial(self) -> bool:
+        return self.workers <= 0
+
+    def start(self) -> "SpeechPipeline":
+        if not self.serial and not self._tasks:
+            self._tasks = [asyncio.create_task(self._segmenter()), asyncio.create_task(self._sender())]
+            self._tasks += [asyncio.create_task(self._tts_worker()) for _ in range(self.workers)]
+        return self
+
+    async def feed(self, text: str):
+        """Push spoken text (waits when the downstream stages are full)"""
+        if not text:
+            return
+        if self.serial:
+            for chunk in self._segment(text):
+                await self._process_inline(chunk)
+            return
+        await self._text_q.put(text)
+
+    async def finish(self):
+        """Flush the remaining text and wait until every chunk has been sent"""
+        if self.serial:
+            for chunk in self._segment_rest():
+                await self._process_inline(chunk)
+            return
+        await self._text_q.put(_END)
+        try:
+            await asyncio.gather(*self._tasks)
+        except BaseException:
+            await self.close()
+            raise
+        self._tasks = []
+
+    async def close(self):
+        """Cancel all stages (no-op once finished)"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def emit_filler(self, text: str, audio, emit: Optional[Callable[[str, Any], Awaitable[Any]]] = None) -> bool:
+        """Send a filler clip ahead of the reply, if no reply audio was sent yet
+
+        Reply chunks queue up behind it on the client, but it is not part of
+        ``heard_text()``.
+        """
+        async with self._emit_lock:
+            if self.chunks or self.filler_sent:
+                return False
+            await (emit or self.emit_audio)(text, audio)
+            self._queue_playback(audio)
+            self.filler_sent = True
+            return True
+
+    def heard_text(self, now: Optional[float] = None) -> str:
+        """Text of the chunks the client has started playing by ``now``
+
+        The client plays chunks back to back as they arrive, so this is what
+        the user heard if the turn is cut off now.
+        """
+        now = now or time.perf_counter()
+        return " ".join(chunk.strip() for chunk, start in self.sent_audio if start <= now)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": self.chunks,
+            "workers": self.workers,
+            "synth_ms_total": sum(self.synth_ms),
+            "synth_ms_max": max(self.synth_ms, default=0.0),
+            "decisions": self.policy.decisions if self.policy is not None else []
+        }
+
+    # ---- Stages ----
+
+    async def _segmenter(self):
+        """Group incoming text into speakable chunks"""
+        while True:
+            text = await self._text_q.get()
+            if text is _END:
+                break
+            for chunk in self._segment(text):
+                await self._dispatch(chunk)
+        for chunk in self._segment_rest():
+            await self._dispatch(chunk)
+        for _ in range(self.workers):
+            await self._tts_q.put(_END)
+        await self._order_q.put(_END)
+
+    async def _dispatch(self, chunk: str):
+        future = asyncio.get_running_loop().create_future()
+        # The order queue bounds how many chunks are in flight
+        await self._order_q.put((chunk, future))
+        await self._tts_q.put((chunk, future))
+
+    async def _tts_worker(self):
+        while True:
+            item = await self._tts_q.get()
+            if item is _END:
+                return
+            chunk, future = item
+            try:
+                audio = await self._synthesize(chunk)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(audio)
+
+    async def _sender(self):
+        """Emit synthesized chunks in the order they were segmented"""
+        while True:
+            item = await self._order_q.get()
+            if item is _END:
+                return
+            chunk, future = item
+            try:
+                await self._emit(chunk, await future)
+            except Exception as e:
+                # Keep draining so the upstream stages never block on a full queue
+                log.warning(f"Skipping audio chunk: {e}")
+
+    # ---- Helpers ----
+
+    def _segment(self, text: str) -> List[str]:
+        if self.policy is not None:
+            self.policy.configure(self.segmenter)
+        chunks = self.segmenter.feed(text)
+        if self.policy is not None:
+            for chunk in chunks:
+                self.policy.on_chunk(chunk)
+        return chunks
+
+    def _segment_rest(self) -> List[str]:
+        chunk = self.segmenter.flush()
+        if not chunk:
+            return []
+        if self.policy is not None:
+            self.policy.on_chunk(chunk)
+        return [chunk]
+
+    async def _synthesize(self, chunk: str):
+        started = time.perf_counter()
+        audio = None
+        try:
+            audio = await self.synthesize(chunk)
+            return audio
+        finally:
+            synth_s = time.perf_counter() - started
+            self.synth_ms.append(synth_s * 1000)
+            if self.policy is not None:
+                self.policy.on_synthesized(chunk, synth_s, audio)
+
+    async def _emit(self, chunk: str, audio):
+        if not audio:
+            return
+        async with self._emit_lock:
+            await self.emit_audio(chunk, audio)
+            self.sent_audio.append((chunk, self._queue_playback(audio)))
+            self.chunks += 1
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+
+    def _queue_playback(self, audio) -> float:
+        """Track audio sent to the client, returning when it starts playing"""
+        now = time.perf_counter()
+        start = now if self._playback_end is None else max(now, self._playback_end)
+        self._playback_end = start + wav_duration_s(audio)
+        if self.policy is not None:
+            self.policy.on_audio_sent(audio)
+        return start
+
+    async def _process_inline(self, chunk: str):
+        await self._emit(chunk, await self._synthesize(chunk))
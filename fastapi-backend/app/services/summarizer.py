@@ -0,0 +1,130 @@
+"""
+Conversation Summarizer Service
+
+Compacts old conversation turns off the hot path. Once a session has more
+than ``SUMMARY_TRIGGER_TURNS`` unsummarized turns, the oldest block (all but
+the newest ``SUMMARY_KEEP_TURNS``) is merged into ``SessionMemory.running_summary``
+by a background LLM call that starts after the turn has been answered. The
+prompt then carries the summary instead of those turns, so its size stays
+bounded however long the conversation runs. A session whose summary failed
+is not retried until ``SUMMARY_RETRY_SECONDS`` have passed, doubling with
+each further failure.
+"""
+import asyncio
+import time
+import weakref
+from typing import Dict, Optional
+
+from app.config.languages import LANGUAGES, DEFAULT_LANGUAGE
+from app.config.prompts import SUMMARIZE_PROMPT
+from app.config.settings import settings
+from app.models.session_memory import SessionMemory, MemoryStore
+from app.services.llm_service import LLMService
+from app.services.llm_scheduler import LOW
+from app.utils.logger import get_logger, log_exception
+from app.utils.metrics import metrics
+
+log = get_logger("summarizer")
+
+# The retry wait stops doubling after this many failures in a row
+MAX_RETRY_DOUBLINGS = 5
+
+class ConversationSummarizer:
+    """Schedules background compaction of old turns into a running summary"""
+
+    def __init__(self, llm_service: LLMService, trigger_turns: Optional[int] = None,
+                 keep_turns: Optional[int] = None, max_tokens: Optional[int] = None,
+                 enabled: Optional[bool] = None, retry_s: Optional[float] = None):
+        self.llm_service = llm_service
+        self.trigger_turns = trigger_turns or settings.SUMMARY_TRIGGER_TURNS
+        self.keep_turns = keep_turns if keep_turns is not None else settings.SUMMARY_KEEP_TURNS
+        self.max_tokens = max_tokens or settings.SUMMARY_MAX_TOKENS
+        self.enabled = settings.SUMMARY_ENABLED if enabled is None else enabled
+        self.retry_s = settings.SUMMARY_RETRY_SECONDS if retry_s is None else retry_s
+        # One summary at a time; the LLM scheduler also runs them at low priority
+        self._slots = asyncio.Semaphore(1)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        # Sessions whose last summary failed: (failures in a row, monotonic time of the next try)
+        self._backoff: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def needs_compaction(self, mem: SessionMemory) -> bool:
+        """Check whether a session has enough unsummarized turns to compact"""
+        return len(mem.get_unsummarized_turns()) > self.trigger_turns
+
+    def schedule(self, mem: SessionMemory, mem_store: Optional[MemoryStore] = None,
+                 conn_id: str = "-") -> Optional[asyncio.Task]:
+        """Start a background compaction for a session if it is due"""
+        if not self.enabled or not self.needs_compaction(mem):
+            return None
+        backoff = self._backoff.get(mem)
+        if backoff is not None and time.monotonic() < backoff[1]:
+            return None
+        key = id(mem)
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            return task
+
+        task = asyncio.create_task(self._compact(mem, mem_store, conn_id))
+        self._tasks[key] = task
+        task.add_done_callback(lambda _t: self._tasks.pop(key, None))
+        return task
+
+    async def _compact(self, mem: SessionMemory, mem_store: Optional[MemoryStore], conn_id: str):
+        async with self._slots:
+            block = mem.get_compaction_block(self.keep_turns)
+            if not block:
+                return
+            started = time.perf_counter()
+            try:
+                summary = await self.summarize(mem.running_summary, block, mem.language)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_exception(log, f"[{conn_id}] summarize", e)
+                summary = None
+
+            if not summary:
+                failures = self._backoff.get(mem, (0, 0.0))[0] + 1
+                wait_s = self.retry_s * 2 ** min(failures - 1, MAX_RETRY_DOUBLINGS)
+                self._backoff[mem] = (failures, time.monotonic() + wait_s)
+                metrics.incr("summary_failures")
+                log.warning(f"[{conn_id}] ⚠️ Summary failed, keeping {len(block)} turns verbatim "
+                            f"(retry in {wait_s:.0f}s)")
+                return
+
+            self._backoff.pop(mem, None)
+
+            until = block[-1].get("interaction_id", 0)
+            mem.apply_summary(summary, until)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            metrics.incr("summaries_created")
+            metrics.observe("summary_ms", elapsed_ms)
+            log.info(f"[{conn_id}] 🗜️ Compacted {len(block)} turns into a {len(summary)}-char summary "
+                     f"in {elapsed_ms:.0f}ms (until interaction {until})")
+            if mem_store:
+                mem_store.save(mem)
+
+    async def summarize(self, previous_summary: str, turns: list, language: str) -> Optional[str]:
+        """Merge turns into the previous summary with one LLM call"""
+        lang_config = LANGUAGES.get(language, LANGUAGES[DEFAULT_LANGUAGE])
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+        messages = [
+            {"role": "system", "content": SUMMARIZE_PROMPT.format(
+                max_words=int(self.max_tokens * 0.6), language_name=lang_config["name"]
+            )},
+            {"role": "user", "content": (
+                f"EXISTING SUMMARY:\n{previous_summary or '(none)'}\n\nNEW TURNS:\n{transcript}"
+            )}
+        ]
+        summary = await self.llm_service.generate_response(
+            messages, temperature=0.2, max_tokens=self.max_tokens, priority=LOW
+        )
+        return summary.strip() if summary else None
+
+    async def close(self):
+        """Cancel pending compactions"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
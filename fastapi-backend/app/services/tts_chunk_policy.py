@@ -0,0 +1,145 @@
+"""
+Adaptive TTS Chunk Sizing
+
+The first chunk of a reply should be short so audio starts quickly. After
+that a chunk only has to be synthesized before the client runs out of audio,
+and longer chunks sound better (prosody spans the whole sentence) and cost
+less per word. ``TTSChunkPolicy`` sizes each chunk from:
+
+- the voice's live real-time factor (synthesis time / audio duration) and
+  audio seconds per word, tracked per voice by ``TTSSpeedTracker``
+- the audio already queued on the client, estimated from the duration of
+  every chunk sent so far (the client plays chunks back to back)
+
+and sets the segmenter's thresholds before each piece of text is fed. Every
+chunk's decision is kept in ``decisions`` for per-turn logging.
+"""
+import base64
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.config.settings import settings
+from app.utils.sentence_segmenter import SentenceSegmenter
+
+_WAV_HEADER_BYTES = 44
+# Headerless audio is assumed to be Piper's usual 22.05 kHz 16-bit mono
+_FALLBACK_BYTE_RATE = 22050 * 2
+
+def wav_duration_s(audio: Union[bytes, str]) -> float:
+    """Duration of a WAV clip, raw or base64-encoded (only the header is decoded)"""
+    if isinstance(audio, str):
+        try:
+            header = base64.b64decode(audio[:60])
+        except ValueError:
+            # Not base64 audio; nothing to measure
+            return 0.0
+        size = len(audio) * 3 // 4 - audio[-2:].count("=")
+    else:
+        header, size = audio[:_WAV_HEADER_BYTES], len(audio)
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        byte_rate = int.from_bytes(header[28:32], "little")
+    else:
+        byte_rate = _FALLBACK_BYTE_RATE
+    return max(0, size - _WAV_HEADER_BYTES) / byte_rate if byte_rate else 0.0
+
+class TTSSpeedTracker:
+    """Moving averages of synthesis speed per voice, shared by all turns"""
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        # voice -> (real-time factor, audio seconds per word)
+        self._voices: Dict[str, Tuple[float, float]] = {}
+
+    def observe(self, voice: str, words: int, synth_s: float, audio_s: float):
+        if audio_s <= 0 or words <= 0:
+            return
+        rtf, s_per_word = synth_s / audio_s, audio_s / words
+        if voice in self._voices:
+            old_rtf, old_s_per_word = self._voices[voice]
+            rtf = old_rtf + self.alpha * (rtf - old_rtf)
+            s_per_word = old_s_per_word + self.alpha * (s_per_word - old_s_per_word)
+        self._voices[voice] = (rtf, s_per_word)
+
+    def get(self, voice: str) -> Optional[Tuple[float, float]]:
+        """(real-time factor, audio seconds per word), or None before the first chunk"""
+        return self._voices.get(voice)
+
+class TTSChunkPolicy:
+    """Chooses the next chunk size for one turn"""
+
+    def __init__(
+        self,
+        tracker: TTSSpeedTracker,
+        voice: Optional[str],
+        enabled: Optional[bool] = None,
+        first_words: Optional[int] = None,
+        max_words: Optional[int] = None,
+        safety: float = 0.7
+    ):
+        self.tracker = tracker
+        self.voice = voice or "default"
+        self.enabled = settings.TTS_ADAPTIVE_CHUNKS if enabled is None else enabled
+        self.first_words = first_words or settings.TTS_FIRST_CHUNK_WORDS
+        self.max_words = max(self.first_words, max_words or settings.TTS_MAX_CHUNK_WORDS)
+        # Fraction of the queued audio a chunk's synthesis may take
+        self.safety = safety
+        self.decisions: List[Dict[str, Any]] = []
+        self._current: Dict[str, Any] = {}
+        self._default_words: Optional[int] = None
+        self._playback_end: Optional[float] = None
+
+    def queued_audio_s(self, now: Optional[float] = None) -> float:
+        """Audio the client still has to play"""
+        if self._playback_end is None:
+            return 0.0
+        return max(0.0, self._playback_end - (now or time.perf_counter()))
+
+    def configure(self, segmenter: SentenceSegmenter):
+        """Set the segmenter's thresholds for the chunk being built"""
+        if not self.enabled:
+            self._current = {"mode": "fixed", "target_words": segmenter.soft_max_words}
+            return
+        queued = self.queued_audio_s()
+        speed = self.tracker.get(self.voice)
+        if self._default_words is None:
+            # The segmenter's own threshold, used until the voice has been measured
+            self._default_words = segmenter.soft_max_words
+        if not self.decisions:
+            mode, target = "first", self.first_words
+        elif speed is None:
+            mode, target = "default", self._default_words
+        else:
+            rtf, s_per_word = speed
+            # Words that can be synthesized before the queued audio runs out
+            affordable = queued * self.safety / max(rtf * s_per_word, 1e-3)
+            mode, target = "adaptive", int(min(self.max_words, max(self.first_words, affordable)))
+
+        segmenter.min_words = 1 if mode == "first" else max(1, target // 2)
+        segmenter.soft_max_words = target
+        segmenter.hard_max_words = target * 2 if mode == "first" else max(target + target // 2, target + 4)
+        self._current = {
+            "mode": mode,
+            "target_words": target,
+            "queued_ms": round(queued * 1000),
+            "rtf": round(speed[0], 3) if speed else None
+        }
+
+    def on_chunk(self, chunk: str):
+        """Record the decision that produced a chunk"""
+        self.decisions.append(dict(self._current, words=len(chunk.split())))
+
+    def on_synthesized(self, chunk: str, synth_s: float, audio: Union[bytes, str, None]):
+        if audio:
+            self.tracker.observe(self.voice, len(chunk.split()), synth_s, wav_duration_s(audio))
+
+    def on_audio_sent(self, audio: Union[bytes, str]):
+        now = time.perf_counter()
+        start = now if self._playback_end is None else max(now, self._playback_end)
+        self._playback_end = start + wav_duration_s(audio)
+
+    def summary(self) -> str:
+        """Compact per-turn description, e.g. '5w first | 14w adaptive@1800ms'"""
+        return " | ".join(
+            f"{d['words']}w {d['mode']}" + (f"@{d['queued_ms']}ms" if d.get("queued_ms") else "")
+            for d in self.decisions
+        )
@@ -0,0 +1,154 @@
+"""
+Turn Latency Deadlines
+
+Every turn gets a ``TurnDeadline``: a budget for the time from the final
+transcript to the first reply audio (``SLO_FIRST_AUDIO_MS``). When the turn
+starts, ``SLOController`` predicts that latency from the LLM backends' live
+TTFT (stretched by the queue ahead) and the voice's measured synthesis speed.
+If the prediction eats into the budget it applies the configured
+degradations, cheapest first, one more for each ``SLO_DEGRADE_STEP`` of the
+budget the prediction is over:
+
+- ``cache``      accept looser fuzzy response cache matches
+- ``grammar``    ask for no grammar correction block this turn
+- ``max_tokens`` cap the reply at ``SLO_MAX_TOKENS_RATIO`` of the level's budget
+- ``voice``      synthesize with the language's faster voice (``SLO_FAST_VOICES``)
+
+The LLM and TTS paths read the decisions off the deadline. Each decision and
+the latency the turn achieved are recorded as metrics.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import settings
+from app.services.tts_chunk_policy import TTSSpeedTracker
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+log = get_logger("turn_deadline")
+
+DEGRADATIONS = ("cache", "grammar", "max_tokens", "voice")
+# The ones that change the LLM request (the others act on the cache lookup and TTS)
+REQUEST_DEGRADATIONS = ("grammar", "max_tokens")
+
+class TurnDeadline:
+    """Latency budget of one turn and the degradations applied to meet it"""
+
+    def __init__(self, budget_ms: float, started_at: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self.started_at = started_at or time.perf_counter()
+        self.predicted_ms: Optional[float] = None
+        # name -> what it changed
+        self.degradations: Dict[str, Any] = {}
+        self.achieved_ms: Optional[float] = None
+
+    def elapsed_ms(self, now: Optional[float] = None) -> float:
+        return ((now or time.perf_counter()) - self.started_at) * 1000
+
+    def remaining_ms(self, now: Optional[float] = None) -> float:
+        return self.budget_ms - self.elapsed_ms(now)
+
+    def degraded(self, name: str) -> bool:
+        return name in self.degradations
+
+    def apply(self, name: str, detail: Any = True, record: bool = True):
+        self.degradations[name] = detail
+        if record:
+            metrics.incr(f"slo_degrade_{name}")
+
+    def request_degradations(self) -> tuple:
+        """The applied degradations the LLM request depends on"""
+        return tuple(name for name in REQUEST_DEGRADATIONS if self.degraded(name))
+
+    def max_tokens(self, max_tokens: Optional[int]) -> Optional[int]:
+        """The reply's token cap, shrunk when ``max_tokens`` is degraded"""
+        if not max_tokens or not self.degraded("max_tokens"):
+            return max_tokens
+        return max(16, int(max_tokens * settings.SLO_MAX_TOKENS_RATIO))
+
+    def voice(self, language: str, voice: Optional[str]) -> Optional[str]:
+        """The voice to synthesize with, the fast tier when ``voice`` is degraded"""
+        if self.degraded("voice"):
+            return settings.SLO_FAST_VOICES.get(language, voice)
+        return voice
+
+    def cache_threshold(self) -> Optional[float]:
+        """Fuzzy response cache threshold for this turn (None = the cache's own)"""
+        return settings.SLO_CACHE_FUZZY_THRESHOLD if self.degraded("cache") else None
+
+    def finish(self, first_audio_at: Optional[float], conn_id: str = "") -> Optional[float]:
+        """Record the latency the turn achieved against its budget"""
+        if first_audio_at is None:
+            return None
+        self.achieved_ms = (first_audio_at - self.started_at) * 1000
+        met = self.achieved_ms <= self.budget_ms
+        metrics.observe("slo_first_audio_ms", self.achieved_ms)
+        metrics.incr("slo_met" if met else "slo_missed")
+        if self.degradations:
+            metrics.observe("slo_degraded_first_audio_ms", self.achieved_ms)
+        log.info(f"[{conn_id}] ⏱️ First audio {self.achieved_ms:.0f}ms / {self.budget_ms:.0f}ms budget "
+                 f"({'met' if met else 'missed'}, degraded: {', '.join(self.degradations) or 'none'})")
+        return self.achieved_ms
+
+class SLOController:
+    """Predicts each turn's latency and decides what to degrade"""
+
+    def __init__(
+        self,
+        llm_service,
+        tts_speed: TTSSpeedTracker,
+        enabled: Optional[bool] = None,
+        budget_ms: Optional[float] = None,
+        risk_ratio: Optional[float] = None,
+        degradations: Optional[List[str]] = None
+    ):
+        self.llm_service = llm_service
+        self.tts_speed = tts_speed
+        self.enabled = settings.SLO_ENABLED if enabled is None else enabled
+        self.budget_ms = budget_ms or settings.SLO_FIRST_AUDIO_MS
+        # Degrade once the prediction reaches this share of the budget
+        self.risk_ratio = risk_ratio or settings.SLO_RISK_RATIO
+        self.step = settings.SLO_DEGRADE_STEP
+        self.degradations = [d for d in (settings.SLO_DEGRADATIONS if degradations is None else degradations)
+                             if d in DEGRADATIONS]
+
+    def predict_first_audio_ms(self, session_id: Optional[str], voice: Optional[str]) -> float:
+        """Expected time to the first TTFT plus synthesis of the first chunk"""
+        estimate = getattr(self.llm_service, "estimate_ttft_ms", None)
+        ttft_ms = (estimate(session_id) if estimate is not None else None) or 0.0
+        speed = self.tts_speed.get(voice or "default")
+        tts_ms = 0.0
+        if speed is not None:
+            rtf, s_per_word = speed
+            tts_ms = rtf * s_per_word * settings.TTS_FIRST_CHUNK_WORDS * 1000
+        return ttft_ms + tts_ms
+
+    def applicable(self, name: str, language: str) -> bool:
+        if name == "voice":
+            return language in settings.SLO_FAST_VOICES
+        return True
+
+    def new_deadline(self, session_id: Optional[str], language: str, voice: Optional[str],
+                     conn_id: str = "", speculative: bool = False) -> TurnDeadline:
+        """Start a turn's deadline and decide its degradations
+        
+        A ``speculative`` deadline (a reply started from a partial transcript)
+        gets the same decisions without recording them; only turns are counted.
+        """
+        deadline = TurnDeadline(self.budget_ms)
+        if not self.enabled:
+            return deadline
+        deadline.predicted_ms = self.predict_first_audio_ms(session_id, voice)
+        if not speculative:
+            metrics.observe("slo_predicted_first_audio_ms", deadline.predicted_ms)
+        over = deadline.predicted_ms / self.budget_ms
+        if over < self.risk_ratio:
+            return deadline
+        steps = 1 + int((over - self.risk_ratio) / self.step) if self.step > 0 else len(self.degradations)
+        for name in [d for d in self.degradations if self.applicable(d, language)][:steps]:
+            deadline.apply(name, record=not speculative)
+        if deadline.degradations and not speculative:
+            metrics.incr("slo_turns_degraded")
+            log.info(f"[{conn_id}] ⏱️ Predicted first audio {deadline.predicted_ms:.0f}ms of "
+                     f"{self.budget_ms:.0f}ms budget, degrading: {', '.join(deadline.degradations)}")
+        return deadline
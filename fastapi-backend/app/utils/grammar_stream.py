@@ -0,0 +1,125 @@
+"""
+Grammar Correction Stream Splitting
+
+The grammar prompt makes the model open its reply with
+
+    GRAMMAR_CORRECTION_START
+    INCORRECT: ...
+    CORRECT: ...
+    GRAMMAR_CORRECTION_END
+
+That block is for the screen, not for the speaker. ``GrammarCorrectionSplitter``
+separates it from the spoken text incrementally, token chunk by token chunk,
+so the answer can be synthesized as soon as it starts instead of after the
+whole block has streamed.
+"""
+import re
+from typing import Dict, List, Tuple
+
+START_MARKER = "GRAMMAR_CORRECTION_START"
+END_MARKER = "GRAMMAR_CORRECTION_END"
+
+_GRAMMAR_BLOCK = re.compile(r"GRAMMAR_CORRECTION_START.*?GRAMMAR_CORRECTION_END\s*", re.S)
+_INCORRECT = re.compile(r"INCORRECT:\s*(.+?)\s*(?:\n|CORRECT:|$)", re.I | re.S)
+_CORRECT = re.compile(r"(?<!IN)CORRECT:\s*(.+?)\s*$", re.S)
+# Decoration some models copy from the UI around the markers
+_DECORATION = "🔴"
+
+def strip_grammar_correction(text: str) -> str:
+    """Drop complete grammar correction blocks from a response"""
+    return _GRAMMAR_BLOCK.sub("", text).replace(_DECORATION, "").strip()
+
+def parse_correction(block: str) -> Dict[str, str]:
+    """Parse the body of a correction block into incorrect/correct text"""
+    body = block.replace(_DECORATION, "").strip()
+    incorrect = _INCORRECT.search(body)
+    correct = _CORRECT.search(body)
+    return {
+        "incorrect": incorrect.group(1).strip() if incorrect else "",
+        "correct": correct.group(1).strip() if correct else "",
+        "text": body
+    }
+
+def format_correction(correction: Dict[str, str]) -> str:
+    """Render a parsed correction back into the block the frontend parses"""
+    return f"{START_MARKER}\n{correction['text']}\n{END_MARKER}\n\n"
+
+class GrammarCorrectionSplitter:
+    """Incrementally splits a token stream into spoken text and correction blocks"""
+
+    __slots__ = ("_buf", "_in_block", "_spoken", "corrections")
+
+    def __init__(self):
+        self._buf = ""
+        self._in_block = False
+        self._spoken = False
+        self.corrections: List[Dict[str, str]] = []
+
+    def feed(self, chunk: str) -> Tuple[str, List[Dict[str, str]]]:
+        """Feed streamed text, returning (speakable text, completed corrections)"""
+        self._buf += chunk
+        speech = []
+        corrections = []
+
+        while True:
+            if not self._in_block:
+                start = self._buf.find(START_MARKER)
+                if start >= 0:
+                    speech.append(self._buf[:start])
+                    self._buf = self._buf[start + len(START_MARKER):]
+                    self._in_block = True
+                    continue
+                # Hold back a tail that may be the beginning of a marker
+                keep = self._partial_marker_len(self._buf)
+                speech.append(self._buf[:len(self._buf) - keep])
+                self._buf = self._buf[len(self._buf) - keep:]
+                break
+
+            end = self._buf.find(END_MARKER)
+            if end < 0:
+                break
+            corrections.append(parse_correction(self._buf[:end]))
+            self._buf = self._buf[end + len(END_MARKER):]
+            self._in_block = False
+
+        self.corrections.extend(corrections)
+        return self._speech("".join(speech)), corrections
+
+    def flush(self) -> Tuple[str, List[Dict[str, str]]]:
+        """Finish the stream; an unterminated block is still never spoken"""
+        corrections = []
+        if self._in_block:
+            if self._buf.strip():
+                corrections.append(parse_correction(self._buf))
+            text = ""
+        else:
+            text = self._buf
+        self._buf = ""
+        self._in_block = False
+        self.corrections.extend(corrections)
+        return self._speech(text), corrections
+
+    @property
+    def in_block(self) -> bool:
+        return self._in_block
+
+    def _speech(self, text: str) -> str:
+        if _DECORATION in text:
+            text = text.replace(_DECORATION, "")
+        if not self._spoken:
+            # The answer usually follows the block after blank lines
+            text = text.lstrip()
+            if text:
+                self._spoken = True
+        return text
+
+    @staticmethod
+    def _partial_marker_len(buf: str) -> int:
+        """Length of the longest buffer suffix that is a proper prefix of the start marker"""
+        tail = buf[-(len(START_MARKER) - 1):]
+        first = tail.find("G")
+        while first >= 0:
+            if START_MARKER.startswith(tail[first:]):
+                return len(tail) - first
+            first = tail.find("G", first + 1)
+        return 0
@@ -0,0 +1,74 @@
+"""
+Streaming Response Length Control
+
+Replaces the legacy ``enforce_level_style`` post-processing. Instead of
+trimming a finished reply, ``ResponseLengthController`` counts the sentences
+and words of the spoken text as it streams and ends the reply at the first
+sentence boundary once the level budget is met, so the caller can close the
+LLM stream instead of paying for tokens (and TTS) that would be cut anyway.
+"""
+from typing import Optional
+
+from app.config.prompts import LEVEL_STYLES
+
+_SENTENCE_END = ".!?…"
+_CLOSERS = "\"')]»”’"
+
+class ResponseLengthController:
+    """Cuts streamed text at the first sentence boundary past a sentence/word budget"""
+
+    __slots__ = ("max_sentences", "max_words", "hard_max_words", "sentences", "words",
+                 "done", "truncated", "_in_word", "_at_boundary")
+
+    def __init__(self, max_sentences: int, max_words: int, hard_max_words: Optional[int] = None):
+        self.max_sentences = max_sentences
+        self.max_words = max_words
+        # A run-on sentence is cut mid-way once it gets this long
+        self.hard_max_words = hard_max_words or int(max_words * 1.5)
+        self.sentences = 0
+        self.words = 0
+        self.done = False
+        self.truncated = False
+        self._in_word = False
+        self._at_boundary = False
+
+    @classmethod
+    def for_level(cls, level: str) -> "ResponseLengthController":
+        style = LEVEL_STYLES.get(level, LEVEL_STYLES["medium"])
+        return cls(style["max_sentences"], style["max_words"])
+
+    def budget_met(self) -> bool:
+        return self.sentences >= self.max_sentences or self.words >= self.max_words
+
+    def feed(self, text: str) -> str:
+        """Return the part of ``text`` within budget; ``done`` is set once the reply should end"""
+        if self.done:
+            return ""
+        for index, char in enumerate(text):
+            if char.isspace():
+                if self._at_boundary:
+                    self._at_boundary = False
+                    self.sentences += 1
+                    if self.budget_met():
+                        self.done = True
+                        return text[:index]
+                elif self._in_word and self.words >= self.hard_max_words:
+                    self.done = self.truncated = True
+                    return text[:index].rstrip(",;:-– ") + "."
+                self._in_word = False
+                continue
+
+            if not self._in_word:
+                self._in_word = True
+                self.words += 1
+            if char in _SENTENCE_END:
+                self._at_boundary = True
+            elif char not in _CLOSERS:
+                self._at_boundary = False
+        return text
+
+    def finish(self):
+        """Count a final sentence that ended with the stream"""
+        if self._at_boundary:
+            self._at_boundary = False
+            self.sentences += 1
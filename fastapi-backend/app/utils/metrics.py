@@ -0,0 +1,59 @@
+"""
+In-process Metrics Registry
+"""
+import time
+from collections import deque
+from typing import Dict, Any, Deque
+
+class MetricsRegistry:
+    """Lightweight counters and timing samples for pipeline instrumentation"""
+
+    def __init__(self, max_samples: int = 500):
+        self.max_samples = max_samples
+        self.started_at = time.time()
+        self.counters: Dict[str, float] = {}
+        self.samples: Dict[str, Deque[float]] = {}
+
+    def incr(self, name: str, value: float = 1):
+        """Increment a counter"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        """Record a sample (latency in ms, token count, ...)"""
+        series = self.samples.get(name)
+        if series is None:
+            series = self.samples[name] = deque(maxlen=self.max_samples)
+        series.append(value)
+
+    def summary(self, name: str) -> Dict[str, float]:
+        """Summarize the recent samples of one series"""
+        series = self.samples.get(name)
+        if not series:
+            return {"count": 0}
+        ordered = sorted(series)
+        count = len(ordered)
+        return {
+            "count": count,
+            "avg": sum(ordered) / count,
+            "p50": ordered[count // 2],
+            "p95": ordered[min(count - 1, int(count * 0.95))],
+            "max": ordered[-1],
+            "last": series[-1]
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get all counters and sample summaries"""
+        return {
+            "uptime_seconds": time.time() - self.started_at,
+            "counters": dict(self.counters),
+            "timings": {name: self.summary(name) for name in self.samples}
+        }
+
+    def reset(self):
+        """Drop all recorded metrics"""
+        self.counters.clear()
+        self.samples.clear()
+        self.started_at = time.time()
+
+# Global metrics registry
+metrics = MetricsRegistry()
@@ -0,0 +1,140 @@
+"""
+Streaming Sentence Segmenter
+
+Cuts streamed reply text into chunks for TTS. Text is scanned once as it
+arrives (each character is looked at once, and the buffer never grows past
+one chunk), instead of re-splitting the whole buffer on every token.
+
+A chunk ends at:
+- a sentence terminator followed by whitespace, unless the word before it is
+  a known abbreviation ("Dr.", "e.g."), an initial ("J.") or a list number
+  ("1."); decimals ("3.5") never qualify since no space follows the period.
+  Sentences shorter than ``min_words`` are merged with the next one
+- a full-width terminator ("。", "！", "？"), which needs no following space
+- a newline
+- a prosodic break (comma, semicolon, colon, dash) once the chunk has
+  ``soft_max_words`` words, so long sentences are synthesized in parts
+- ``hard_max_words`` words or ``max_chars`` characters, at the last prosodic
+  break if there was one, else between words
+
+Terminators and abbreviations come from ``LANGUAGES[lang]["segmentation"]``.
+"""
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Tuple
+
+from app.config.languages import LANGUAGES
+
+DEFAULT_SENTENCE_END = ".!?…"
+_FULLWIDTH_END = "。！？"
+_SOFT_BREAKS = ",;:–—，、；："
+_CLOSERS = "\"')]»”’」』"
+_OPENERS = "\"'([«“‘¿¡"
+
+@lru_cache(maxsize=None)
+def language_rules(language: str) -> Tuple[str, FrozenSet[str]]:
+    """Sentence terminators and abbreviations (lowercase, no final period) of a language"""
+    config = LANGUAGES.get(language, {}).get("segmentation", {})
+    sentence_end = config.get("sentence_end", DEFAULT_SENTENCE_END) + _FULLWIDTH_END
+    return sentence_end, frozenset(a.lower() for a in config.get("abbreviations", ()))
+
+class SentenceSegmenter:
+    """Incremental text -> TTS chunk splitter for one reply"""
+
+    __slots__ = ("language", "min_words", "soft_max_words", "hard_max_words", "max_chars", "_sentence_end",
+                 "_abbreviations", "_text", "_pos", "_words", "_in_word", "_word_start",
+                 "_after_end", "_after_soft", "_after_fullwidth", "_soft_cut")
+
+    def __init__(self, language: str = "en", soft_max_words: int = 12, hard_max_words: int = 30,
+                 max_chars: int = 240, min_words: int = 1):
+        self.language = language
+        # Thresholds may be changed between feeds (see TTSChunkPolicy)
+        self.min_words = min_words
+        self.soft_max_words = soft_max_words
+        self.hard_max_words = hard_max_words
+        self.max_chars = max_chars
+        self._sentence_end, self._abbreviations = language_rules(language)
+        self._text = ""
+        self._reset()
+
+    def _reset(self):
+        self._pos = 0
+        self._words = 0
+        self._in_word = False
+        self._word_start = 0
+        self._after_end = False
+        self._after_soft = False
+        self._after_fullwidth = False
+        self._soft_cut: Optional[int] = None
+
+    def feed(self, text: str) -> List[str]:
+        """Consume streamed text and return the chunks it completed"""
+        chunks: List[str] = []
+        self._text += text
+        i = self._pos
+        while i < len(self._text):
+            cut = self._scan(self._text[i], i)
+            if cut is None:
+                i += 1
+                continue
+            chunk = self._text[:cut].strip()
+            if chunk:
+                chunks.append(chunk)
+            # Re-scan whatever follows the cut as the start of the next chunk
+            self._text = self._text[cut:]
+            self._reset()
+            i = 0
+        self._pos = i
+        return chunks
+
+    def flush(self) -> str:
+        """Return the remaining text at the end of the reply"""
+        rest, self._text = self._text.strip(), ""
+        self._reset()
+        return rest
+
+    def _scan(self, char: str, i: int) -> Optional[int]:
+        """Advance over one character, returning a cut position when a chunk ends"""
+        if char.isspace():
+            if self._in_word:
+                self._in_word = False
+                if self._after_end and not self._is_abbreviation(self._text[self._word_start:i]):
+                    if self._words >= self.min_words:
+                        return i
+                    # Too short on its own; still the best place for a forced cut
+                    self._soft_cut = i
+                elif self._after_soft:
+                    if self._words >= self.soft_max_words:
+                        return i
+                    self._soft_cut = i
+            if char == "\n" and self._words:
+                return i
+            return None
+
+        if self._after_fullwidth and char not in _CLOSERS:
+            return i
+        if not self._in_word:
+            self._in_word = True
+            self._word_start = i
+            self._words += 1
+            if self._words > self.hard_max_words:
+                return self._soft_cut or i
+        if i >= self.max_chars:
+            return self._soft_cut or (self._word_start if self._word_start > 0 else i)
+
+        closer = char in _CLOSERS
+        self._after_end = char in self._sentence_end or (closer and self._after_end)
+        self._after_soft = char in _SOFT_BREAKS or (closer and self._after_soft)
+        self._after_fullwidth = char in _FULLWIDTH_END or (closer and self._after_fullwidth)
+        return None
+
+    def _is_abbreviation(self, word: str) -> bool:
+        """Whether a word ending in a terminator is an abbreviation, initial or list number"""
+        word = word.rstrip(_CLOSERS)
+        if not word.endswith(".") or word.endswith(".."):
+            return False
+        stem = word[:-1].lstrip(_OPENERS)
+        if stem.lower() in self._abbreviations:
+            return True
+        if len(stem) == 1 and stem.isupper():
+            return True
+        return stem.isdigit() and self._words == 1
@@ -0,0 +1,167 @@
+"""
+Incremental Server-Sent Events parser for LLM token streams
+
+Works on raw bytes as they arrive from the socket: frames may be split across
+reads, several frames may arrive in one read, and multi-line ``data:`` fields
+are joined per the SSE spec. Delta content is pulled out of OpenAI-style chunk
+payloads with a precompiled byte pattern and only falls back to ``json.loads``
+for payloads the pattern does not recognise.
+"""
+import json
+import re
+from typing import List, Optional
+
+DONE = b"[DONE]"
+
+_DATA = b"data"
+_DATA_SP = b"data: "
+
+# "delta": {"role": "...", "content": "..."} with an optional leading role key
+_DELTA_CONTENT = re.compile(
+    rb'"delta"\s*:\s*\{\s*(?:"role"\s*:\s*"[^"]*"\s*,\s*)?'
+    rb'"content"\s*:\s*"([^"\\]*(?:\\.[^"\\]*)*)"'
+)
+
+
+class SSEParser:
+    """Byte-level incremental SSE parser returning complete event payloads"""
+
+    __slots__ = ("_buf", "_data", "_skip_lf")
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._data: List[bytes] = []
+        self._skip_lf = False
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Consume a chunk of bytes and return the payloads of completed events"""
+        buf = self._buf
+        buf += chunk
+        if self._data or self._skip_lf or buf.find(b"\r") != -1:
+            return self._feed_lines()
+
+        # Common case, LF-only endings: cut at the last frame boundary and
+        # split the completed frames in one pass
+        boundary = buf.rfind(b"\n\n")
+        if boundary == -1:
+            return []
+        block = bytes(buf[:boundary])
+        del buf[:boundary + 2]
+
+        events: List[bytes] = []
+        for frame in block.split(b"\n\n"):
+            if frame.startswith(_DATA_SP) and frame.find(b"\n") == -1:
+                events.append(frame[6:])
+            elif frame:
+                self._parse_frame(frame, events)
+        return events
+
+    def flush(self) -> List[bytes]:
+        """Dispatch whatever is left once the stream has ended"""
+        events = []
+        if self._buf:
+            events = self.feed(b"\n\n")
+        if self._data:
+            events.append(b"\n".join(self._data))
+            self._data = []
+        return events
+
+    def _parse_frame(self, frame: bytes, events: List[bytes]):
+        """Parse one complete LF-separated frame"""
+        data = []
+        for line in frame.split(b"\n"):
+            value = self._field_value(line)
+            if value is not None:
+                data.append(value)
+        if data:
+            events.append(b"\n".join(data))
+
+    def _feed_lines(self) -> List[bytes]:
+        """Line-by-line parsing for CR/CRLF endings and partially read events"""
+        buf = self._buf
+        events: List[bytes] = []
+        data = self._data
+        pos = 0
+        end = len(buf)
+
+        # A CR at the very end of the previous read may be the first half of CRLF
+        if self._skip_lf:
+            self._skip_lf = False
+            if end and buf[0] == 0x0A:
+                pos = 1
+
+        while pos < end:
+            nl = buf.find(b"\n", pos)
+            cr = buf.find(b"\r", pos, nl if nl != -1 else end)
+            if cr != -1:
+                line_end, next_pos = cr, cr + 1
+                if next_pos < end:
+                    if buf[next_pos] == 0x0A:
+                        next_pos += 1
+                else:
+                    self._skip_lf = True
+            elif nl != -1:
+                line_end, next_pos = nl, nl + 1
+            else:
+                break
+
+            if line_end == pos:
+                # Blank line dispatches the pending event
+                if data:
+                    events.append(b"\n".join(data))
+                    data = []
+            else:
+                value = self._field_value(bytes(buf[pos:line_end]))
+                if value is not None:
+                    data.append(value)
+            pos = next_pos
+
+        self._data = data
+        if pos:
+            del buf[:pos]
+        return events
+
+    @staticmethod
+    def _field_value(line: bytes) -> Optional[bytes]:
+        """Return the value of a ``data`` field line, ``None`` for anything else"""
+        # Comments (":keep-alive") and other fields (event/id/retry) are ignored
+        if not line.startswith(_DATA):
+            return None
+        if len(line) == 4:
+            return b""
+        if line[4] != 0x3A:  # ':'
+            return None
+        return line[6:] if line[5:6] == b" " else line[5:]
+
+
+def extract_delta_content(payload: bytes) -> Optional[str]:
+    """Return ``choices[0].delta.content`` from a chat-completion chunk payload
+
+    Returns ``None`` when the payload carries no delta content (role-only
+    deltas, finish chunks, usage/timing chunks) or cannot be parsed.
+    """
+    match = _DELTA_CONTENT.search(payload)
+    if match is not None:
+        raw = match.group(1)
+        if raw.find(b"\\") == -1:
+            return raw.decode("utf-8")
+        return json.loads(b'"' + raw + b'"')
+    if payload.find(b'"content"') == -1:
+        return None
+    return _extract_slow(payload)
+
+
+def _extract_slow(payload: bytes) -> Optional[str]:
+    """Fallback full JSON decode for payloads the fast path does not handle"""
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    choices = data.get("choices")
+    if not choices:
+        return None
+    delta = choices[0].get("delta") or {}
+    content = delta.get("content")
+    return content if isinstance(content, str) else None
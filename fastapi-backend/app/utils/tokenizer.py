@@ -0,0 +1,83 @@
+"""
+Local Token Counting
+
+Counts tokens in-process so prompt context can be budgeted in tokens without
+asking the model server. Tokenizers are selected with ``LLM_TOKENIZER``:
+
+    heuristic             regex word/punctuation estimate (default, no dependencies)
+    tiktoken:<encoding>   OpenAI BPE encodings, e.g. ``tiktoken:cl100k_base``
+    hf:<name or path>     Hugging Face ``tokenizers`` file/model, e.g. ``hf:Qwen/Qwen2.5-14B``
+
+Unavailable tokenizers fall back to the heuristic. Other backends can be added
+with ``register_tokenizer``.
+"""
+import re
+from typing import Callable, Dict, Optional
+from app.config.settings import settings
+from app.utils.logger import get_logger
+
+log = get_logger("tokenizer")
+
+# Chat templates add role markers around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_PIECE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+class TokenCounter:
+    """A named token counting function"""
+
+    def __init__(self, name: str, count: Callable[[str], int]):
+        self.name = name
+        self._count = count
+
+    def count(self, text: str) -> int:
+        """Count the tokens of a text"""
+        return self._count(text) if text else 0
+
+    def count_message(self, content: str) -> int:
+        """Count the tokens a chat message takes, including its role markers"""
+        return self.count(content) + MESSAGE_OVERHEAD_TOKENS
+
+def heuristic_count(text: str) -> int:
+    """Estimate BPE tokens: short words are one token, long words split every ~5 characters"""
+    return sum((len(piece) + 4) // 5 for piece in _PIECE.findall(text))
+
+def _tiktoken_factory(encoding: str) -> Callable[[str], int]:
+    import tiktoken
+    enc = tiktoken.get_encoding(encoding or "cl100k_base")
+    return lambda text: len(enc.encode(text, disallowed_special=()))
+
+def _hf_factory(name: str) -> Callable[[str], int]:
+    from tokenizers import Tokenizer
+    tok = Tokenizer.from_file(name) if name.endswith(".json") else Tokenizer.from_pretrained(name)
+    return lambda text: len(tok.encode(text, add_special_tokens=False).ids)
+
+_FACTORIES: Dict[str, Callable[[str], Callable[[str], int]]] = {
+    "heuristic": lambda _arg: heuristic_count,
+    "tiktoken": _tiktoken_factory,
+    "hf": _hf_factory,
+}
+_counters: Dict[str, TokenCounter] = {}
+
+def register_tokenizer(kind: str, factory: Callable[[str], Callable[[str], int]]):
+    """Register a tokenizer backend; ``factory(arg)`` returns a ``count(text)`` function"""
+    _FACTORIES[kind] = factory
+
+def get_token_counter(spec: Optional[str] = None) -> TokenCounter:
+    """Get (and cache) the token counter for a ``kind[:arg]`` spec"""
+    spec = (spec or settings.LLM_TOKENIZER or "heuristic").strip()
+    counter = _counters.get(spec)
+    if counter is not None:
+        return counter
+
+    kind, _, arg = spec.partition(":")
+    factory = _FACTORIES.get(kind)
+    try:
+        if factory is None:
+            raise ValueError(f"unknown tokenizer '{kind}'")
+        counter = TokenCounter(spec, factory(arg))
+    except Exception as e:
+        log.warning(f"⚠️ Tokenizer '{spec}' unavailable ({e}), using heuristic token counts")
+        counter = TokenCounter("heuristic", heuristic_count)
+    _counters[spec] = counter
+    return counter
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Chat Pipeline Load Benchmark
+Drives ChatHandler end to end against the local mock LLM server (no network,
+no GPU): concurrent sessions send short utterances and we report LLM time to
+first token, time to first audio and full turn latency.
+
+    python benchmark_chat_pipeline.py --sessions 16 --turns 5 --ttft-ms 250 --tps 40
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+import wave
+
+from app.api.websocket.chat_handler import ChatHandler
+from app.config.languages import LANGUAGES
+from app.config.settings import settings
+from app.models.session_memory import SessionMemory
+from app.services.llm_router import LLMRouter, LLMBackend
+from app.services.llm_service import LLMService
+from app.services.tts_chunk_policy import wav_duration_s
+from app.utils.metrics import metrics
+from mock_llm_server import MockLLMConfig, MockLLMServer
+
+UTTERANCES = [
+    "I go to the market yesterday and buyed some apples",
+    "What do you think about learning languages with music",
+    "Can you tell me a short story about a cat in Rome",
+    "My favourite hobby is playing football with my friends",
+    "How can I improve my pronunciation quickly",
+]
+
+class FakeWebSocket:
+    """Collects outgoing messages, timestamps the first audio chunk and
+    simulates back-to-back playback to measure audio stalls"""
+
+    class State:
+        name = "CONNECTED"
+
+    client_state = State()
+
+    def __init__(self):
+        self.sent = []
+        self.first_audio_at = None
+        self.playback_end = None
+        self.stall_ms = 0.0
+        self.audio_chunks = 0
+        self.bytes_sent = 0
+
+    async def send_text(self, text):
+        self.bytes_sent += len(text)
+        message = json.loads(text)
+        if message.get("type") == "ai_audio_chunk":
+            now = time.perf_counter()
+            if self.first_audio_at is None:
+                self.first_audio_at = now
+            elif now > self.playback_end:
+                self.stall_ms += (now - self.playback_end) * 1000
+            self.playback_end = max(now, self.playback_end or now) + wav_duration_s(message["audio_base64"])
+            self.audio_chunks += 1
+        self.sent.append(message)
+
+class StubTTS:
+    """Synthesis with a fixed per-character cost instead of a real voice model;
+    returns silent WAV audio at about 15 spoken characters per second"""
+    length_scale = 1.0
+
+    def __init__(self, ms_per_char: float):
+        self.ms_per_char = ms_per_char
+
+    def adjust_speed_for_level(self, level):
+        return 1.0
+
+    async def synthesize_text(self, text, language="en", voice=None, length_scale=None):
+        await asyncio.sleep(len(text) * self.ms_per_char / 1000)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(1)
+            wf.setframerate(8000)
+            wf.writeframes(b"\x80" * int(len(text) / 15 * 8000))
+        return buffer.getvalue()
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+async def run_session(handler: ChatHandler, index: int, args, results: dict):
+    mem = SessionMemory(language="en")
+    mem.level = args.level
+    # Session open: intro line, prompt prefill, then the user takes a moment to speak
+    mem.add_history("assistant", LANGUAGES["en"]["intro_line"])
+    handler.prefiller.schedule(mem, f"bench-{index}")
+    await asyncio.sleep(args.speak_ms / 1000)
+    for turn in range(args.turns):
+        websocket = FakeWebSocket()
+        transcript = f"{UTTERANCES[(index + turn) % len(UTTERANCES)]} number {index}"
+        started = time.perf_counter()
+        handler.open_outbound(websocket, f"bench-{index}")
+        await handler.generate_and_send_response(websocket, transcript, mem, None, f"bench-{index}")
+        finished = time.perf_counter()
+        await handler.close_outbound(websocket)
+        results["messages"].append(len(websocket.sent))
+        results["bytes"].append(websocket.bytes_sent)
+        results["turn_ms"].append((finished - started) * 1000)
+        if websocket.first_audio_at:
+            results["first_audio_ms"].append((websocket.first_audio_at - started) * 1000)
+            results["stall_ms"].append(websocket.stall_ms)
+            results["audio_chunks"].append(websocket.audio_chunks)
+
+async def run(args) -> dict:
+    server = await MockLLMServer(MockLLMConfig(
+        ttft_ms=args.ttft_ms, tokens_per_sec=args.tps, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, prefill_ms_per_token=args.prefill_ms_per_token, seed=1,
+        replies=[" ".join(f"This is sentence number {n} of a long reply." for n in range(1, args.reply_sentences + 1))]
+    )).start()
+    llm = LLMService()
+    llm.router = LLMRouter([LLMBackend(server.url, "mock-llm")], health_check_interval=0)
+    handler = ChatHandler(llm, StubTTS(args.tts_ms_per_char), None)
+    handler.response_cache.enabled = False
+    handler.prefiller.enabled = not args.no_prefill
+
+    settings.LENGTH_CONTROL_ENABLED = not args.no_length_control
+    settings.TTS_PIPELINE_WORKERS = args.tts_workers
+    settings.TTS_ADAPTIVE_CHUNKS = not args.no_adaptive_chunks
+    settings.WS_SEND_QUEUE_ENABLED = not args.no_send_queue
+    metrics.reset()
+    results = {"turn_ms": [], "first_audio_ms": [], "stall_ms": [], "audio_chunks": [],
+               "messages": [], "bytes": []}
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_session(handler, i, args, results) for i in range(args.sessions)))
+    finally:
+        await handler.close()
+        await llm.close()
+        await server.stop()
+    results["wall_s"] = time.perf_counter() - started
+    results["llm_ttft_ms"] = list(metrics.samples.get("llm_ttft_ms", []))
+    results["completion_tokens"] = list(metrics.samples.get("llm_completion_tokens", []))
+    results["first_turn_ttft_ms"] = list(metrics.samples.get("llm_first_turn_ttft_ms", []))
+    results["server"] = dict(server.stats)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ChatHandler benchmark against the mock LLM")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--ttft-ms", type=float, default=250.0)
+    parser.add_argument("--tps", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tts-ms-per-char", type=float, default=2.0)
+    parser.add_argument("--tts-workers", type=int, default=settings.TTS_PIPELINE_WORKERS,
+                        help="Parallel TTS workers per turn (0 = synthesize inline)")
+    parser.add_argument("--no-adaptive-chunks", action="store_true", help="Use fixed TTS chunk thresholds")
+    parser.add_argument("--no-send-queue", action="store_true", help="Send each message inline, one per token")
+    parser.add_argument("--level", choices=["easy", "medium", "fast"], default="medium")
+    parser.add_argument("--reply-sentences", type=int, default=8, help="Length of the mock's canned replies")
+    parser.add_argument("--no-length-control", action="store_true", help="Let replies run to max_tokens")
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.5, help="Mock cost of uncached prompt tokens")
+    parser.add_argument("--speak-ms", type=float, default=1500, help="Time from session open to the first utterance")
+    parser.add_argument("--no-prefill", action="store_true", help="Do not prefill the prompt on session open")
+    args = parser.parse_args()
+
+    print("🚀 Chat Pipeline Benchmark (mock LLM)")
+    print("=" * 50)
+    results = asyncio.run(run(args))
+    total = args.sessions * args.turns
+    print(f"\n📊 {total} turns over {args.sessions} sessions in {results['wall_s']:.2f}s")
+    for label, key in (("LLM TTFT", "llm_ttft_ms"), ("First-turn TTFT", "first_turn_ttft_ms"),
+                       ("First audio", "first_audio_ms"), ("Audio stalls", "stall_ms"), ("Turn", "turn_ms")):
+        values = results[key]
+        print(f"  {label:<15} p50 {percentile(values, 0.5):7.0f} ms   p95 {percentile(values, 0.95):7.0f} ms   "
+              f"max {max(values, default=0):7.0f} ms")
+    server = results["server"]
+    tokens = results["completion_tokens"]
+    print(f"  Tokens/turn     avg {sum(tokens) / max(1, len(tokens)):7.1f}      server sent {server['tokens_sent']} "
+          f"({'length control on' if settings.LENGTH_CONTROL_ENABLED else 'length control off'})")
+    chunks = results["audio_chunks"]
+    print(f"  TTS workers     {args.tts_workers}  ({args.tts_ms_per_char} ms/char), "
+          f"{sum(chunks) / max(1, len(chunks)):.1f} chunks/turn "
+          f"({'adaptive' if settings.TTS_ADAPTIVE_CHUNKS else 'fixed'} sizing)")
+    messages, sent_bytes = results["messages"], results["bytes"]
+    print(f"  WebSocket       {sum(messages) / max(1, len(messages)):.1f} messages/turn, "
+          f"{sum(sent_bytes) / max(1, len(sent_bytes)) / 1024:.1f} KB/turn "
+          f"({'send queue' if settings.WS_SEND_QUEUE_ENABLED else 'inline sends'})")
+    print(f"  Server: {server['requests']} requests, peak concurrency {server['max_active']}, "
+          f"{server['errors_injected']} injected errors")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+SSE Parser Microbenchmark
+Compares the incremental byte-level SSE parser against the previous
+line-by-line decode + json.loads loop used for LLM token streams.
+"""
+
+import asyncio
+import json
+import random
+import time
+from unittest import mock
+from aiohttp import StreamReader
+from app.utils.sse_parser import SSEParser, extract_delta_content, DONE
+
+def build_stream(tokens: int) -> bytes:
+    """Build an OpenAI-compatible SSE body with the given number of tokens"""
+    words = ["Hello", " there", "!", " How", " are", " you", " doing", " today", "?", " It's", " a", " café", " \"quoted\"", "\n"]
+    frames = [
+        b'data: {"id":"chatcmpl-1","object":"chat.completion.chunk","created":1,"model":"qwen2.5-14b-gpu",'
+        b'"choices":[{"index":0,"delta":{"role":"assistant","content":""},"finish_reason":null}]}\n\n'
+    ]
+    for i in range(tokens):
+        chunk = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 1,
+            "model": "qwen2.5-14b-gpu",
+            "choices": [{"index": 0, "delta": {"content": words[i % len(words)]}, "finish_reason": None}],
+        }
+        frames.append(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+    frames.append(b"data: [DONE]\n\n")
+    return b"".join(frames)
+
+def split_reads(body: bytes, seed: int = 7) -> list:
+    """Split a body into network-sized reads that cut frames at arbitrary points"""
+    rng = random.Random(seed)
+    reads, pos = [], 0
+    while pos < len(body):
+        size = rng.randint(40, 400)
+        reads.append(body[pos:pos + size])
+        pos += size
+    return reads
+
+def legacy_lines(body: bytes) -> list:
+    """aiohttp's StreamReader iteration yields one line at a time"""
+    return body.splitlines(keepends=True)
+
+def run_legacy(lines: list) -> list:
+    """The previous parsing loop from LLMService.generate_streaming_response"""
+    out = []
+    for line in lines:
+        line = line.decode('utf-8').strip()
+        if line.startswith('data: '):
+            data_str = line[6:]
+            if data_str == '[DONE]':
+                break
+            try:
+                data = json.loads(data_str)
+                if 'choices' in data and len(data['choices']) > 0:
+                    delta = data['choices'][0].get('delta', {})
+                    if 'content' in delta:
+                        out.append(delta['content'])
+            except json.JSONDecodeError:
+                continue
+    return out
+
+def run_incremental(reads: list, coalesce: bool = False) -> list:
+    """The incremental parser as used by LLMService.generate_streaming_response"""
+    out = []
+    parser = SSEParser()
+    for raw in reads:
+        tokens = []
+        for event in parser.feed(raw):
+            if event == DONE:
+                break
+            content = extract_delta_content(event)
+            if content:
+                tokens.append(content)
+        if coalesce and tokens:
+            out.append("".join(tokens))
+        else:
+            out.extend(tokens)
+    return out
+
+def make_reader(reads: list) -> StreamReader:
+    """Load reads into an aiohttp StreamReader, as response.content would be"""
+    reader = StreamReader(mock.Mock(_reading_paused=False), 2 ** 16, loop=asyncio.get_running_loop())
+    for raw in reads:
+        reader.feed_data(raw)
+    reader.feed_eof()
+    return reader
+
+async def stream_legacy(reads: list) -> float:
+    """Previous loop: `async for line in response.content` + decode/strip/json.loads"""
+    reader = make_reader(reads)
+    start = time.perf_counter()
+    lines = []
+    async for line in reader:
+        lines.append(line)
+        if line.startswith(b"data: [DONE]"):
+            break
+    run_legacy(lines)
+    return time.perf_counter() - start
+
+async def stream_incremental(reads: list) -> float:
+    """New loop: `async for raw in response.content.iter_any()` + SSEParser"""
+    reader = make_reader(reads)
+    start = time.perf_counter()
+    parser = SSEParser()
+    out = []
+    async for raw in reader.iter_any():
+        for event in parser.feed(raw):
+            if event != DONE:
+                content = extract_delta_content(event)
+                if content:
+                    out.append(content)
+    return time.perf_counter() - start
+
+async def bench_streams(reads: list, repeat: int = 10) -> tuple:
+    legacy = min([await stream_legacy(reads) for _ in range(repeat)])
+    incremental = min([await stream_incremental(reads) for _ in range(repeat)])
+    return legacy, incremental
+
+def bench(fn, *args, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    print("🚀 SSE Parser Microbenchmark")
+    print("=" * 50)
+
+    for tokens in (100, 1000, 10000):
+        body = build_stream(tokens)
+        lines = legacy_lines(body)
+        reads = split_reads(body)
+
+        legacy_out = run_legacy(lines)
+        new_out = run_incremental(reads)
+        assert "".join(t for t in legacy_out if t) == "".join(new_out), "parsers disagree"
+
+        t_legacy = bench(run_legacy, lines)
+        t_new = bench(run_incremental, reads)
+        t_coalesced = bench(run_incremental, reads, True)
+        yielded = len(run_incremental(reads, True))
+
+        print(f"\n📊 {tokens} tokens ({len(body)} bytes, {len(reads)} reads)")
+        print(f"  Legacy line loop:     {t_legacy * 1e3:8.3f} ms  ({t_legacy / tokens * 1e6:.2f} µs/token)")
+        print(f"  Incremental parser:   {t_new * 1e3:8.3f} ms  ({t_new / tokens * 1e6:.2f} µs/token)")
+        print(f"  Incremental+coalesce: {t_coalesced * 1e3:8.3f} ms  ({yielded} yields)")
+        print(f"  Speedup:              {t_legacy / t_new:.2f}x")
+
+        # Same comparison including aiohttp StreamReader iteration: readline per
+        # line for the old loop versus one iteration per network read
+        s_legacy, s_new = asyncio.run(bench_streams(reads))
+        print(f"  With StreamReader:    legacy {s_legacy * 1e3:.3f} ms, incremental {s_new * 1e3:.3f} ms "
+              f"({s_legacy / s_new:.2f}x)")
+
+if __name__ == "__main__":
+    main()
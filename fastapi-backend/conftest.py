@@ -0,0 +1,186 @@
+"""
+Shared pytest fixtures
+
+Test doubles for the chat pipeline (an LLM that streams canned replies, a TTS
+that returns silent audio, a WebSocket the test writes to and reads from) and
+the mock model server. Fixtures that tests need several of, or with different
+settings, are factories: call them to build one.
+"""
+import asyncio
+import io
+import json
+import wave
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from app.api.websocket.chat_handler import ChatHandler
+from app.services.llm_router import LLMRouter, LLMBackend
+from app.services.llm_service import LLMService
+from mock_llm_server import MockLLMConfig, MockLLMServer
+
+REPLY = "First sentence is here. Second sentence follows now. Third one ends the reply."
+
+class FakeLLM:
+    """Streams canned replies (cycled per request) and records what it was asked
+
+    A reply is streamed word by word, or ``chunk_size`` characters at a time,
+    ``delay`` seconds apart after ``first_token_s``.
+    """
+
+    def __init__(self, replies=(REPLY,), delay=0.0, first_token_s=0.0, chunk_size=None):
+        self.replies = [replies] if isinstance(replies, str) else list(replies)
+        self.delay = delay
+        self.first_token_s = first_token_s
+        self.chunk_size = chunk_size
+        # Last user message and session id of each streamed request
+        self.requests = []
+        self.sessions = []
+        # Messages of each non-streaming request
+        self.calls = []
+        self.started = 0
+        self.closed = 0
+        self.inflight = 0
+        self.max_inflight = 0
+        self._served = 0
+
+    def next_reply(self) -> str:
+        reply = self.replies[self._served % len(self.replies)]
+        self._served += 1
+        return reply
+
+    def create_context_messages(self, history, max_turns=None):
+        return history
+
+    async def generate_streaming_response(self, messages, **kwargs):
+        reply = self.next_reply()
+        self.requests.append(messages[-1]["content"])
+        self.sessions.append(kwargs.get("session_id"))
+        self.started += 1
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.first_token_s)
+            if self.chunk_size:
+                pieces = [reply[i:i + self.chunk_size] for i in range(0, len(reply), self.chunk_size)]
+            else:
+                pieces = [word + " " for word in reply.split(" ")]
+            for piece in pieces:
+                await asyncio.sleep(self.delay)
+                yield piece
+        finally:
+            self.inflight -= 1
+            self.closed += 1
+
+    async def generate_response(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+        self.calls.append(messages)
+        return self.next_reply()
+
+class FakeTTS:
+    """Returns one second of silent WAV audio per chunk and records what it spoke"""
+    length_scale = 1.0
+
+    def __init__(self):
+        self.spoken = []
+        self.voices = []
+
+    def adjust_speed_for_level(self, level):
+        return 1.0
+
+    async def synthesize_text(self, text, language="en", voice=None, length_scale=None):
+        if text:
+            self.spoken.append(text)
+            self.voices.append(voice)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(1)
+            wf.setframerate(8000)
+            wf.writeframes(b"\x80" * (8000 if text else 0))
+        return buffer.getvalue()
+
+class FakeWebSocket:
+    """Full-duplex socket: the test puts client messages in ``inbox`` (None
+    disconnects) and reads what the server sent from ``sent``"""
+
+    class State:
+        name = "CONNECTED"
+
+    client_state = State()
+
+    def __init__(self):
+        self.sent = []
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.dropped = False
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        message = await self.inbox.get()
+        if message is None:
+            raise WebSocketDisconnect()
+        return {"type": "websocket.receive", "text": json.dumps(message)}
+
+    async def send_text(self, text):
+        if self.dropped:
+            raise RuntimeError("connection lost")
+        self.sent.append(json.loads(text))
+
+    async def drop(self):
+        """The client goes away: sends fail from now on and the receive loop ends"""
+        self.dropped = True
+        await self.inbox.put(None)
+
+    def types(self):
+        return [m["type"] for m in self.sent]
+
+@pytest.fixture
+def fake_llm():
+    """Factory: ``fake_llm(replies, delay=..., first_token_s=..., chunk_size=...)``"""
+    return FakeLLM
+
+@pytest.fixture
+def fake_tts():
+    """Factory: ``fake_tts()``"""
+    return FakeTTS
+
+@pytest.fixture
+def fake_websocket():
+    """Factory: ``fake_websocket()``"""
+    return FakeWebSocket
+
+@pytest.fixture
+def make_handler():
+    """Factory for a ChatHandler on fakes, with the response cache and prompt prefill off
+
+    ``make_handler(delay=0.02)`` streams ``REPLY``; pass ``llm`` or ``tts`` to use others.
+    """
+    def make(delay=0.02, llm=None, tts=None):
+        handler = ChatHandler(llm or FakeLLM(delay=delay), tts or FakeTTS(), None)
+        handler.response_cache.enabled = False
+        handler.prefiller.enabled = False
+        return handler
+    return make
+
+@pytest.fixture
+def mock_llm():
+    """Local mock OpenAI-compatible LLM server (served from a background thread)
+
+    Point an ``LLMBackend`` at ``mock_llm.url``; tune behaviour via ``mock_llm.config``.
+    """
+    server = MockLLMServer(MockLLMConfig(ttft_ms=5, tokens_per_sec=0, seed=1)).start_in_thread()
+    yield server
+    server.stop_thread()
+
+@pytest.fixture
+def mock_llm_service():
+    """Factory: ``mock_llm_service(server)`` is an LLMService routed to that mock server only
+
+    Close it (``await service.close()``) on the loop that used it.
+    """
+    def make(server: MockLLMServer) -> LLMService:
+        service = LLMService()
+        service.router = LLMRouter([LLMBackend(server.url, "mock-llm")], health_check_interval=0)
+        return service
+    return make
@@ -19,6 +19,7 @@ from app.services.tts_service import TTSService
 from app.services.database_service import DatabaseService
 from app.api.endpoints import router as endpoints_router
 from app.api.websocket.chat_handler import ChatHandler
+from app.services.batch_jobs import BatchJobManager
 
 # Initialize logger
 log = get_logger("main")
@@ -49,6 +50,12 @@ db_service = DatabaseService()
 
 # Initialize chat handler
 chat_handler = ChatHandler(llm_service, tts_service, db_service)
+batch_jobs = BatchJobManager(chat_handler)
+
+# Shared service instances for HTTP endpoints
+app.state.llm_service = llm_service
+app.state.chat_handler = chat_handler
+app.state.batch_jobs = batch_jobs
 
 @app.on_event("startup")
 async def startup_event():
@@ -58,11 +65,16 @@ async def startup_event():
     log.info(f"🤖 LLM: {settings.LLM_API_URL} (model={settings.LLM_MODEL})")
     log.info(f"👤 Assistant: {settings.ASSISTANT_NAME} by {settings.ASSISTANT_AUTHOR}")
     log.info(f"🎤 VAD: trigger={settings.TRIGGER_VOICED_FRAMES}, silence={settings.END_SILENCE_MS}ms")
+    await llm_service.start()
+    chat_handler.fillers.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event"""
     log.info("🛑 Shutting down SHCI Voice Agent API")
+    await batch_jobs.close()
+    await chat_handler.close()
+    await llm_service.close()
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI-Compatible LLM Server
+
+Local stand-in for the GPU model server so the voice pipeline can be load and
+latency tested without network access. Implements ``/v1/chat/completions``
+(SSE streaming like the real server, or plain JSON) and ``/v1/models``, plus
+Ollama's native ``/api/chat`` (NDJSON), ``/api/generate`` and ``/api/tags``, with:
+
+- configurable time to first token, tokens per second and jitter
+- error injection (failed requests and mid-stream disconnects)
+- canned replies (cycled) or echo of the last user message
+- ``max_tokens`` and ``stop`` handling, usage reporting and llama.cpp-style timings
+- a prompt cache: the longest token prefix shared with a recent prompt is
+  reported as cached (llama.cpp ``cache_n``) and only the rest costs
+  ``prefill_ms_per_token``
+- Ollama-style model unloading after an idle period, with a load delay on the
+  next request reported as ``load_duration``
+
+Run standalone:
+
+    python mock_llm_server.py --port 8081 --ttft-ms 300 --tps 40 --mode canned
+    LLM_API_URL=http://127.0.0.1:8081/v1/chat/completions python main.py
+
+or use the ``mock_llm`` pytest fixture (see conftest.py). The live config can
+be read and changed at ``GET/POST /mock/config``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+DEFAULT_REPLIES = [
+    "GRAMMAR_CORRECTION_START\nINCORRECT: what your name\nCORRECT: What is your name?\n"
+    "GRAMMAR_CORRECTION_END\n\nMy name is SHCI. How can I help you today?",
+    "That sounds great! Traveling is a wonderful way to practice a new language. "
+    "Where would you like to go first?",
+    "I'm doing well, thank you for asking. How was your day?",
+    "Good question. Let's practice it together, one short sentence at a time.",
+]
+
+_TOKEN = re.compile(r"\s*\S+|\s+")
+
+@dataclass
+class MockLLMConfig:
+    """Behaviour of the mock server (mutable at runtime)"""
+    ttft_ms: float = 200.0
+    tokens_per_sec: float = 40.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    disconnect_rate: float = 0.0
+    mode: str = "canned"  # canned | echo
+    replies: List[str] = field(default_factory=lambda: list(DEFAULT_REPLIES))
+    model: str = "mock-llm"
+    report_timings: bool = True
+    prefill_ms_per_token: float = 0.0  # Prompt evaluation cost of uncached tokens
+    load_ms: float = 0.0  # Delay when the model has to be (re)loaded
+    unload_after_s: float = 0.0  # Idle seconds before the model unloads; 0 = never
+    seed: Optional[int] = None
+
+class MockLLMServer:
+    """aiohttp application plus start/stop helpers (in-loop or in a thread)"""
+
+    def __init__(self, config: Optional[MockLLMConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockLLMConfig()
+        self.host = host
+        self.port = port
+        self.rng = random.Random(self.config.seed)
+        self.stats: Dict[str, Any] = {}
+        self.reset_stats()
+        self._reply_index = 0
+        self._loaded = False
+        self._recent_prompts: Deque[List[str]] = deque(maxlen=64)
+        self._last_used = 0.0
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ---- Lifecycle ----
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    @property
+    def url(self) -> str:
+        """Chat completions URL, as used for LLM_API_URL"""
+        return f"{self.base_url}/chat/completions"
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/v1/models", self.models)
+        app.router.add_post("/api/chat", self.ollama_chat)
+        app.router.add_post("/api/generate", self.ollama_generate)
+        app.router.add_get("/api/tags", self.ollama_tags)
+        app.router.add_get("/mock/config", self.get_config)
+        app.router.add_post("/mock/config", self.set_config)
+        app.router.add_get("/mock/stats", self.get_stats)
+        return app
+
+    async def start(self) -> "MockLLMServer":
+        """Start serving on the current event loop"""
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self) -> "MockLLMServer":
+        """Serve from a background thread with its own event loop"""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        started.wait(10)
+        return self
+
+    def stop_thread(self):
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(10)
+            self._thread = None
+            self._loop = None
+
+    def reset_stats(self):
+        self.stats = {
+            "requests": 0,
+            "streaming_requests": 0,
+            "active": 0,
+            "max_active": 0,
+            "errors_injected": 0,
+            "disconnects_injected": 0,
+            "client_disconnects": 0,
+            "tokens_sent": 0,
+            "prompt_chars": 0,
+            "model_loads": 0,
+            "keep_alive": None,
+            "last_options": None
+        }
+
+    # ---- Reply generation ----
+
+    def pick_reply(self, messages: List[Dict[str, Any]]) -> str:
+        if self.config.mode == "echo":
+            for message in reversed(messages):
+                if message.get("role") == "user":
+                    return f"You said: {message.get('content', '')}"
+            return "You said nothing."
+        reply = self.config.replies[self._reply_index % len(self.config.replies)]
+        self._reply_index += 1
+        return reply
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Split text into word-sized tokens that keep their leading whitespace"""
+        return _TOKEN.findall(text)
+
+    @staticmethod
+    def apply_limits(tokens: List[str], max_tokens: Optional[int], stop) -> Tuple[List[str], str]:
+        """Cut tokens at max_tokens or the first stop sequence"""
+        finish_reason = "stop"
+        if max_tokens and len(tokens) > max_tokens:
+            tokens = tokens[:max_tokens]
+            finish_reason = "length"
+        if stop:
+            text = "".join(tokens)
+            stops = [stop] if isinstance(stop, str) else list(stop)
+            hits = [text.find(s) for s in stops if s and s in text]
+            if hits:
+                return MockLLMServer.tokenize(text[:min(hits)]), "stop"
+        return tokens, finish_reason
+
+    def prompt_eval(self, messages: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Return (prompt tokens, tokens reused from a recent prompt's cache)"""
+        prompt: List[str] = []
+        for message in messages:
+            prompt.append(f"<{message.get('role', '')}>")
+            prompt.extend(self.tokenize(str(message.get("content", ""))))
+        cached = 0
+        for previous in self._recent_prompts:
+            common = 0
+            for a, b in zip(previous, prompt):
+                if a != b:
+                    break
+                common += 1
+            cached = max(cached, common)
+        # Like llama.cpp, at least the last token is always evaluated
+        cached = min(cached, len(prompt) - 1) if prompt else 0
+        self._recent_prompts.append(prompt)
+        return len(prompt), cached
+
+    def prefill_delay(self, prompt_tokens: int, cached_tokens: int) -> float:
+        """Time to first token in seconds, including evaluation of uncached prompt tokens"""
+        return self._delay(self.config.ttft_ms) + (prompt_tokens - cached_tokens) * self.config.prefill_ms_per_token / 1000
+
+    async def ensure_loaded(self) -> float:
+        """Simulate loading an unloaded model, returning the load time in ms"""
+        now = time.monotonic()
+        unloaded = not self._loaded or (
+            self.config.unload_after_s and now - self._last_used > self.config.unload_after_s
+        )
+        load_ms = 0.0
+        if unloaded and self.config.load_ms:
+            self.stats["model_loads"] += 1
+            await asyncio.sleep(self.config.load_ms / 1000)
+            load_ms = self.config.load_ms
+        self._loaded = True
+        self._last_used = time.monotonic()
+        return load_ms
+
+    def _delay(self, base_ms: float) -> float:
+        jitter = self.rng.uniform(-self.config.jitter_ms, self.config.jitter_ms) if self.config.jitter_ms else 0.0
+        return max(0.0, base_ms + jitter) / 1000
+
+    # ---- Handlers ----
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": self.config.model, "object": "model"}]})
+
+    async def get_config(self, request: web.Request) -> web.Response:
+        return web.json_response(asdict(self.config))
+
+    async def set_config(self, request: web.Request) -> web.Response:
+        updates = await request.json()
+        for key, value in updates.items():
+            if hasattr(self.config, key):
+                setattr(self.config, key, value)
+        return web.json_response(asdict(self.config))
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        messages = payload.get("messages", [])
+        self.stats["requests"] += 1
+        self.stats["prompt_chars"] += sum(len(str(m.get("content", ""))) for m in messages)
+
+        if self.config.error_rate and self.rng.random() < self.config.error_rate:
+            self.stats["errors_injected"] += 1
+            await asyncio.sleep(self._delay(self.config.ttft_ms / 4))
+            return web.Response(status=self.config.error_status, text="mock: injected failure")
+
+        tokens, finish_reason = self.apply_limits(
+            self.tokenize(self.pick_reply(messages)), payload.get("max_tokens"), payload.get("stop")
+        )
+        prompt_tokens, cached_tokens = self.prompt_eval(messages)
+
+        self.stats["active"] += 1
+        self.stats["max_active"] = max(self.stats["max_active"], self.stats["active"])
+        try:
+            await self.ensure_loaded()
+            if payload.get("stream"):
+                self.stats["streaming_requests"] += 1
+                return await self._stream(request, payload, tokens, finish_reason, prompt_tokens, cached_tokens)
+
+            await asyncio.sleep(self.prefill_delay(prompt_tokens, cached_tokens))
+            await asyncio.sleep(len(tokens) / self.config.tokens_per_sec if self.config.tokens_per_sec else 0)
+            self.stats["tokens_sent"] += len(tokens)
+            return web.json_response({
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": self.config.model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": finish_reason
+                }],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                          "total_tokens": prompt_tokens + len(tokens),
+                          "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+            })
+        finally:
+            self.stats["active"] -= 1
+
+    async def _stream(self, request: web.Request, payload: Dict[str, Any], tokens: List[str],
+                      finish_reason: str, prompt_tokens: int, cached_tokens: int) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        def frame(delta: Dict[str, Any], reason: Optional[str] = None, **extra) -> bytes:
+            chunk = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": self.config.model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": reason}],
+                **extra
+            }
+            return b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n"
+
+        started = time.perf_counter()
+        interval_ms = 1000 / self.config.tokens_per_sec if self.config.tokens_per_sec else 0
+        disconnect_at = None
+        if self.config.disconnect_rate and self.rng.random() < self.config.disconnect_rate:
+            disconnect_at = self.rng.randint(1, max(1, len(tokens) - 1))
+
+        sent = 0
+        try:
+            await asyncio.sleep(self.prefill_delay(prompt_tokens, cached_tokens))
+            prompt_ms = (time.perf_counter() - started) * 1000
+            await response.write(frame({"role": "assistant", "content": ""}))
+            for index, token in enumerate(tokens):
+                if index:
+                    await asyncio.sleep(self._delay(interval_ms))
+                if disconnect_at is not None and index == disconnect_at:
+                    self.stats["disconnects_injected"] += 1
+                    # Drop the connection mid-stream without a final event
+                    request.transport.close()
+                    return response
+                await response.write(frame({"content": token}))
+                sent += 1
+            self.stats["tokens_sent"] += sent
+
+            extra: Dict[str, Any] = {}
+            if self.config.report_timings:
+                extra["timings"] = {
+                    "prompt_n": prompt_tokens - cached_tokens,
+                    "cache_n": cached_tokens,
+                    "prompt_ms": prompt_ms,
+                    "predicted_n": sent,
+                    "predicted_ms": (time.perf_counter() - started) * 1000 - prompt_ms
+                }
+            await response.write(frame({}, finish_reason, **extra))
+            if (payload.get("stream_options") or {}).get("include_usage"):
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": sent,
+                         "total_tokens": prompt_tokens + sent,
+                         "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+                chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                         "model": self.config.model, "choices": [], "usage": usage}
+                await response.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except (ConnectionResetError, asyncio.CancelledError):
+            # The client closed the stream early (e.g. length limit or barge-in)
+            self.stats["client_disconnects"] += 1
+            self.stats["tokens_sent"] += sent
+        return response
+
+    # ---- Ollama native API ----
+
+    async def ollama_tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": self.config.model, "model": self.config.model}]})
+
+    async def ollama_generate(self, request: web.Request) -> web.Response:
+        """Only the empty-prompt form, which loads the model and refreshes keep_alive"""
+        payload = await request.json()
+        self.stats["requests"] += 1
+        self.stats["keep_alive"] = payload.get("keep_alive", self.stats["keep_alive"])
+        load_ms = await self.ensure_loaded()
+        return web.json_response({
+            "model": self.config.model, "response": "", "done": True, "done_reason": "load",
+            "load_duration": int(load_ms * 1e6)
+        })
+
+    async def ollama_chat(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        messages = payload.get("messages", [])
+        options = payload.get("options") or {}
+        self.stats["requests"] += 1
+        self.stats["prompt_chars"] += sum(len(str(m.get("content", ""))) for m in messages)
+        self.stats["keep_alive"] = payload.get("keep_alive", self.stats["keep_alive"])
+        self.stats["last_options"] = options
+
+        if self.config.error_rate and self.rng.random() < self.config.error_rate:
+            self.stats["errors_injected"] += 1
+            return web.json_response({"error": "mock: injected failure"}, status=self.config.error_status)
+
+        tokens, finish_reason = self.apply_limits(
+            self.tokenize(self.pick_reply(messages)), options.get("num_predict"), options.get("stop")
+        )
+        prompt_tokens, cached_tokens = self.prompt_eval(messages)
+        started = time.perf_counter()
+        load_ms = await self.ensure_loaded()
+        await asyncio.sleep(self.prefill_delay(prompt_tokens, cached_tokens))
+        prompt_ms = (time.perf_counter() - started) * 1000 - load_ms
+
+        def final(sent: int) -> Dict[str, Any]:
+            total_ms = (time.perf_counter() - started) * 1000
+            return {
+                "model": self.config.model, "message": {"role": "assistant", "content": ""},
+                "done": True, "done_reason": finish_reason,
+                "total_duration": int(total_ms * 1e6), "load_duration": int(load_ms * 1e6),
+                "prompt_eval_count": prompt_tokens - cached_tokens, "prompt_eval_duration": int(prompt_ms * 1e6),
+                "eval_count": sent, "eval_duration": int((total_ms - prompt_ms - load_ms) * 1e6)
+            }
+
+        if not payload.get("stream", True):
+            await asyncio.sleep(len(tokens) / self.config.tokens_per_sec if self.config.tokens_per_sec else 0)
+            self.stats["tokens_sent"] += len(tokens)
+            body = final(len(tokens))
+            body["message"]["content"] = "".join(tokens)
+            return web.json_response(body)
+
+        self.stats["streaming_requests"] += 1
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        interval_ms = 1000 / self.config.tokens_per_sec if self.config.tokens_per_sec else 0
+        sent = 0
+        try:
+            for index, token in enumerate(tokens):
+                if index:
+                    await asyncio.sleep(self._delay(interval_ms))
+                line = {"model": self.config.model, "message": {"role": "assistant", "content": token}, "done": False}
+                await response.write(json.dumps(line).encode("utf-8") + b"\n")
+                sent += 1
+            await response.write(json.dumps(final(sent)).encode("utf-8") + b"\n")
+            await response.write_eof()
+        except (ConnectionResetError, asyncio.CancelledError):
+            self.stats["client_disconnects"] += 1
+        self.stats["tokens_sent"] += sent
+        return response
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible streaming LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--ttft-ms", type=float, default=200.0, help="Time to first token")
+    parser.add_argument("--tps", type=float, default=40.0, help="Tokens per second")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter per delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing up front")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="Share of streams cut mid-way")
+    parser.add_argument("--mode", choices=["canned", "echo"], default="canned")
+    parser.add_argument("--reply", action="append", help="Canned reply (repeatable)")
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.0, help="Cost of uncached prompt tokens")
+    parser.add_argument("--load-ms", type=float, default=0.0, help="Model (re)load delay")
+    parser.add_argument("--unload-after-s", type=float, default=0.0, help="Idle seconds before the model unloads")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = MockLLMConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tps,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        disconnect_rate=args.disconnect_rate,
+        mode=args.mode,
+        prefill_ms_per_token=args.prefill_ms_per_token,
+        load_ms=args.load_ms,
+        unload_after_s=args.unload_after_s,
+        seed=args.seed
+    )
+    if args.reply:
+        config.replies = args.reply
+    server = MockLLMServer(config, args.host, args.port)
+    print(f"🧪 Mock LLM listening on {server.url} (ttft={config.ttft_ms}ms, {config.tokens_per_sec} tok/s, mode={config.mode})")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
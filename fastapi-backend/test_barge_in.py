@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test Barge-In (full-duplex connections, turn cancellation, spoken-only memory)
+"""
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from app.config.settings import settings
+from app.models.session_memory import SessionMemory
+
+def test_interrupt_keeps_only_heard_text(make_handler, fake_websocket):
+    async def run():
+        handler = make_handler()
+        websocket = fake_websocket()
+        handler.open_outbound(websocket, "c1")
+        mem = SessionMemory()
+        handler.start_turn("c1", handler.generate_and_send_response(websocket, "tell me something", mem, None, "c1"))
+        # Long enough for the first sentence to be spoken, not the whole reply
+        while "ai_audio_chunk" not in websocket.types():
+            await asyncio.sleep(0.01)
+        assert await handler.interrupt_turn(websocket, "c1", "client")
+        assert not await handler.interrupt_turn(websocket, "c1", "client")
+        await handler.close_outbound(websocket)
+
+        assert handler.llm_service.closed == handler.llm_service.started == 1
+        types = websocket.types()
+        assert types[-1] == "ai_interrupted" and "ai_audio_complete" not in types
+        assert websocket.sent[-1]["flush_audio"] is True
+        history = [(m["role"], m["content"]) for m in mem.conversation_context]
+        assert history[-2] == ("user", "tell me something")
+        assert history[-1] == ("assistant", "First sentence is here.")
+        await handler.close()
+    asyncio.run(run())
+
+def test_receive_loop_reads_while_turn_runs(make_handler, fake_websocket):
+    async def run():
+        db_path, settings.DB_PATH = settings.DB_PATH, os.path.join(tempfile.mkdtemp(), "barge_in.db")
+        handler = make_handler(delay=0.05)
+        websocket = fake_websocket()
+        connection = asyncio.create_task(handler.handle_websocket(websocket))
+        try:
+            await websocket.inbox.put({"type": "final_transcript", "text": "first question"})
+            await asyncio.sleep(0.15)
+            # The second utterance is read mid-reply and replaces it
+            await websocket.inbox.put({"type": "final_transcript", "text": "second question"})
+            while "ai_interrupted" not in websocket.types():
+                await asyncio.sleep(0.01)
+            assert handler.llm_service.closed == 1
+            while "ai_audio_complete" not in websocket.types():
+                await asyncio.sleep(0.02)
+            await websocket.inbox.put(None)
+            await asyncio.wait_for(connection, 2.0)
+        finally:
+            settings.DB_PATH = db_path
+            await handler.close()
+
+        types = websocket.types()
+        assert types.count("ai_interrupted") == 1 and types.count("ai_audio_complete") == 1
+        assert types.index("ai_interrupted") < types.index("ai_audio_complete")
+        assert websocket.sent[types.index("ai_interrupted")]["reason"] == "new_transcript"
+        assert handler.llm_service.started == 2 and handler._turns == {}
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Barge-in tests passed")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test Batch Jobs (scripted conversations through the chat pipeline, results on disk, progress and cancel)
+"""
+import asyncio
+import json
+import os
+import tempfile
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.endpoints import router as endpoints_router
+from app.config.settings import settings
+from app.services.batch_jobs import BatchJobManager, CANCELLED, COMPLETED
+
+@pytest.fixture
+def run_with_app(make_handler):
+    """Runs ``test(client, manager)`` against the batch endpoints"""
+    def run_test(test, delay=0.0, concurrency=2, keep_finished=None):
+        asyncio.run(run(test, delay, concurrency, keep_finished))
+
+    async def run(test, delay, concurrency, keep_finished):
+        results_dir, settings.BATCH_RESULTS_DIR = settings.BATCH_RESULTS_DIR, tempfile.mkdtemp()
+        handler = make_handler(delay)
+        app = FastAPI()
+        app.include_router(endpoints_router)
+        app.state.batch_jobs = BatchJobManager(handler, concurrency=concurrency, keep_finished=keep_finished)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                await test(client, app.state.batch_jobs)
+        finally:
+            settings.BATCH_RESULTS_DIR = results_dir
+            await app.state.batch_jobs.close()
+            await handler.close()
+    return run_test
+
+def read_results(job_dir):
+    with open(os.path.join(job_dir, "results.jsonl")) as f:
+        return [json.loads(line) for line in f]
+
+def test_job_runs_conversations_in_parallel(run_with_app):
+    async def test(client, manager):
+        conversations = [{"id": f"conv-{i}", "turns": [f"hello number {i}", f"tell me more {i}"], "level": "easy"}
+                         for i in range(3)]
+        conversations[2]["role_play"] = {"template": "school", "organization_name": "Green Valley School"}
+        response = await client.post("/batch/jobs", json={"conversations": conversations, "name": "smoke"})
+        job_id = response.json()["job_id"]
+        assert response.json()["total_turns"] == 6
+        await manager.get(job_id).task
+
+        progress = (await client.get(f"/batch/jobs/{job_id}")).json()
+        assert progress["status"] == COMPLETED and progress["completed_turns"] == 6 and progress["failed_turns"] == 0
+        job_dir = progress["results_dir"]
+        results = read_results(job_dir)
+        assert len(results) == 6
+        for i in range(3):
+            turns = [r for r in results if r["conversation_id"] == f"conv-{i}"]
+            assert [r["turn"] for r in turns] == [0, 1] and turns[1]["user"] == f"tell me more {i}"
+        for result in results:
+            timings = result["timings_ms"]
+            assert result["reply"] and result["audio"]
+            assert timings["first_text_ms"] <= timings["first_audio_ms"] <= timings["total_ms"]
+            assert all(os.path.exists(os.path.join(job_dir, path)) for path in result["audio"])
+        with open(os.path.join(job_dir, "job.json")) as f:
+            state = json.load(f)
+        assert state["status"] == COMPLETED and state["conversations"] == 3 and "request" not in state
+        with open(os.path.join(job_dir, "request.json")) as f:
+            assert json.load(f)["conversations"][2]["role_play"]["organization_name"] == "Green Valley School"
+        # Conversations overlapped up to the limit, each as its own LLM session
+        llm = manager.chat_handler.llm_service
+        assert llm.max_inflight == 2
+        assert len(set(llm.sessions)) == 3
+    run_with_app(test)
+
+def test_batch_turns_bypass_response_cache(run_with_app):
+    async def test(client, manager):
+        cache = manager.chat_handler.response_cache
+        cache.enabled = True
+        conversations = [{"turns": ["good morning"]}, {"turns": ["good morning"]}]
+        job_id = (await client.post("/batch/jobs", json={"conversations": conversations, "save_audio": False})).json()["job_id"]
+        await manager.get(job_id).task
+        # Both generated by the model, and nothing left for live sessions
+        assert len(manager.chat_handler.llm_service.requests) == 2
+        assert cache.get_stats()["entries"] == 0
+    # One at a time, so the second would have been a cache hit
+    run_with_app(test, concurrency=1)
+
+def test_cancel_keeps_results_so_far(run_with_app):
+    async def test(client, manager):
+        conversations = [{"turns": ["first question", "second question", "third question"]} for _ in range(4)]
+        job_id = (await client.post("/batch/jobs", json={"conversations": conversations, "save_audio": False})).json()["job_id"]
+        job = manager.get(job_id)
+        while job.completed_turns == 0:
+            await asyncio.sleep(0.01)
+        progress = (await client.post(f"/batch/jobs/{job_id}/cancel")).json()
+        assert progress["status"] == CANCELLED and progress["completed_turns"] < 12
+        assert len(read_results(job.results_dir)) == progress["completed_turns"]
+        assert not os.path.exists(os.path.join(job.results_dir, "audio"))
+        listed = (await client.get("/batch/jobs")).json()
+        assert [j["job_id"] for j in listed["jobs"]] == [job_id] and listed["running"] == 0
+    run_with_app(test, delay=0.01)
+
+def test_only_newest_finished_jobs_are_kept(run_with_app):
+    async def test(client, manager):
+        job_ids = []
+        for i in range(3):
+            job_id = (await client.post("/batch/jobs", json={"conversations": [{"turns": [f"hello {i}"]}],
+                                                               "save_audio": False})).json()["job_id"]
+            await manager.get(job_id).task
+            job_ids.append(job_id)
+        assert list(manager.jobs) == job_ids[1:]
+        # Forgotten by the server, still on disk
+        assert (await client.get(f"/batch/jobs/{job_ids[0]}")).status_code == 404
+        with open(os.path.join(settings.BATCH_RESULTS_DIR, job_ids[0], "job.json")) as f:
+            assert json.load(f)["status"] == COMPLETED
+    run_with_app(test, keep_finished=2)
+
+def test_invalid_requests(run_with_app):
+    async def test(client, manager):
+        assert (await client.post("/batch/jobs", json={"conversations": []})).status_code == 400
+        assert (await client.post("/batch/jobs", json={"conversations": [{"turns": []}]})).status_code == 400
+        assert (await client.post("/batch/jobs", json={"conversations": [{"turns": ["hi"], "language": "xx"}]})).status_code == 400
+        assert (await client.post("/batch/jobs", json={"conversations": [{"turns": ["hi"], "level": "expert"}]})).status_code == 400
+        assert (await client.get("/batch/jobs/missing")).status_code == 404
+        assert manager.jobs == {}
+    run_with_app(test)
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Batch job tests passed")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test Text Chat over Server-Sent Events (same pipeline as the WebSocket, audio inline or by URL)
+"""
+import asyncio
+import json
+import os
+import tempfile
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.endpoints import router as endpoints_router
+from app.api.endpoints.chat import ChatTurnRequest, stream_turn
+from app.api.websocket.channel import MessageChannel
+from app.config.settings import settings
+from app.models.session_memory import MemoryStore
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+@pytest.fixture
+def run_with_app(make_handler):
+    """Runs ``test(client, handler)`` against the chat endpoints"""
+    def run_test(test):
+        asyncio.run(run(test))
+
+    async def run(test):
+        db_path, settings.DB_PATH = settings.DB_PATH, os.path.join(tempfile.mkdtemp(), "chat.db")
+        app = FastAPI()
+        app.include_router(endpoints_router)
+        app.state.chat_handler = make_handler(delay=0)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                await test(client, app.state.chat_handler)
+        finally:
+            settings.DB_PATH = db_path
+            await app.state.chat_handler.close()
+    return run_test
+
+def test_reply_streams_as_events(run_with_app):
+    async def test(client, handler):
+        response = await client.post("/chat/stream", json={"client_id": "kiosk-1", "text": "tell me something"})
+        assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+        events = parse_events(response.text)
+        names = [name for name, _ in events]
+        assert names[0] == "ai_audio_start" and names[-1] == "done"
+        assert names.index("ai_text_chunk") < names.index("ai_audio_chunk") < names.index("ai_text")
+        assert all(data["audio_base64"] for name, data in events if name == "ai_audio_chunk")
+        reply = handler.llm_service.replies[0]
+        assert next(data["text"] for name, data in events if name == "ai_text").strip() == reply
+        # Remembered under the client id, like a WebSocket client's turn
+        saved = MemoryStore("kiosk-1").load()
+        assert [m["content"].strip() for m in saved["conversation_context"]][-2:] == ["tell me something", reply]
+    run_with_app(test)
+
+def test_audio_by_url(run_with_app):
+    async def test(client, handler):
+        response = await client.post("/chat/stream", json={"client_id": "kiosk-2", "text": "hello there",
+                                                           "audio": "url", "level": "easy"})
+        chunks = [data for name, data in parse_events(response.text) if name == "ai_audio_chunk"]
+        assert chunks and not any("audio_base64" in data for data in chunks)
+        audio = await client.get(chunks[0]["audio_url"])
+        assert audio.status_code == 200 and audio.content[:4] == b"RIFF"
+        assert (await client.get("/chat/audio/missing")).status_code == 404
+        assert (await client.post("/chat/stream", json={"client_id": "k", "text": "hi", "audio": "ogg"})).status_code == 400
+        assert (await client.post("/chat/stream", json={"client_id": "k", "text": "  "})).status_code == 400
+    run_with_app(test)
+
+class GoneRequest:
+    def __init__(self, app):
+        self.app = app
+
+    async def is_disconnected(self):
+        return True
+
+def test_disconnect_cancels_turn(make_handler):
+    async def run():
+        db_path, settings.DB_PATH = settings.DB_PATH, os.path.join(tempfile.mkdtemp(), "chat.db")
+        app = FastAPI()
+        app.include_router(endpoints_router)
+        handler = make_handler(delay=0.04)
+        try:
+            stream = stream_turn(handler, ChatTurnRequest(client_id="kiosk-3", text="tell me something"), GoneRequest(app))
+            async for event in stream:
+                if event.startswith("event: ai_audio_chunk"):
+                    break
+            await stream.aclose()
+        finally:
+            settings.DB_PATH = db_path
+            await handler.close()
+        assert handler.llm_service.closed == handler.llm_service.started == 1
+        assert handler._turns == {}
+    asyncio.run(run())
+
+def test_channels_get_messages_as_sent(make_handler):
+    class Recorder(MessageChannel):
+        def __init__(self):
+            super().__init__()
+            self.messages = []
+
+        async def on_message(self, payload):
+            self.messages.append(payload)
+
+    async def run():
+        handler = make_handler()
+        channel = Recorder()
+        payload = {"type": "thinking"}
+        await handler.send_json(channel, payload)
+        # Handed over as the dict itself, never encoded and decoded again
+        assert channel.messages == [payload] and channel.messages[0] is payload
+        await handler.close()
+
+    with pytest.raises(TypeError):
+        MessageChannel()
+    asyncio.run(run())
+
+def test_websocket_and_sse_share_memory(make_handler, fake_websocket):
+    async def run():
+        db_path, settings.DB_PATH = settings.DB_PATH, os.path.join(tempfile.mkdtemp(), "chat.db")
+        app = FastAPI()
+        app.include_router(endpoints_router)
+        handler = make_handler(delay=0)
+        websocket = fake_websocket()
+        try:
+            connection = asyncio.create_task(handler.handle_websocket(websocket))
+            await websocket.inbox.put({"type": "client_prefs", "client_id": "kiosk-4"})
+            await websocket.inbox.put({"type": "final_transcript", "text": "spoken question"})
+            while "ai_audio_complete" not in websocket.types():
+                await asyncio.sleep(0.01)
+            async for _ in stream_turn(handler, ChatTurnRequest(client_id="kiosk-4", text="typed question"),
+                                       GoneRequest(app)):
+                pass
+            await websocket.inbox.put({"type": "final_transcript", "text": "spoken again"})
+            while websocket.types().count("ai_audio_complete") < 2:
+                await asyncio.sleep(0.01)
+            await websocket.inbox.put(None)
+            await asyncio.wait_for(connection, 2.0)
+            saved = MemoryStore("kiosk-4").load()
+        finally:
+            settings.DB_PATH = db_path
+            await handler.close()
+        # One history, in order, and the saved copy has every turn
+        users = ["spoken question", "typed question", "spoken again"]
+        assert [m["content"] for m in saved["conversation_context"] if m["role"] == "user"] == users
+        live = handler._clients["kiosk-4"]
+        assert [m["content"] for m in live.mem.conversation_context if m["role"] == "user"] == users
+        assert live.refs == 0
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Text chat SSE tests passed")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test Token-Budgeted Context Packing
+"""
+from app.models.session_memory import SessionMemory
+from app.utils.tokenizer import get_token_counter, register_tokenizer, heuristic_count
+
+def test_packs_newest_turns_first():
+    """A long old turn must not push the recent turns out of the context"""
+    memory = SessionMemory(language="en")
+    memory.add_history("user", "word " * 400)
+    for i in range(6):
+        memory.add_history("user" if i % 2 == 0 else "assistant", f"Turn number {i}.")
+
+    context = memory.get_context_for_llm(max_tokens=60)
+    assert [turn["content"] for turn in context] == [f"Turn number {i}." for i in range(6)]
+    assert memory.last_context_turns == 6
+    assert 0 < memory.last_context_tokens <= 60
+
+    # Budget for two turns keeps the two newest, in chronological order
+    per_turn = memory.conversation_context[-1]["tokens"]
+    context = memory.get_context_for_llm(max_tokens=per_turn * 2)
+    assert [turn["content"] for turn in context] == ["Turn number 4.", "Turn number 5."]
+
+def test_token_counts_are_cached_per_turn():
+    calls = []
+
+    def counting(_arg):
+        def count(text):
+            calls.append(text)
+            return heuristic_count(text)
+        return count
+
+    register_tokenizer("counting", counting)
+    counter = get_token_counter("counting")
+
+    memory = SessionMemory(language="en")
+    for i in range(5):
+        turn = {"role": "user", "content": f"Message {i}"}
+        memory._turn_tokens(turn, counter)
+        memory.conversation_context.append(turn)
+    assert len(calls) == 5
+
+    for _ in range(3):
+        for turn in memory.conversation_context:
+            memory._turn_tokens(turn, counter)
+    assert len(calls) == 5
+
+    # Switching tokenizers recounts once
+    memory._turn_tokens(memory.conversation_context[0], get_token_counter("heuristic"))
+    assert memory.conversation_context[0]["tokenizer"] == "heuristic"
+
+def test_unknown_tokenizer_falls_back_to_heuristic():
+    counter = get_token_counter("does-not-exist:model")
+    assert counter.name == "heuristic"
+    assert counter.count("Hello, world!") == heuristic_count("Hello, world!") == 4
+
+if __name__ == "__main__":
+    test_packs_newest_turns_first()
+    test_token_counts_are_cached_per_turn()
+    test_unknown_tokenizer_falls_back_to_heuristic()
+    print("✅ Context packing tests passed")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test Grammar Correction Channel (never spoken, sent as its own message)
+"""
+import asyncio
+
+import pytest
+
+from app.models.session_memory import SessionMemory
+from app.utils.grammar_stream import GrammarCorrectionSplitter, strip_grammar_correction
+
+REPLY = ("GRAMMAR_CORRECTION_START\nINCORRECT: what your name\nCORRECT: What is your name?\n"
+         "GRAMMAR_CORRECTION_END\n\nMy name is SHCI. How can I help you?")
+
+def split_all(chunks):
+    splitter = GrammarCorrectionSplitter()
+    speech = ""
+    corrections = []
+    for chunk in chunks:
+        text, found = splitter.feed(chunk)
+        speech += text
+        corrections += found
+    text, found = splitter.flush()
+    return speech + text, corrections + found
+
+def test_split_at_every_chunk_size():
+    for size in (1, 2, 3, 7, 16, len(REPLY)):
+        chunks = [REPLY[i:i + size] for i in range(0, len(REPLY), size)]
+        speech, corrections = split_all(chunks)
+        assert speech == "My name is SHCI. How can I help you?", size
+        assert corrections == [{
+            "incorrect": "what your name",
+            "correct": "What is your name?",
+            "text": "INCORRECT: what your name\nCORRECT: What is your name?"
+        }]
+
+def test_plain_and_unterminated_replies():
+    assert split_all(["Good ", "morning! ", "Great day."]) == ("Good morning! Great day.", [])
+    speech, corrections = split_all(["GRAMMAR_CORRECTION_START\nINCORRECT: a\nCORRECT: b"])
+    assert speech == "" and corrections[0]["correct"] == "b"
+    assert strip_grammar_correction(REPLY) == "My name is SHCI. How can I help you?"
+
+def test_handler_keeps_correction_out_of_speech(make_handler, fake_llm, fake_websocket):
+    async def run():
+        handler = make_handler(llm=fake_llm(REPLY, chunk_size=5))
+        websocket = fake_websocket()
+        await handler.generate_and_send_response(websocket, "what your name please", SessionMemory(), None, "t1")
+
+        spoken = " ".join(handler.tts_service.spoken)
+        assert "GRAMMAR" not in spoken and "INCORRECT" not in spoken
+        assert spoken == "My name is SHCI. How can I help you?"
+
+        types = [message["type"] for message in websocket.sent]
+        correction = websocket.sent[types.index("grammar_correction")]
+        assert correction["correct"] == "What is your name?"
+        assert types.index("grammar_correction") < types.index("ai_audio_chunk")
+        chunks = "".join(m["text"] for m in websocket.sent if m["type"] == "ai_text_chunk")
+        assert "GRAMMAR" not in chunks
+        # The final text keeps the block for the frontend's correction display
+        assert websocket.sent[types.index("ai_text")]["text"] == REPLY
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Grammar stream tests passed")
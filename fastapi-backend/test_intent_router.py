@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test Fast-Path Intent Router
+"""
+from app.models.session_memory import SessionMemory
+from app.services.intent_router import IntentRouter
+
+def test_remembers_and_answers_english():
+    router = IntentRouter()
+    memory = SessionMemory(language="en")
+
+    assert router.route("What's my name?", memory) == "You haven't told me your name yet."
+    assert router.route("Hi, my name is anna and I want to go to Rome next summer", memory) is None
+    assert memory.user_name == "Anna"
+    assert memory.last_destination == "Rome"
+
+    assert router.route("what's my name", memory) == "That's right! Your name is Anna."
+    assert router.route("where did I want to go?", memory) == "I remember! You said Anna wanted to go to Rome."
+
+    memory.level = "easy"
+    assert router.route("what is my name", memory) == "Your name is Anna."
+
+    stats = router.get_stats()
+    assert stats["hits"] == 4 and stats["misses"] == 1
+    assert stats["intents"]["my_name"] == 3
+
+def test_facts_and_italian():
+    router = IntentRouter()
+    memory = SessionMemory(language="it")
+    router.route("Mi chiamo Marco e mi piace il calcio", memory)
+    router.route("il mio compleanno è 3 maggio", memory)
+    assert memory.user_name == "Marco"
+    assert memory.traits["likes"] == ["il calcio"]
+    assert router.route("quando è il mio compleanno?", memory) == "Mi ricordo! Il tuo compleanno è 3 maggio."
+    assert router.route("Come ti chiami?", memory).startswith("Sono ")
+
+def test_phrases_that_are_not_names():
+    router = IntentRouter()
+    memory = SessionMemory(language="en")
+    for text in ("call me tomorrow please", "my name is not important", "Can you call me later?",
+                 "Please call me back when you can"):
+        router.extract_memory_updates(text, memory)
+        assert not memory.user_name, text
+
+    router.extract_memory_updates("You can call me Sam.", memory)
+    assert memory.user_name == "Sam"
+    router.extract_memory_updates("just call me max", memory)
+    assert memory.user_name == "Max"
+
+def test_assistant_name_is_left_to_role_play():
+    router = IntentRouter()
+    memory = SessionMemory(language="en")
+    memory.level = "fast"
+    assert router.route("what is your name", memory).endswith("Delighted to meet you and begin our conversation.")
+    memory.role_play_enabled = True
+    assert router.route("what is your name", memory) is None
+
+def test_patterns_are_compiled_once_per_language():
+    router = IntentRouter()
+    en = router.for_language("en")
+    assert router.for_language("en") is en
+    assert router.for_language("xx") is router.for_language("en")
+
+if __name__ == "__main__":
+    test_remembers_and_answers_english()
+    test_facts_and_italian()
+    test_phrases_that_are_not_names()
+    test_assistant_name_is_left_to_role_play()
+    test_patterns_are_compiled_once_per_language()
+    print("✅ Intent router tests passed")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test Streaming Response Length Control (per-level budgets, early stream close)
+"""
+import asyncio
+
+import pytest
+
+from app.models.session_memory import SessionMemory
+from app.utils.length_controller import ResponseLengthController
+from app.utils.metrics import metrics
+from mock_llm_server import MockLLMConfig, MockLLMServer
+
+LONG_REPLY = ("GRAMMAR_CORRECTION_START\nINCORRECT: I goed\nCORRECT: I went\nGRAMMAR_CORRECTION_END\n\n"
+              "Great job! You went to Rome. Did you see the Colosseum? It is 2.5 km from the station. "
+              "Many people visit it every day. The food there is amazing. Tell me more about your trip.")
+
+def feed_all(controller, text, size):
+    out = ""
+    for i in range(0, len(text), size):
+        out += controller.feed(text[i:i + size])
+    return out
+
+def test_cuts_at_sentence_boundary_for_any_chunking():
+    text = "Hello there! How are you? I am fine. Thanks for asking."
+    for size in (1, 3, 7, len(text)):
+        controller = ResponseLengthController(max_sentences=2, max_words=100)
+        assert feed_all(controller, text, size) == "Hello there! How are you?"
+        assert controller.done and controller.sentences == 2
+        assert controller.feed("more") == ""
+
+def test_sentence_ending_the_stream_is_counted():
+    controller = ResponseLengthController(max_sentences=3, max_words=100)
+    assert feed_all(controller, "Hello there. How are you?", 4) == "Hello there. How are you?"
+    assert controller.sentences == 1 and not controller.done
+    controller.finish()
+    assert controller.sentences == 2
+
+def test_word_budget_and_run_on_sentences():
+    controller = ResponseLengthController(max_sentences=5, max_words=6)
+    assert feed_all(controller, "One two three four. Five six seven eight. Nine.", 4) == \
+        "One two three four. Five six seven eight."
+    # Decimals and abbreviations without a following space are not boundaries
+    controller = ResponseLengthController(max_sentences=1, max_words=50)
+    assert feed_all(controller, "It is 2.5 km away. Yes.", 2) == "It is 2.5 km away."
+    controller = ResponseLengthController(max_sentences=2, max_words=4, hard_max_words=6)
+    assert controller.feed("one two three four five six, seven eight") == "one two three four five six."
+    assert controller.truncated
+
+def test_handler_closes_llm_stream_at_budget(make_handler, mock_llm_service, fake_websocket):
+    async def run():
+        server = await MockLLMServer(MockLLMConfig(ttft_ms=0, tokens_per_sec=400, replies=[LONG_REPLY])).start()
+        llm = mock_llm_service(server)
+        handler = make_handler(llm=llm)
+        try:
+            websocket = fake_websocket()
+            memory = SessionMemory(language="en")
+            memory.level = "easy"
+            await handler.generate_and_send_response(websocket, "I goed to Rome last week", memory, None, "t1")
+            await asyncio.sleep(0.05)
+
+            spoken = " ".join(handler.tts_service.spoken)
+            assert spoken == "Great job! You went to Rome."
+            final = [m for m in websocket.sent if m["type"] == "ai_text"][0]["text"]
+            assert final.startswith("GRAMMAR_CORRECTION_START\nINCORRECT: I goed\nCORRECT: I went\n")
+            assert final.endswith("\n\nGreat job! You went to Rome.")
+            assert memory.conversation_context[-1]["content"] == final
+            # The server saw the client go away well before the end of the reply
+            assert server.stats["client_disconnects"] == 1
+            assert server.stats["tokens_sent"] < len(MockLLMServer.tokenize(LONG_REPLY))
+            assert llm.scheduler.inflight == 0
+        finally:
+            await handler.close()
+            await llm.close()
+            await server.stop()
+    asyncio.run(run())
+
+def test_reply_length_is_recorded(make_handler, fake_llm, fake_websocket):
+    async def run():
+        handler = make_handler(llm=fake_llm("Rome is lovely. The weather is mild.", delay=0, chunk_size=8))
+        metrics.reset()
+        await handler.generate_and_send_response(fake_websocket(), "tell me about Rome", SessionMemory(), None, "t2")
+        # The reply ended on its own: its last sentence ended with the stream
+        assert metrics.summary("reply_sentences")["last"] == 2
+        assert metrics.summary("reply_words")["last"] == 7
+        await handler.close()
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Length control tests passed")
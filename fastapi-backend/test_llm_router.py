@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Test LLM Backend Routing (EWMA selection, hedging, circuit breaker, slot affinity)
+
+Runs small local OpenAI-compatible servers with injected latency and errors.
+"""
+import asyncio
+import json
+
+from aiohttp import web
+
+from app.services.llm_router import LLMRouter, LLMBackend
+from app.services.llm_service import LLMService, LLMStreamStats
+from app.services.slot_manager import SlotAffinityManager
+
+async def start_mock_backend(text: str, delay: float = 0.0, status: int = 200):
+    """Start a streaming chat completions server, returning (runner, url, state)"""
+    # slot_error: body of a 400 returned to requests that carry id_slot
+    state = {"requests": 0, "delay": delay, "status": status, "slot_error": None}
+
+    async def chat(request):
+        state["requests"] += 1
+        await asyncio.sleep(state["delay"])
+        if state["slot_error"] and "id_slot" in await request.json():
+            return web.Response(status=400, text=state["slot_error"])
+        if state["status"] != 200:
+            return web.Response(status=state["status"], text="injected failure")
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for word in text.split(" "):
+            chunk = {"choices": [{"delta": {"content": word + " "}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def models(request):
+        if state.get("models_status", state["status"]) != 200:
+            return web.Response(status=state.get("models_status", state["status"]))
+        return web.json_response({"data": []})
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat)
+    app.router.add_get("/v1/models", models)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1/chat/completions", state
+
+def make_service(urls, hedge_after_ms: float = 0, failures: int = 3, slot_count: int = 0) -> LLMService:
+    service = LLMService()
+    service.hedge_after_ms = hedge_after_ms
+    service.first_token_timeout = 5.0
+    service.router = LLMRouter(
+        [LLMBackend(url, "test-model", slot_count=slot_count) for url in urls],
+        failure_threshold=failures, open_seconds=60, health_check_interval=0
+    )
+    return service
+
+async def collect(service: LLMService, session_id: str = None) -> tuple:
+    stats = LLMStreamStats()
+    chunks = [c async for c in service.generate_streaming_response(
+        [{"role": "user", "content": "hi"}], stats=stats, session_id=session_id
+    )]
+    return "".join(chunks).strip(), stats
+
+def test_prefers_faster_backend():
+    async def run():
+        slow_runner, slow_url, slow = await start_mock_backend("slow", delay=0.15)
+        fast_runner, fast_url, fast = await start_mock_backend("fast")
+        service = make_service([slow_url, fast_url])
+        try:
+            # Both get explored once, after that the EWMA picks the fast one
+            for _ in range(4):
+                await collect(service)
+            assert slow["requests"] == 1
+            assert fast["requests"] == 3
+            slow_backend, fast_backend = service.router.backends
+            assert fast_backend.ewma_ttft_ms < slow_backend.ewma_ttft_ms
+        finally:
+            await service.close()
+            await slow_runner.cleanup()
+            await fast_runner.cleanup()
+    asyncio.run(run())
+
+def test_hedge_returns_fast_backend():
+    async def run():
+        slow_runner, slow_url, _ = await start_mock_backend("slow answer", delay=1.0)
+        fast_runner, fast_url, _ = await start_mock_backend("fast answer")
+        service = make_service([slow_url, fast_url], hedge_after_ms=100)
+        try:
+            text, stats = await collect(service)
+            assert text == "fast answer"
+            assert stats.hedged and stats.backend == fast_url
+            assert stats.ttft_ms < 800
+        finally:
+            await service.close()
+            await slow_runner.cleanup()
+            await fast_runner.cleanup()
+    asyncio.run(run())
+
+def test_circuit_opens_and_recovers():
+    async def run():
+        bad_runner, bad_url, bad = await start_mock_backend("bad", status=503)
+        good_runner, good_url, _ = await start_mock_backend("good", delay=0.05)
+        service = make_service([bad_url, good_url], failures=2)
+        bad_backend = service.router.backends[0]
+        try:
+            # Failures before the first token fail over transparently
+            for _ in range(3):
+                text, _ = await collect(service)
+                assert text == "good"
+            assert bad_backend.state == LLMBackend.OPEN
+            assert bad["requests"] == 2
+
+            # A passing health check closes the circuit again
+            bad["status"] = 200
+            await service.router.check_all(await service.get_session())
+            assert bad_backend.state == LLMBackend.CLOSED
+        finally:
+            await service.close()
+            await bad_runner.cleanup()
+            await good_runner.cleanup()
+    asyncio.run(run())
+
+def test_session_stays_on_backend_within_tolerance():
+    router = LLMRouter([LLMBackend("http://a", "m"), LLMBackend("http://b", "m")], sticky_tolerance=1.5)
+    a, b = router.backends
+    router.record_ttft(a, 100)
+    router.record_ttft(b, 80)
+    router.bind_session("s1", a)
+    assert router.candidates("s1")[0] is a
+    assert router.candidates("s2")[0] is b
+
+    router.record_ttft(a, 1000)
+    assert router.candidates("s1")[0] is b
+
+def test_slots_stay_with_busy_sessions_until_released():
+    slots = SlotAffinityManager(1)
+    assert slots.acquire("a") == 0
+    # The only slot is streaming for "a": "b" runs unpinned instead of taking it
+    assert slots.acquire("b") is None
+    slots.finish("a")
+    assert slots.acquire("b") == 0 and slots.evictions == 1
+    # Released mid-request: freed when the request finishes, not before
+    slots.release("b")
+    assert slots.acquire("c") is None
+    slots.finish("b")
+    assert slots.acquire("c") == 0 and slots.evictions == 1
+
+def test_released_session_frees_its_slot():
+    async def run():
+        runner, url, state = await start_mock_backend("pinned answer", delay=0.1)
+        service = make_service([url], slot_count=1)
+        slots = service.router.backends[0].slots
+        try:
+            (_, first), (_, second) = await asyncio.gather(collect(service, "a"), collect(service, "b"))
+            assert first.slot == 0 and second.slot is None
+            assert slots.get_stats()["busy_misses"] == 1
+
+            service.release_session("a")
+            _, stats = await collect(service, "b")
+            assert stats.slot == 0 and slots.evictions == 0
+            # Ended sessions leave no backend binding behind
+            assert list(service.router._sticky) == ["b"]
+            service.release_session("b")
+            assert service.router._sticky == {}
+        finally:
+            await service.close()
+            await runner.cleanup()
+    asyncio.run(run())
+
+def test_only_slot_errors_disable_affinity():
+    async def run():
+        runner, url, state = await start_mock_backend("unpinned answer")
+        service = make_service([url], slot_count=2)
+        slots = service.router.backends[0].slots
+        try:
+            # An unrelated bad request: retried unpinned, affinity stays on
+            state["slot_error"] = "context size exceeded"
+            text, stats = await collect(service, "a")
+            assert text == "unpinned answer" and stats.slot is None
+            assert slots.supported and state["requests"] == 2
+
+            state["slot_error"] = "invalid id_slot"
+            text, _ = await collect(service, "a")
+            assert text == "unpinned answer" and not slots.supported
+        finally:
+            await service.close()
+            await runner.cleanup()
+    asyncio.run(run())
+
+def test_single_backend_is_never_taken_out():
+    async def run():
+        runner, url, state = await start_mock_backend("answer", status=503)
+        service = make_service([url], failures=2)
+        backend = service.router.backends[0]
+        try:
+            # Nowhere to fail over: every turn still tries the model
+            for _ in range(3):
+                await collect(service)
+            assert state["requests"] == 3 and backend.state == LLMBackend.CLOSED
+            service.router.health_check_interval = 15
+            service.router.start_health_checks(service.get_session)
+            assert service.router._health_task is None
+            state["status"] = 200
+            assert (await collect(service))[0] == "answer"
+        finally:
+            await service.close()
+            await runner.cleanup()
+    asyncio.run(run())
+
+def test_only_2xx_health_checks_pass():
+    async def run():
+        up_runner, up_url, up = await start_mock_backend("up")
+        other_runner, other_url, _ = await start_mock_backend("other")
+        service = make_service([up_url, other_url], failures=1)
+        backend = service.router.backends[0]
+        session = await service.get_session()
+        try:
+            up["models_status"] = 401
+            assert await service.router.check_backend(session, backend) is False
+            assert backend.state == LLMBackend.OPEN
+
+            # No /models route: not probed again, the circuit is left to real requests
+            up["models_status"] = 404
+            assert await service.router.check_backend(session, backend) is None
+            assert not backend.models_route and backend.state == LLMBackend.OPEN
+
+            up["models_status"] = 200
+            backend.models_route = True
+            assert await service.router.check_backend(session, backend) is True
+            assert backend.state == LLMBackend.CLOSED
+        finally:
+            await service.close()
+            await up_runner.cleanup()
+            await other_runner.cleanup()
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_prefers_faster_backend()
+    test_hedge_returns_fast_backend()
+    test_circuit_opens_and_recovers()
+    test_session_stays_on_backend_within_tolerance()
+    test_slots_stay_with_busy_sessions_until_released()
+    test_released_session_frees_its_slot()
+    test_only_slot_errors_disable_affinity()
+    test_single_backend_is_never_taken_out()
+    test_only_2xx_health_checks_pass()
+    print("✅ LLM router tests passed")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test Fair LLM Request Scheduling
+"""
+import asyncio
+
+from app.services.llm_scheduler import LLMScheduler, HIGH, LOW
+
+async def request(scheduler, session_id, order, priority=HIGH, hold=0.02, **kwargs):
+    async with scheduler.slot(session_id, priority, **kwargs):
+        order.append(session_id)
+        await asyncio.sleep(hold)
+
+def test_global_cap_and_round_robin():
+    async def run():
+        scheduler = LLMScheduler(max_inflight=1)
+        order = []
+        peak = []
+
+        async def watch():
+            while True:
+                peak.append(scheduler.inflight)
+                await asyncio.sleep(0.005)
+
+        watcher = asyncio.create_task(watch())
+        # Session "a" floods the queue before "b" and "c" arrive
+        tasks = [asyncio.create_task(request(scheduler, "a", order)) for _ in range(3)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(request(scheduler, s, order)) for s in ("b", "c")]
+        await asyncio.gather(*tasks)
+        watcher.cancel()
+
+        assert max(peak) == 1
+        assert order == ["a", "b", "c", "a", "a"]
+    asyncio.run(run())
+
+def test_one_request_per_session():
+    async def run():
+        scheduler = LLMScheduler(max_inflight=4)
+        order = []
+        await asyncio.gather(*(request(scheduler, "a", order, hold=0.05) for _ in range(2)),
+                             request(scheduler, "b", order, hold=0.01))
+        # b runs alongside a's first request; a's second waits for its first
+        assert order == ["a", "b", "a"]
+    asyncio.run(run())
+
+def test_background_yields_to_foreground():
+    async def run():
+        scheduler = LLMScheduler(max_inflight=2, max_background=1)
+        order = []
+        blocker = asyncio.create_task(request(scheduler, "a", order, hold=0.05))
+        await asyncio.sleep(0)
+        # Background work never takes the last free slot
+        background = asyncio.create_task(request(scheduler, None, order, priority=LOW))
+        await asyncio.sleep(0.01)
+        assert scheduler.background_inflight == 0
+        foreground = asyncio.create_task(request(scheduler, "b", order))
+        await asyncio.gather(blocker, background, foreground)
+        assert order[:2] == ["a", "b"]
+        assert len(order) == 3
+    asyncio.run(run())
+
+def test_thinking_notice_and_cancellation():
+    async def run():
+        scheduler = LLMScheduler(max_inflight=1)
+        notices = []
+
+        async def on_wait(waited_ms):
+            notices.append(waited_ms)
+
+        order = []
+        blocker = asyncio.create_task(request(scheduler, "a", order, hold=0.08))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(request(scheduler, "b", order, on_wait=on_wait, wait_notice_ms=20))
+        cancelled = asyncio.create_task(request(scheduler, "c", order))
+        await asyncio.sleep(0.04)
+        cancelled.cancel()
+        await asyncio.gather(blocker, waiting)
+
+        assert len(notices) == 1 and notices[0] >= 20
+        assert order == ["a", "b"]
+        assert scheduler.inflight == 0 and scheduler.queued() == 0
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_global_cap_and_round_robin()
+    test_one_request_per_session()
+    test_background_yields_to_foreground()
+    test_thinking_notice_and_cancellation()
+    print("✅ LLM scheduler tests passed")
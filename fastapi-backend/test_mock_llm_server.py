@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test Mock LLM Server (and LLMService against it)
+"""
+import asyncio
+
+import aiohttp
+
+from app.services.llm_router import LLMRouter, LLMBackend
+from app.services.llm_service import LLMService, LLMStreamStats
+from mock_llm_server import MockLLMConfig, MockLLMServer
+
+def make_service(url: str) -> LLMService:
+    service = LLMService()
+    service.hedge_after_ms = 0
+    service.first_token_timeout = 5.0
+    service.router = LLMRouter([LLMBackend(url, "mock-llm")], failure_threshold=100,
+                               open_seconds=60, health_check_interval=0)
+    return service
+
+async def stream(service: LLMService, text: str = "hello", **kwargs):
+    stats = LLMStreamStats()
+    chunks = [c async for c in service.generate_streaming_response(
+        [{"role": "user", "content": text}], stats=stats, **kwargs
+    )]
+    return "".join(chunks), stats
+
+def test_streaming_canned_and_echo():
+    async def run():
+        server = await MockLLMServer(MockLLMConfig(ttft_ms=30, tokens_per_sec=500, replies=["One two three."])).start()
+        service = make_service(server.url)
+        try:
+            text, stats = await stream(service)
+            assert text == "One two three."
+            assert stats.to_dict()["ttft_ms"] >= 30
+            assert stats.completion_tokens == 3
+            assert stats.prompt_ms is not None
+
+            server.config.mode = "echo"
+            text, _ = await stream(service, "how are you")
+            assert text == "You said: how are you"
+            text = await service.generate_response([{"role": "user", "content": "hi"}], max_tokens=2)
+            assert text == "You said:"
+            assert server.stats["requests"] == 3 and server.stats["active"] == 0
+        finally:
+            await service.close()
+            await server.stop()
+    asyncio.run(run())
+
+def test_stop_sequences():
+    tokens, reason = MockLLMServer.apply_limits(MockLLMServer.tokenize("Hi there. Bye now."), None, [". B"])
+    assert "".join(tokens) == "Hi there" and reason == "stop"
+    tokens, reason = MockLLMServer.apply_limits(MockLLMServer.tokenize("a b c d"), 2, None)
+    assert "".join(tokens) == "a b" and reason == "length"
+
+def test_error_injection_and_disconnects():
+    async def run():
+        server = await MockLLMServer(MockLLMConfig(ttft_ms=0, tokens_per_sec=0, error_rate=1.0,
+                                                   error_status=503, seed=3)).start()
+        service = make_service(server.url)
+        try:
+            text, _ = await stream(service)
+            assert text == ""
+            assert server.stats["errors_injected"] == 1
+
+            server.config.error_rate = 0.0
+            server.config.disconnect_rate = 1.0
+            text, _ = await stream(service)
+            assert server.stats["disconnects_injected"] == 1
+            assert len(text) < len(server.config.replies[1])
+        finally:
+            await service.close()
+            await server.stop()
+    asyncio.run(run())
+
+def test_config_endpoint(mock_llm):
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"http://127.0.0.1:{mock_llm.port}/mock/config",
+                                    json={"ttft_ms": 1, "mode": "echo"}) as response:
+                assert (await response.json())["mode"] == "echo"
+            async with session.get(f"{mock_llm.base_url}/models") as response:
+                assert (await response.json())["data"][0]["id"] == "mock-llm"
+    asyncio.run(run())
+    assert mock_llm.config.mode == "echo"
+
+if __name__ == "__main__":
+    test_streaming_canned_and_echo()
+    test_stop_sequences()
+    test_error_injection_and_disconnects()
+    server = MockLLMServer(MockLLMConfig(ttft_ms=5, tokens_per_sec=0)).start_in_thread()
+    try:
+        test_config_endpoint(server)
+    finally:
+        server.stop_thread()
+    print("✅ Mock LLM server tests passed")
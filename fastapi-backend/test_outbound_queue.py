@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test the Outbound WebSocket Queue (coalescing, ordering, backpressure)
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.api.websocket.outbound import OutboundQueue
+from app.models.session_memory import SessionMemory
+
+REPLY = ("GRAMMAR_CORRECTION_START\nINCORRECT: what your name\nCORRECT: What is your name?\n"
+         "GRAMMAR_CORRECTION_END\n\nMy name is SHCI. How can I help you?")
+
+class SlowWebSocket:
+    class State:
+        name = "CONNECTED"
+
+    client_state = State()
+
+    def __init__(self, delay=0.0, fail_after=None):
+        self.delay = delay
+        self.fail_after = fail_after
+        self.sent = []
+
+    async def send_text(self, text):
+        if self.fail_after is not None and len(self.sent) >= self.fail_after:
+            raise RuntimeError("socket closed")
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+def test_text_chunks_coalesced_in_order():
+    async def run():
+        websocket = SlowWebSocket(delay=0.005)
+        outbound = OutboundQueue(websocket, "t", max_messages=8, coalesce_ms=10).start()
+        await outbound.send({"type": "ai_audio_start"})
+        for i in range(20):
+            await outbound.send({"type": "ai_text_chunk", "text": f"w{i} ", "is_first_chunk": i == 0})
+            await asyncio.sleep(0.001)
+        await outbound.send({"type": "ai_audio_chunk", "audio_base64": "AAAA"})
+        await outbound.send({"type": "ai_text_chunk", "text": "after", "is_first_chunk": False})
+        await outbound.drain()
+
+        types = [m["type"] for m in websocket.sent]
+        assert types[0] == "ai_audio_start" and types[-2:] == ["ai_audio_chunk", "ai_text_chunk"]
+        chunks = [m for m in websocket.sent if m["type"] == "ai_text_chunk"]
+        assert len(chunks) < 10
+        assert "".join(m["text"] for m in chunks) == "".join(f"w{i} " for i in range(20)) + "after"
+        assert chunks[0]["is_first_chunk"] and not chunks[1]["is_first_chunk"]
+        stats = outbound.turn_stats()
+        assert stats["queued"] == 23 and stats["sent"] == len(websocket.sent)
+        assert stats["coalesced"] == stats["queued"] - stats["sent"]
+        assert stats["bytes"] > 0 and outbound.turn_stats()["queued"] == 0
+        await outbound.close()
+    asyncio.run(run())
+
+def test_backpressure_merges_text_and_never_drops_audio():
+    async def run():
+        websocket = SlowWebSocket(delay=0.01)
+        outbound = OutboundQueue(websocket, "t", max_messages=2, coalesce_ms=0).start()
+        started = time.perf_counter()
+        for i in range(50):
+            await outbound.send({"type": "ai_text_chunk", "text": "x"})
+        # Text never makes the producer wait
+        assert time.perf_counter() - started < 0.01
+        for i in range(5):
+            await outbound.send({"type": "ai_audio_chunk", "index": i})
+            await outbound.send({"type": "ai_text_chunk", "text": "y"})
+        await outbound.close(timeout=2.0)
+
+        audio = [m["index"] for m in websocket.sent if m["type"] == "ai_audio_chunk"]
+        assert audio == [0, 1, 2, 3, 4]
+        text = "".join(m["text"] for m in websocket.sent if m["type"] == "ai_text_chunk")
+        assert text == "x" * 50 + "y" * 5
+    asyncio.run(run())
+
+def test_send_failure_closes_queue():
+    async def run():
+        websocket = SlowWebSocket(fail_after=1)
+        outbound = OutboundQueue(websocket, "t", coalesce_ms=0).start()
+        await outbound.send({"type": "a"})
+        await outbound.send({"type": "b"})
+        await outbound.drain()
+        assert outbound.closed and [m["type"] for m in websocket.sent] == ["a"]
+        # Later sends are dropped quietly
+        await outbound.send({"type": "c"})
+        await outbound.close()
+    asyncio.run(run())
+
+def test_handler_sends_through_outbound_queue(make_handler, fake_llm):
+    async def run():
+        handler = make_handler(llm=fake_llm(REPLY, chunk_size=5))
+        websocket = SlowWebSocket()
+        handler.open_outbound(websocket, "t1")
+        await handler.generate_and_send_response(websocket, "what your name please", SessionMemory(), None, "t1")
+        await handler.close_outbound(websocket)
+
+        types = [m["type"] for m in websocket.sent]
+        assert types[0] == "ai_audio_start" and "ai_audio_complete" in types
+        assert websocket.sent[types.index("ai_text")]["text"] == REPLY
+        # Token-sized text chunks were merged on the way out
+        assert types.count("ai_text_chunk") < len(REPLY) // 5
+        await handler.close()
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Outbound queue tests passed")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test Prompt Prefill on Session Open
+"""
+import asyncio
+
+import pytest
+
+from app.api.websocket.chat_handler import ChatHandler
+from app.config.languages import LANGUAGES
+from app.models.session_memory import SessionMemory
+from app.utils.metrics import metrics
+from mock_llm_server import MockLLMConfig, MockLLMServer
+
+@pytest.fixture
+def prefill_handler(make_handler, mock_llm_service):
+    """Factory: a mock model server with a prompt evaluation cost, and a handler using it"""
+    async def make(prefill: bool):
+        server = await MockLLMServer(MockLLMConfig(ttft_ms=0, tokens_per_sec=0, prefill_ms_per_token=0.5,
+                                                   replies=["Nice to meet you."])).start()
+        llm = mock_llm_service(server)
+        handler = make_handler(llm=llm)
+        handler.prefiller.enabled = prefill
+        return server, llm, handler
+    return make
+
+async def first_turn(handler: ChatHandler, websocket, conn_id: str) -> SessionMemory:
+    mem = SessionMemory(language="en")
+    mem.client_id = conn_id
+    mem.add_history("assistant", LANGUAGES["en"]["intro_line"])
+    task = handler.prefiller.schedule(mem, conn_id)
+    if task:
+        await task
+    await handler.generate_and_send_response(websocket, "I like to travel by train", mem, None, conn_id)
+    return mem
+
+def test_prefill_makes_first_turn_cached(prefill_handler, fake_websocket):
+    async def run():
+        results = {}
+        for prefill in (False, True):
+            server, llm, handler = await prefill_handler(prefill)
+            metrics.reset()
+            try:
+                await first_turn(handler, fake_websocket(), f"conn-{prefill}")
+                results[prefill] = {
+                    "evaluated": metrics.summary("llm_first_turn_processed_prompt_tokens")["last"],
+                    "cached": metrics.summary("llm_cached_tokens")["last"],
+                    "requests": server.stats["requests"],
+                }
+                if prefill:
+                    assert metrics.counters["llm_prefills"] == 1
+                    assert metrics.summary("llm_prefill_prompt_tokens")["count"] == 1
+            finally:
+                await handler.close()
+                await llm.close()
+                await server.stop()
+
+        assert results[False]["requests"] == 1 and results[True]["requests"] == 2
+        # Only the per-turn tail is evaluated once the prefix has been prefilled
+        assert results[True]["evaluated"] < results[False]["evaluated"] / 3
+        assert results[True]["cached"] > results[False]["cached"]
+    asyncio.run(run())
+
+def test_reschedules_only_when_prefix_changes(prefill_handler):
+    async def run():
+        server, llm, handler = await prefill_handler(True)
+        try:
+            mem = SessionMemory(language="en")
+            first = handler.prefiller.schedule(mem, "c1")
+            assert handler.prefiller.schedule(mem, "c1") is first
+            mem.level = "fast"
+            second = handler.prefiller.schedule(mem, "c1")
+            assert second is not first
+            await asyncio.sleep(0)
+            assert first.cancelled() or first.done()
+            await second
+            assert handler.prefiller.before_turn("c1") is True
+            assert handler.prefiller.before_turn("c1") is False
+            handler.prefiller.forget("c1")
+            # A new connection with the same id starts over
+            assert handler.prefiller.before_turn("c1") is True
+        finally:
+            await handler.close()
+            await llm.close()
+            await server.stop()
+    asyncio.run(run())
+
+def test_queued_prefill_dropped_when_turn_starts(prefill_handler):
+    async def run():
+        server, llm, handler = await prefill_handler(True)
+        llm.scheduler.max_inflight = 2
+        metrics.reset()
+        try:
+            # Another user's request holds the only slot background work may use
+            async with llm.scheduler.slot("someone-else"):
+                task = handler.prefiller.schedule(SessionMemory(language="en"), "c2")
+                await asyncio.sleep(0.02)
+                assert not task.done()
+                handler.prefiller.before_turn("c2")
+                await asyncio.gather(task, return_exceptions=True)
+                assert task.cancelled()
+            assert metrics.counters["llm_prefills_dropped"] == 1
+            assert server.stats["requests"] == 0
+        finally:
+            await handler.close()
+            await llm.close()
+            await server.stop()
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Prefill tests passed")
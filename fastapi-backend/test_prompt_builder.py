@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test Prompt Layout for Prefix Caching
+"""
+from app.models.session_memory import SessionMemory
+from app.services.prompt_builder import PromptBuilder
+
+def test_static_prefix_is_stable_across_turns():
+    """The first system message must not change while the conversation goes on"""
+    builder = PromptBuilder()
+    memory = SessionMemory(language="en")
+    memory.user_name = "John"
+
+    memory.add_history("user", "Hello, I like travel.")
+    first = builder.build_messages(memory, memory.get_context_for_llm(), "Where should I go?")
+    memory.add_history("assistant", "Try Italy!")
+    memory.session_start_time -= 42
+    second = builder.build_messages(memory, memory.get_context_for_llm(), "What about food?")
+
+    assert first[0] == second[0]
+    assert "Session Duration" not in first[0]["content"]
+    assert "GRAMMAR_CORRECTION_START" in first[0]["content"]
+    # Volatile context sits right before the user turn
+    assert second[-2]["role"] == "system" and "Session Duration" in second[-2]["content"]
+    assert second[-1] == {"role": "user", "content": "What about food?"}
+    assert builder.get_stats()["prefix_misses"] == 1
+
+def test_prefix_depends_on_level_and_role_play():
+    builder = PromptBuilder()
+    memory = SessionMemory(language="en")
+    base = builder.get_static_prefix(memory)
+
+    memory.level = "easy"
+    easy = builder.get_static_prefix(memory)
+    assert easy != base and "Easy" in easy
+
+    memory.role_play_enabled = True
+    memory.role_play_template = "restaurant"
+    memory.organization_name = "Bella Vista"
+    role_play = builder.get_static_prefix(memory)
+    assert "Bella Vista" in role_play and "Waiter" in role_play
+    assert builder.get_static_prefix(memory) is role_play
+
+if __name__ == "__main__":
+    test_static_prefix_is_stable_across_turns()
+    test_prefix_depends_on_level_and_role_play()
+    print("✅ Prompt builder tests passed")
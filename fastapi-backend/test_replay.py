@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test Resumable Replies (sequence numbers, bounded replay buffer, resume after reconnect)
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+import pytest
+
+from app.api.websocket.replay import ReplayBuffer
+from app.config.settings import settings
+
+def test_sequence_numbers_and_bounds():
+    buffer = ReplayBuffer(enabled=True, max_messages=3, max_bytes=1000, ttl_s=60)
+    stamped = [buffer.stamp("c", {"type": "ai_text_chunk", "text": f"t{i}"}) for i in range(5)]
+    assert [m["seq"] for m in stamped] == [1, 2, 3, 4, 5] and buffer.last_seq("c") == 5
+    missing, gap = buffer.since("c", 3)
+    assert [m["seq"] for m in missing] == [4, 5] and not gap
+    # Only the last three are held
+    missing, gap = buffer.since("c", 0)
+    assert [m["seq"] for m in missing] == [3, 4, 5] and gap
+    assert buffer.since("c", 5) == ([], False)
+    # Clients are numbered independently
+    assert buffer.stamp("d", {"type": "ai_text"})["seq"] == 1
+    # Size bound: one large audio chunk pushes the older messages out
+    buffer.stamp("c", {"type": "ai_audio_chunk", "audio_base64": "A" * 980})
+    assert [m["seq"] for m in buffer.since("c", 0)[0]] == [6]
+    assert buffer.get_stats()["gaps"] == 2
+
+def test_messages_expire():
+    buffer = ReplayBuffer(enabled=True, ttl_s=0.01)
+    buffer.stamp("c", {"type": "ai_text", "text": "old"})
+    time.sleep(0.02)
+    assert buffer.since("c", 0) == ([], True)
+
+def test_idle_clients_and_total_size_are_bounded():
+    buffer = ReplayBuffer(enabled=True, max_bytes=1000, ttl_s=0.01, max_total_bytes=1500)
+    buffer.stamp("quiet", {"type": "ai_text", "text": "bye"})
+    time.sleep(0.02)
+    # Nobody resumes "quiet": it is dropped as soon as another client is served
+    buffer.stamp("busy", {"type": "ai_text", "text": "hello"})
+    assert buffer.get_stats()["clients"] == 1
+    assert buffer.since("quiet", 1) == ([], True)
+    # Over the total size the least recently used client goes first
+    buffer.ttl_s = 60
+    buffer.stamp("a", {"type": "ai_audio_chunk", "audio_base64": "A" * 700})
+    buffer.stamp("b", {"type": "ai_audio_chunk", "audio_base64": "B" * 700})
+    buffer.stamp("c", {"type": "ai_audio_chunk", "audio_base64": "C" * 700})
+    assert buffer.last_seq("a") == 0 and buffer.last_seq("c") == 1
+    assert buffer.total_bytes <= 1500
+    assert buffer.total_bytes == sum(log.bytes for log in buffer._clients.values())
+
+def test_reply_resumes_on_new_connection(make_handler, fake_websocket):
+    async def run():
+        db_path, settings.DB_PATH = settings.DB_PATH, os.path.join(tempfile.mkdtemp(), "replay.db")
+        handler = make_handler(delay=0.04)
+        first, second = fake_websocket(), fake_websocket()
+        try:
+            connection = asyncio.create_task(handler.handle_websocket(first))
+            await first.inbox.put({"type": "client_prefs", "client_id": "phone-1"})
+            await first.inbox.put({"type": "final_transcript", "text": "tell me something"})
+            while "ai_audio_chunk" not in first.types():
+                await asyncio.sleep(0.01)
+            await first.drop()
+            await asyncio.wait_for(connection, 2.0)
+            last_seq = max(m["seq"] for m in first.sent if "seq" in m)
+            # The reply keeps going while nobody is connected
+            while handler.replay.last_seq("phone-1") == last_seq:
+                await asyncio.sleep(0.01)
+
+            connection = asyncio.create_task(handler.handle_websocket(second))
+            await second.inbox.put({"type": "client_prefs", "client_id": "phone-1"})
+            await second.inbox.put({"type": "resume", "client_id": "phone-1", "last_seq": last_seq})
+            while "ai_audio_complete" not in second.types():
+                await asyncio.sleep(0.02)
+            await second.inbox.put(None)
+            await asyncio.wait_for(connection, 2.0)
+        finally:
+            settings.DB_PATH = db_path
+            await handler.close()
+
+        # Generated once; the new socket got only what the old one missed, in order
+        assert handler.llm_service.started == 1
+        assert "ai_interrupted" not in first.types() + second.types()
+        resumed = [m for m in second.sent if "seq" in m]
+        seqs = [m["seq"] for m in resumed]
+        assert seqs and seqs[0] > last_seq and seqs == sorted(seqs)
+        complete = next(m for m in second.sent if m["type"] == "resume_complete")
+        assert complete["gap"] is False and complete["replayed"] > 0
+        received = [m for m in first.sent + resumed if m["type"] == "ai_text_chunk"]
+        final_text = next(m["text"] for m in resumed if m["type"] == "ai_text")
+        assert "".join(m["text"] for m in received) == final_text
+        audio = [m for m in first.sent + resumed if m["type"] == "ai_audio_chunk"]
+        assert len(audio) == len({m["seq"] for m in audio})
+        assert handler._detached == {}
+    asyncio.run(run())
+
+def test_reply_cancelled_without_client_id(make_handler, fake_websocket):
+    async def run():
+        db_path, settings.DB_PATH = settings.DB_PATH, os.path.join(tempfile.mkdtemp(), "replay.db")
+        handler = make_handler(delay=0.04)
+        websocket = fake_websocket()
+        try:
+            connection = asyncio.create_task(handler.handle_websocket(websocket))
+            await websocket.inbox.put({"type": "final_transcript", "text": "tell me something"})
+            while "ai_audio_chunk" not in websocket.types():
+                await asyncio.sleep(0.01)
+            await websocket.drop()
+            await asyncio.wait_for(connection, 2.0)
+        finally:
+            settings.DB_PATH = db_path
+            await handler.close()
+        # Nobody can resume it, so it is not left running
+        assert handler.llm_service.closed == 1 and handler._detached == {}
+        assert not any("seq" in m for m in websocket.sent)
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Replay tests passed")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test Response Cache (exact, fuzzy, scoping and opt-outs)
+"""
+import time
+
+from app.models.session_memory import SessionMemory
+from app.services.response_cache import ResponseCache, normalize_utterance
+
+ANSWER = """GRAMMAR_CORRECTION_START
+INCORRECT: what your name
+CORRECT: What is your name?
+GRAMMAR_CORRECTION_END
+
+My name is SHCI. How can I help you?"""
+
+def make_cache(**kwargs) -> ResponseCache:
+    return ResponseCache(max_entries=100, ttl_seconds=60, fuzzy_threshold=0.6,
+                         max_words=12, enabled=True, **kwargs)
+
+def test_exact_and_fuzzy_hits():
+    cache = make_cache()
+    memory = SessionMemory(language="en")
+    cache.put(cache.make_key("What your name?", memory), ANSWER)
+
+    assert normalize_utterance("  WHAT your   name?! ") == "what your name"
+    assert cache.get(cache.make_key("what your name", memory)) == ANSWER
+
+    # Near-identical utterance: fuzzy hit without the utterance-specific correction
+    fuzzy = cache.get(cache.make_key("what is your name", memory))
+    assert fuzzy == "My name is SHCI. How can I help you?"
+    assert cache.get(cache.make_key("tell me about the weather", memory)) is None
+
+    stats = cache.get_stats()
+    assert stats["exact_hits"] == 1 and stats["fuzzy_hits"] == 1 and stats["misses"] == 1
+
+def test_scope_separates_level_and_context():
+    cache = make_cache()
+    memory = SessionMemory(language="en")
+    cache.put(cache.make_key("how are you", memory), "I'm fine, thanks!")
+
+    memory.level = "easy"
+    assert cache.get(cache.make_key("how are you", memory)) is None
+    memory.level = "medium"
+    memory.add_history("assistant", "Do you like football?")
+    assert cache.get(cache.make_key("how are you", memory)) is None
+
+def test_memory_references_and_personal_answers_are_not_cached():
+    cache = make_cache()
+    memory = SessionMemory(language="en")
+    memory.user_name = "Anna"
+    assert cache.make_key("what's my name", memory) is None
+    assert cache.make_key("remember that I like tea", memory) is None
+    assert cache.make_key("hello anna", memory) is None
+
+    key = cache.make_key("good morning", memory)
+    cache.put(key, "Good morning, Anna!", memory)
+    assert cache.get(key) is None
+
+def test_ttl_and_eviction():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60, enabled=True)
+    memory = SessionMemory(language="en")
+    for text in ("hello", "good night", "thank you"):
+        cache.put(cache.make_key(text, memory), text.upper())
+    assert cache.get_stats()["entries"] == 2
+    assert cache.get(cache.make_key("hello", memory)) is None
+
+    key = cache.make_key("thank you", memory)
+    cache._entries[key].created_at = time.time() - 120
+    assert cache.get(key) is None
+    assert cache.get_stats()["entries"] == 1
+
+if __name__ == "__main__":
+    test_exact_and_fuzzy_hits()
+    test_scope_separates_level_and_context()
+    test_memory_references_and_personal_answers_are_not_cached()
+    test_ttl_and_eviction()
+    print("✅ Response cache tests passed")
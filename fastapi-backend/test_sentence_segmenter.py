@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the Streaming Sentence Segmenter (abbreviations, numbers, languages, long sentences)
+"""
+import asyncio
+
+from app.services.tts_service import TTSService
+from app.utils.sentence_segmenter import SentenceSegmenter
+
+def segment(text, size, **kwargs):
+    segmenter = SentenceSegmenter(**kwargs)
+    chunks = []
+    for i in range(0, len(text), size):
+        chunks += segmenter.feed(text[i:i + size])
+    rest = segmenter.flush()
+    return chunks + ([rest] if rest else [])
+
+def test_same_chunks_for_any_token_size():
+    text = ("Hello Dr. Smith, it costs 3.5 dollars. J. K. Rowling wrote it! Really? "
+            "See e.g. the U.S. map... Then go.\n1. First item\nSecond line")
+    expected = ["Hello Dr. Smith, it costs 3.5 dollars.", "J. K. Rowling wrote it!", "Really?",
+                "See e.g. the U.S. map...", "Then go.", "1. First item", "Second line"]
+    for size in (1, 2, 5, 13, len(text)):
+        assert segment(text, size) == expected
+
+def test_no_split_on_colons_or_short_clauses():
+    # The old heuristic cut at every ":" and ";"
+    assert segment("Here is the plan: we go at 10:30; then lunch. Ok!", 4) == \
+        ["Here is the plan: we go at 10:30; then lunch.", "Ok!"]
+    # Quotes after the terminator stay with their sentence
+    assert segment('He said "stop." Then left.', 3) == ['He said "stop."', "Then left."]
+
+def test_language_rules():
+    assert segment("Il sig. Rossi è qui, sì è. Ecc. ok", 3, language="it") == \
+        ["Il sig. Rossi è qui, sì è.", "Ecc. ok"]
+    # "Sig." is not an English abbreviation; unknown languages fall back to the defaults
+    assert segment("Il sig. Rossi", 3, language="en") == ["Il sig.", "Rossi"]
+    assert segment("你好。我很好！谢谢", 2, language="zh") == ["你好。", "我很好！", "谢谢"]
+
+def test_long_sentences_split_at_commas_then_words():
+    text = ("This is a rather long sentence that goes on and on, with many words in it, "
+            "and then some more words after that comma too.")
+    assert segment(text, 3) == [
+        "This is a rather long sentence that goes on and on, with many words in it,",
+        "and then some more words after that comma too."
+    ]
+    chunks = segment(" ".join(["word"] * 25), 4, soft_max_words=4, hard_max_words=10)
+    assert [len(chunk.split()) for chunk in chunks] == [10, 10, 5]
+    # At the hard limit the last comma is preferred to a mid-clause cut
+    chunks = segment("one two three, four five six seven eight nine", 4, soft_max_words=5, hard_max_words=6)
+    assert chunks == ["one two three,", "four five six seven eight nine"]
+
+def test_tts_streaming_chunks_use_segmenter():
+    async def run():
+        service = TTSService.__new__(TTSService)
+        service.length_scale = 1.0
+        spoken = []
+
+        async def synthesize_text(text, **kwargs):
+            spoken.append(text)
+            return b"audio"
+
+        service.synthesize_text = synthesize_text
+
+        async def stream():
+            for token in ["Dr. Who", " paid 2.", "5 pounds.", " Bye"]:
+                yield token
+
+        results = [r async for r in service.synthesize_streaming_chunks(stream())]
+        assert spoken == ["Dr. Who paid 2.5 pounds.", "Bye"]
+        assert results[0]["audio_size"] == 5
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_same_chunks_for_any_token_size()
+    test_no_split_on_colons_or_short_clauses()
+    test_language_rules()
+    test_long_sentences_split_at_commas_then_words()
+    test_tts_streaming_chunks_use_segmenter()
+    print("✅ Sentence segmenter tests passed")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test Speculative Replies (partial transcripts, commit on match, cancel on change)
+"""
+import asyncio
+
+import pytest
+
+from app.models.session_memory import SessionMemory
+from app.services.speculation import Speculator
+from app.services.turn_deadline import SLOController
+from app.utils.metrics import metrics
+
+REPLY = "Rome is lovely in spring. The weather is mild."
+
+@pytest.fixture
+def speculating_handler(make_handler, fake_llm):
+    """Factory: a handler that speculates on partials stable for 20 ms"""
+    def make():
+        handler = make_handler(llm=fake_llm(REPLY, delay=0.01))
+        handler.speculator = Speculator(enabled=True, stable_ms=20, max_inflight=4)
+        return handler
+    return make
+
+async def speak(handler, websocket, mem, partials, final):
+    for text in partials:
+        handler.speculator.on_partial("c1", text, lambda t: handler.start_speculation(t, mem, "c1"))
+        await asyncio.sleep(0.005)
+    # Stable long enough for the speculative request to start and get ahead
+    await asyncio.sleep(0.08)
+    await handler.generate_and_send_response(websocket, final, mem, None, "c1")
+
+def test_matching_final_reuses_speculative_reply(speculating_handler, fake_websocket):
+    async def run():
+        handler = speculating_handler()
+        websocket = fake_websocket()
+        mem = SessionMemory()
+        await speak(handler, websocket, mem, ["tell me", "tell me about Rome"], "Tell me about Rome.")
+
+        assert handler.llm_service.requests == ["tell me about Rome"]
+        assert websocket.sent[[m["type"] for m in websocket.sent].index("ai_text")]["text"] == REPLY + " "
+        history = [(m["role"], m["content"]) for m in mem.conversation_context]
+        assert history == [("user", "Tell me about Rome."), ("assistant", REPLY + " ")]
+        stats = handler.speculator.get_stats()
+        assert stats["started"] == 1 and stats["hits"] == 1 and stats["hit_rate"] == 1.0
+        assert stats["avg_saved_ms"] > 0 and stats["inflight"] == 0
+        await handler.close()
+    asyncio.run(run())
+
+def test_changed_final_cancels_speculation(speculating_handler, fake_websocket):
+    async def run():
+        handler = speculating_handler()
+        websocket = fake_websocket()
+        mem = SessionMemory()
+        await speak(handler, websocket, mem, ["tell me about Rome"], "tell me about Rome and Milan")
+
+        # The speculative request was stopped and the turn asked for the real transcript
+        assert handler.llm_service.requests == ["tell me about Rome", "tell me about Rome and Milan"]
+        assert handler.llm_service.closed == 2
+        assert mem.conversation_context[0]["content"] == "tell me about Rome and Milan"
+        stats = handler.speculator.get_stats()
+        assert stats["hits"] == 0 and stats["misses"] == 1 and stats["hit_rate"] == 0.0
+        await handler.close()
+    asyncio.run(run())
+
+def test_speculation_never_touches_session_memory(speculating_handler):
+    async def run():
+        handler = speculating_handler()
+        mem = SessionMemory()
+        handler.speculator.on_partial("c1", "my name is anna", lambda t: handler.start_speculation(t, mem, "c1"))
+        await asyncio.sleep(0.08)
+        assert handler.speculator.get_stats()["started"] == 1
+        assert mem.user_name is None and mem.conversation_context == []
+        handler.speculator.forget("c1")
+        await handler.close()
+    asyncio.run(run())
+
+def test_speculation_is_degraded_like_the_turn(speculating_handler, fake_websocket):
+    async def run():
+        handler = speculating_handler()
+        handler.fillers.enabled = False
+        handler.slo = SLOController(handler.llm_service, handler.tts_speed, enabled=True, budget_ms=1000,
+                                    degradations=["grammar", "max_tokens"])
+        llm = handler.llm_service
+        metrics.reset()
+        # Under pressure from the start: both are degraded the same way and the reply is reused
+        llm.estimate_ttft_ms = lambda session_id=None: 5000
+        await speak(handler, fake_websocket(), SessionMemory(), ["tell me about Rome"], "tell me about Rome")
+        assert llm.requests == ["tell me about Rome"] and handler.speculator.hits == 1
+        # Decided for the turn only once
+        assert metrics.counters["slo_turns_degraded"] == 1
+
+        # Pressure builds after the speculative request started: the turn asks again, degraded
+        llm.estimate_ttft_ms = lambda session_id=None: 0
+        handler.speculator.on_partial("c1", "and Milan", lambda t: handler.start_speculation(t, SessionMemory(), "c1"))
+        await asyncio.sleep(0.05)
+        llm.estimate_ttft_ms = lambda session_id=None: 5000
+        await handler.generate_and_send_response(fake_websocket(), "and Milan", SessionMemory(), None, "c1")
+        assert llm.requests[1:] == ["and Milan", "and Milan"]
+        assert metrics.counters["speculation_miss_context"] == 1
+        await handler.close()
+    asyncio.run(run())
+
+def test_inflight_cap_and_restarts():
+    async def run():
+        speculator = Speculator(enabled=True, stable_ms=10, max_inflight=1)
+        started = []
+
+        async def source():
+            await asyncio.sleep(1.0)
+            yield "never"
+
+        def start(text):
+            started.append(text)
+            return ("sig",), None, source()
+
+        speculator.on_partial("a", "hello there", start)
+        speculator.on_partial("b", "good morning", start)
+        await asyncio.sleep(0.05)
+        assert started == ["hello there"] and speculator.get_stats()["skipped_cap"] == 1
+        # Repeating the same partial does not restart the timer or the request
+        speculator.on_partial("a", "Hello there!", start)
+        await asyncio.sleep(0.05)
+        assert started == ["hello there"]
+        # A different partial drops the held reply
+        speculator.on_partial("a", "hello there friend", start)
+        await asyncio.sleep(0.05)
+        assert started == ["hello there", "hello there friend"]
+        assert speculator.get_stats()["misses"] == 1 and speculator.inflight() == 1
+        # Wrong prompt context: not committed
+        assert speculator.claim("a", "hello there friend", ("other",)) is None
+        assert speculator.inflight() == 0
+        await speculator.close()
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Speculation tests passed")
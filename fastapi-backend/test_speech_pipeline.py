@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test the Speech Pipeline (concurrent segmenter, TTS workers and ordered sender)
+"""
+import asyncio
+import time
+
+from app.services.speech_pipeline import SpeechPipeline
+from app.utils.sentence_segmenter import SentenceSegmenter
+
+def make_pipeline(sent, delays, workers, events=None):
+    async def synthesize(chunk):
+        if events is not None:
+            events.append(("synth_start", chunk.strip(), time.perf_counter()))
+        await asyncio.sleep(delays.get(chunk.strip(), 0.0))
+        return None if chunk.strip() == "Silent." else f"audio:{chunk.strip()}"
+
+    async def emit_audio(chunk, audio):
+        sent.append((chunk.strip(), audio))
+
+    return SpeechPipeline(synthesize, emit_audio, SentenceSegmenter(), workers=workers, max_pending=4).start()
+
+def test_audio_sent_in_order_when_synthesis_finishes_out_of_order():
+    async def run():
+        sent = []
+        # The first chunk is the slowest to synthesize
+        delays = {"One.": 0.05, "Two.": 0.0, "Three.": 0.02}
+        pipeline = make_pipeline(sent, delays, workers=3)
+        for token in ["On", "e.", " Two", ".", " Silent.", " Three", "."]:
+            await pipeline.feed(token)
+        await pipeline.feed(" Trailing")
+        await pipeline.finish()
+        assert [chunk for chunk, _ in sent] == ["One.", "Two.", "Three.", "Trailing"]
+        assert sent[0][1] == "audio:One."
+        assert pipeline.chunks == 4 and len(pipeline.synth_ms) == 5
+        assert pipeline.first_audio_at is not None
+    asyncio.run(run())
+
+def test_synthesis_overlaps_reading():
+    async def run():
+        sent, events = [], []
+        pipeline = make_pipeline(sent, {"First.": 0.05}, workers=2, events=events)
+        started = time.perf_counter()
+        await pipeline.feed("First. ")
+        # The reader is not held up by synthesis of the first chunk
+        assert time.perf_counter() - started < 0.03
+        await asyncio.sleep(0.01)
+        assert events and events[0][1] == "First." and not sent
+        await pipeline.feed("Second.")
+        await pipeline.finish()
+        assert [chunk for chunk, _ in sent] == ["First.", "Second."]
+    asyncio.run(run())
+
+def test_serial_mode_and_close():
+    async def run():
+        sent = []
+        pipeline = make_pipeline(sent, {"Ok.": 0.01}, workers=0)
+        await pipeline.feed("Ok. ")
+        # Serial mode synthesizes and sends inline
+        assert sent == [("Ok.", "audio:Ok.")]
+        await pipeline.feed("b")
+        await pipeline.finish()
+        assert [chunk for chunk, _ in sent] == ["Ok.", "b"]
+
+        # Closing mid-turn cancels every stage without sending more audio
+        sent = []
+        pipeline = make_pipeline(sent, {"Slow.": 1.0}, workers=2)
+        await pipeline.feed("Slow. ")
+        await asyncio.sleep(0.01)
+        await pipeline.close()
+        assert sent == [] and pipeline._tasks == []
+    asyncio.run(run())
+
+def test_failed_chunk_does_not_stall_the_turn():
+    async def run():
+        sent = []
+
+        async def synthesize(chunk):
+            if "Bad" in chunk:
+                raise RuntimeError("tts failed")
+            return "audio"
+
+        async def emit_audio(chunk, audio):
+            sent.append(chunk.strip())
+
+        pipeline = SpeechPipeline(synthesize, emit_audio, SentenceSegmenter(), workers=2, max_pending=1).start()
+        for text in ["Bad.", " Good.", " Also good."]:
+            await pipeline.feed(text)
+        await asyncio.wait_for(pipeline.finish(), 1.0)
+        assert sent == ["Good.", "Also good."]
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_audio_sent_in_order_when_synthesis_finishes_out_of_order()
+    test_synthesis_overlaps_reading()
+    test_serial_mode_and_close()
+    test_failed_chunk_does_not_stall_the_turn()
+    print("✅ Speech pipeline tests passed")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test Incremental SSE Parser
+"""
+import json
+from app.utils.sse_parser import SSEParser, extract_delta_content, DONE
+
+def _chunk(content: str) -> bytes:
+    return ('data: {"choices":[{"index":0,"delta":{"content":%s},"finish_reason":null}]}\n\n'
+            % json.dumps(content)).encode("utf-8")
+
+def test_frames_split_across_reads():
+    """Frames cut at every possible byte offset still produce the same tokens"""
+    body = _chunk("Hello") + _chunk(" wörld") + _chunk("!") + b"data: [DONE]\n\n"
+    for size in range(1, len(body)):
+        parser = SSEParser()
+        events = []
+        for i in range(0, len(body), size):
+            events.extend(parser.feed(body[i:i + size]))
+        tokens = [extract_delta_content(e) for e in events if e != DONE]
+        assert tokens == ["Hello", " wörld", "!"], size
+        assert events[-1] == DONE
+
+def test_multiline_data_and_crlf():
+    """Multi-line data fields are joined and CRLF line endings are accepted"""
+    parser = SSEParser()
+    events = parser.feed(b": keep-alive\r\nevent: message\r\ndata: {\"a\":\r\ndata: 1}\r\n\r\n")
+    assert events == [b'{"a":\n1}']
+    # CR at the end of one read and LF at the start of the next
+    events = parser.feed(b"data: x\r")
+    events += parser.feed(b"\n\r\n")
+    assert events == [b"x"]
+
+def test_flush_dispatches_unterminated_event():
+    parser = SSEParser()
+    assert parser.feed(b"data: tail") == []
+    assert parser.flush() == [b"tail"]
+
+def test_extract_delta_content_paths():
+    """Fast path, escaped strings, null content and slow-path fallbacks"""
+    assert extract_delta_content(_chunk('say "hi"\n')) == 'say "hi"\n'
+    assert extract_delta_content(_chunk("back\\slash")) == "back\\slash"
+    assert extract_delta_content(b'{"choices":[{"delta":{"role":"assistant"}}]}') is None
+    assert extract_delta_content(b'{"choices":[{"delta":{"content":null}}]}') is None
+    assert extract_delta_content(b'{"choices":[{"delta":{}, "finish_reason":"stop"}],"usage":{"content":"x"}}') is None
+    assert extract_delta_content(b'{"model":"delta","choices":[{"delta" : { "content" : "ok"}}]}') == "ok"
+    assert extract_delta_content(b'not json') is None
+
+if __name__ == "__main__":
+    test_frames_split_across_reads()
+    test_multiline_data_and_crlf()
+    test_flush_dispatches_unterminated_event()
+    test_extract_delta_content_paths()
+    print("✅ SSE parser tests passed")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test Background Conversation Summarization
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.models.session_memory import SessionMemory
+from app.services.prompt_builder import PromptBuilder
+from app.services.summarizer import ConversationSummarizer
+
+def summaries(count: int = 50):
+    """Canned summaries, numbered so a merge can be traced to the summary it was given"""
+    return [f"Summary #{i}: the user is called Anna." for i in range(1, count + 1)]
+
+def make_memory(turns: int) -> SessionMemory:
+    memory = SessionMemory(language="en")
+    for i in range(turns):
+        memory.add_history("user" if i % 2 == 0 else "assistant", f"Turn {i}")
+    return memory
+
+def test_compacts_oldest_block_and_bounds_prompt(fake_llm):
+    async def run():
+        llm = fake_llm(summaries())
+        summarizer = ConversationSummarizer(llm, trigger_turns=8, keep_turns=4, enabled=True)
+        builder = PromptBuilder()
+        memory = make_memory(6)
+        assert summarizer.schedule(memory) is None
+
+        sizes = []
+        for i in range(6, 40):
+            memory.add_history("user" if i % 2 == 0 else "assistant", f"Turn {i}")
+            task = summarizer.schedule(memory)
+            if task:
+                await task
+            messages = builder.build_messages(memory, memory.get_context_for_llm(), "Next")
+            sizes.append(len(messages))
+
+        assert memory.running_summary.startswith("Summary #")
+        # Compacted turns are replaced by the summary message
+        context = memory.get_context_for_llm()
+        assert all(int(turn["content"].split()[1]) > 0 for turn in context)
+        assert len(memory.get_unsummarized_turns()) <= 8
+        assert "Summary #" in messages[1]["content"]
+        assert max(sizes[-10:]) <= 8 + 4
+        # The previous summary is fed back in when merging
+        assert "Summary #1" in llm.calls[1][1]["content"]
+    asyncio.run(run())
+
+def test_failed_summary_keeps_turns_and_backs_off():
+    class FailingLLM:
+        calls = 0
+
+        async def generate_response(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+            FailingLLM.calls += 1
+            return None
+
+    async def run():
+        summarizer = ConversationSummarizer(FailingLLM(), trigger_turns=4, keep_turns=2, enabled=True, retry_s=30)
+        memory = make_memory(10)
+        await summarizer.schedule(memory)
+        assert memory.running_summary == ""
+        assert memory.summarized_until == 0
+        assert len(memory.get_context_for_llm()) == 10
+
+        # The next turn does not ask the server that just failed again
+        memory.add_history("user", "Turn 10")
+        assert summarizer.schedule(memory) is None
+        assert FailingLLM.calls == 1
+
+        # Once the wait is over it is retried, and the next wait is twice as long
+        failures, retry_at = summarizer._backoff[memory]
+        summarizer._backoff[memory] = (failures, retry_at - 30)
+        await summarizer.schedule(memory)
+        failures, retry_at = summarizer._backoff[memory]
+        assert FailingLLM.calls == 2 and failures == 2
+        assert retry_at - time.monotonic() > 30
+    asyncio.run(run())
+
+def test_summary_survives_persistence():
+    memory = make_memory(4)
+    memory.apply_summary("Anna likes Rome.", 2)
+    restored = SessionMemory()
+    restored.load_from_dict(memory.to_dict())
+    assert restored.running_summary == "Anna likes Rome."
+    assert [turn["content"] for turn in restored.get_context_for_llm()] == ["Turn 2", "Turn 3"]
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Summarizer tests passed")
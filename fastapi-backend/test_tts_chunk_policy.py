@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test Adaptive TTS Chunk Sizing (real-time factor, queued client audio)
+"""
+import asyncio
+import base64
+import io
+import wave
+
+from app.services.speech_pipeline import SpeechPipeline
+from app.services.tts_chunk_policy import TTSChunkPolicy, TTSSpeedTracker, wav_duration_s
+from app.utils.sentence_segmenter import SentenceSegmenter
+
+def make_wav(seconds, rate=8000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b"\0\0" * int(seconds * rate))
+    return buffer.getvalue()
+
+def test_wav_duration_raw_and_base64():
+    audio = make_wav(1.25)
+    assert abs(wav_duration_s(audio) - 1.25) < 1e-6
+    assert abs(wav_duration_s(base64.b64encode(audio).decode()) - 1.25) < 1e-6
+
+def test_tracker_averages_per_voice():
+    tracker = TTSSpeedTracker(alpha=0.5)
+    assert tracker.get("a") is None
+    tracker.observe("a", words=10, synth_s=1.0, audio_s=4.0)
+    tracker.observe("a", words=10, synth_s=3.0, audio_s=4.0)
+    rtf, s_per_word = tracker.get("a")
+    assert abs(rtf - 0.5) < 1e-9 and abs(s_per_word - 0.4) < 1e-9
+    assert tracker.get("b") is None
+
+def test_chunk_size_follows_queued_audio():
+    tracker = TTSSpeedTracker()
+    tracker.observe("v", words=10, synth_s=0.4, audio_s=4.0)  # rtf 0.1, 0.4 s/word
+    policy = TTSChunkPolicy(tracker, "v", enabled=True, first_words=5, max_words=30)
+    segmenter = SentenceSegmenter()
+
+    policy.configure(segmenter)
+    assert (segmenter.min_words, segmenter.soft_max_words) == (1, 5)
+    policy.on_chunk("Hello there.")
+    # Nothing queued yet: stay small
+    policy.configure(segmenter)
+    assert segmenter.soft_max_words == 5
+    # 2s queued -> 2 * 0.7 / (0.1 * 0.4) = 35 words affordable, capped at 30
+    policy.on_audio_sent(make_wav(2.0))
+    policy.configure(segmenter)
+    assert segmenter.soft_max_words == 30 and segmenter.min_words == 15
+    assert policy._current["mode"] == "adaptive" and policy._current["queued_ms"] > 1900
+    # A slow voice can afford less for the same queue
+    tracker.observe("v", words=10, synth_s=40.0, audio_s=4.0)
+    policy.configure(segmenter)
+    assert segmenter.soft_max_words < 30
+
+    disabled = TTSChunkPolicy(tracker, "v", enabled=False)
+    segmenter = SentenceSegmenter(soft_max_words=12)
+    disabled.configure(segmenter)
+    assert segmenter.soft_max_words == 12 and segmenter.min_words == 1
+
+def test_pipeline_grows_chunks_after_first_audio():
+    async def run():
+        sent = []
+
+        async def synthesize(chunk):
+            await asyncio.sleep(0.001)
+            return make_wav(0.4 * len(chunk.split()))
+
+        async def emit_audio(chunk, audio):
+            sent.append(chunk)
+
+        policy = TTSChunkPolicy(TTSSpeedTracker(), "v", enabled=True, first_words=4, max_words=40)
+        pipeline = SpeechPipeline(synthesize, emit_audio, SentenceSegmenter(), workers=0, policy=policy).start()
+        for sentence in ["Hi there.", "This is sentence two.", "And a third one here.", "Then four.",
+                         "Five comes next.", "Six is last."]:
+            await pipeline.feed(sentence + " ")
+        await pipeline.finish()
+
+        assert sent[0] == "Hi there."
+        # Later, short sentences are merged into bigger chunks
+        assert len(sent) < 6 and " ".join(sent).split() == \
+            "Hi there. This is sentence two. And a third one here. Then four. Five comes next. Six is last.".split()
+        decisions = pipeline.get_stats()["decisions"]
+        assert [d["mode"] for d in decisions][:2] == ["first", "adaptive"]
+        assert [d["words"] for d in decisions] == [len(chunk.split()) for chunk in sent]
+        assert "first" in policy.summary()
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_wav_duration_raw_and_base64()
+    test_tracker_averages_per_voice()
+    test_chunk_size_follows_queued_audio()
+    test_pipeline_grows_chunks_after_first_audio()
+    print("✅ TTS chunk policy tests passed")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test Turn Deadlines (latency prediction, graded degradations, achieved latency)
+"""
+import asyncio
+
+import pytest
+
+from app.config.prompts import GRAMMAR_SKIP_PROMPT
+from app.config.settings import settings
+from app.models.session_memory import SessionMemory
+from app.services.llm_service import LLMService
+from app.services.prompt_builder import PromptBuilder
+from app.services.tts_chunk_policy import TTSSpeedTracker
+from app.services.turn_deadline import SLOController, TurnDeadline
+
+REPLY = "Sure, here is a short answer."
+
+class EstimatingLLM:
+    """Reports a fixed TTFT estimate and records each request"""
+
+    def __init__(self, ttft_ms):
+        self.ttft_ms = ttft_ms
+        self.requests = []
+
+    def estimate_ttft_ms(self, session_id=None):
+        return self.ttft_ms
+
+    def create_context_messages(self, history, max_turns=None):
+        return history
+
+    async def generate_streaming_response(self, messages, **kwargs):
+        deadline = kwargs.get("deadline")
+        max_tokens = deadline.max_tokens(kwargs["max_tokens"]) if deadline else kwargs["max_tokens"]
+        self.requests.append({"messages": messages, "max_tokens": max_tokens})
+        for word in REPLY.split(" "):
+            yield word + " "
+
+def controller(ttft_ms, degradations=("cache", "grammar", "max_tokens", "voice")):
+    return SLOController(EstimatingLLM(ttft_ms), TTSSpeedTracker(), enabled=True, budget_ms=1000,
+                         risk_ratio=0.8, degradations=list(degradations))
+
+def test_degradations_are_graded_by_predicted_latency():
+    fast_voices, settings.SLO_FAST_VOICES = settings.SLO_FAST_VOICES, {"en": "en_US-fast-low"}
+    try:
+        assert controller(500).new_deadline("s", "en", None).degradations == {}
+        assert list(controller(850).new_deadline("s", "en", None).degradations) == ["cache"]
+        assert list(controller(1100).new_deadline("s", "en", None).degradations) == ["cache", "grammar"]
+        assert list(controller(2000).new_deadline("s", "en", None).degradations) == [
+            "cache", "grammar", "max_tokens", "voice"]
+        # No fast voice for Italian: that step is skipped, not counted
+        assert "voice" not in controller(2000).new_deadline("s", "it", None).degradations
+        # Measured TTS speed adds the first chunk's synthesis time
+        slo = controller(600)
+        slo.tts_speed.observe("v", words=10, synth_s=0.5, audio_s=5.0)
+        assert abs(slo.predict_first_audio_ms("s", "v") - (600 + 0.1 * 0.5 * settings.TTS_FIRST_CHUNK_WORDS * 1000)) < 1e-6
+    finally:
+        settings.SLO_FAST_VOICES = fast_voices
+
+def test_deadline_decisions_and_achieved_latency():
+    fast_voices, settings.SLO_FAST_VOICES = settings.SLO_FAST_VOICES, {"en": "en_US-fast-low"}
+    try:
+        deadline = TurnDeadline(1000, started_at=100.0)
+        assert deadline.max_tokens(130) == 130 and deadline.voice("en", "v") == "v"
+        assert deadline.cache_threshold() is None
+        for name in ("cache", "max_tokens", "voice"):
+            deadline.apply(name)
+        assert deadline.max_tokens(130) == int(130 * settings.SLO_MAX_TOKENS_RATIO)
+        assert deadline.voice("en", "v") == "en_US-fast-low" and deadline.voice("it", "v") == "v"
+        assert deadline.cache_threshold() == settings.SLO_CACHE_FUZZY_THRESHOLD
+        assert deadline.remaining_ms(now=100.25) == 750
+        assert deadline.finish(None) is None
+        assert round(deadline.finish(101.25)) == 1250 and deadline.achieved_ms > deadline.budget_ms
+    finally:
+        settings.SLO_FAST_VOICES = fast_voices
+
+def test_grammar_skip_keeps_cached_prefix():
+    builder = PromptBuilder()
+    mem = SessionMemory()
+    normal = builder.build_messages(mem, [], "hello")
+    skipped = builder.build_messages(mem, [], "hello", skip_grammar=True)
+    assert normal[0] == skipped[0]
+    assert GRAMMAR_SKIP_PROMPT not in normal[-2]["content"] and skipped[-2]["content"].endswith(GRAMMAR_SKIP_PROMPT)
+
+def test_turn_under_pressure_is_degraded(make_handler, fake_websocket):
+    async def run():
+        fast_voices, settings.SLO_FAST_VOICES = settings.SLO_FAST_VOICES, {"en": "en_US-fast-low"}
+        try:
+            handler = make_handler(llm=EstimatingLLM(5000))
+            handler.fillers.enabled = False
+            handler.slo = SLOController(handler.llm_service, handler.tts_speed, enabled=True, budget_ms=1000)
+            mem = SessionMemory()
+            await handler.handle_final_transcript(fake_websocket(), {"text": "tell me a story"}, mem, None, "d1")
+
+            request = handler.llm_service.requests[0]
+            assert request["messages"][-2]["content"].endswith(GRAMMAR_SKIP_PROMPT)
+            assert request["max_tokens"] < 130
+            assert handler.tts_service.voices and set(handler.tts_service.voices) == {"en_US-fast-low"}
+            assert mem.conversation_context[-1]["content"] == REPLY + " "
+            await handler.close()
+        finally:
+            settings.SLO_FAST_VOICES = fast_voices
+    asyncio.run(run())
+
+def test_degraded_reply_is_not_cached(make_handler, fake_websocket):
+    async def run():
+        handler = make_handler(llm=EstimatingLLM(5000))
+        handler.fillers.enabled = False
+        handler.response_cache.enabled = True
+        handler.slo = SLOController(handler.llm_service, handler.tts_speed, enabled=True, budget_ms=1000,
+                                    degradations=["grammar", "max_tokens"])
+        await handler.handle_final_transcript(fake_websocket(), {"text": "tell me a story"}, SessionMemory(), None, "d1")
+        assert handler.response_cache.get_stats()["entries"] == 0
+
+        # The server is idle again: the same utterance gets a full, corrected reply and that one is cached
+        handler.llm_service.ttft_ms = 0
+        await handler.handle_final_transcript(fake_websocket(), {"text": "tell me a story"}, SessionMemory(), None, "d1")
+        first, second = handler.llm_service.requests
+        assert first["max_tokens"] < second["max_tokens"]
+        assert not second["messages"][-2]["content"].endswith(GRAMMAR_SKIP_PROMPT)
+        assert handler.response_cache.get_stats()["entries"] == 1
+        await handler.close()
+    asyncio.run(run())
+
+def test_llm_ttft_estimate():
+    service = LLMService()
+    assert service.estimate_ttft_ms() is None
+    for backend in service.router.backends:
+        backend.ewma_ttft_ms = 400.0
+    assert service.estimate_ttft_ms() == 400.0
+
+if __name__ == "__main__":
+    # The fakes are conftest.py fixtures
+    if pytest.main(["-q", __file__]) == 0:
+        print("✅ Turn deadline tests passed")
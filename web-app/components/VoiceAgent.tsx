@@ -251,6 +251,8 @@ export default function VoiceAgent() {
         }
     };
     const clientIdRef = useRef<string>(getClientId());
+    // Sequence number of the last reply message received (for resuming after a reconnect)
+    const lastSeqRef = useRef<number>(0);
 
     // ---------- Voice Configuration ----------
     const voiceConfig = {
@@ -1536,6 +1538,15 @@ export default function VoiceAgent() {
                             length_scale: lengthScale,
                             speed_level: level
                         }));
+
+                        // Reconnected: fetch the reply messages we missed
+                        if (lastSeqRef.current > 0) {
+                            ws.current?.send(JSON.stringify({
+                                type: "resume",
+                                client_id: clientIdRef.current,
+                                last_seq: lastSeqRef.current
+                            }));
+                        }
                     } catch { }
 
                     if (keepAliveTimer.current) clearInterval(keepAliveTimer.current);
@@ -1547,7 +1558,16 @@ export default function VoiceAgent() {
                 ws.current.onmessage = async (event) => {
                     try {
                         const data = JSON.parse(event.data);
+                        if (typeof data.seq === "number") {
+                            lastSeqRef.current = data.seq;
+                        }
                         switch (data.type) {
+                            case "resume_complete":
+                                console.log("📼 Resumed:", data.replayed, "messages replayed", data.gap ? "(some expired)" : "");
+                                // The server restarts numbering for clients it has forgotten
+                                lastSeqRef.current = data.last_seq;
+                                break;
+
                             case "ai_text_chunk":
                                 console.log("🤖 AI Text chunk received:", data.text);
                                 // Clear previous text and start fresh for new response
@@ -1591,6 +1611,13 @@ export default function VoiceAgent() {
                                 }
                                 break;
 
+                            case "ai_interrupted":
+                                console.log("✋ AI reply interrupted:", data.reason);
+                                // Drop audio already queued for the cancelled reply
+                                stopAllAudio();
+                                setAiSpeaking(false);
+                                break;
+
                             case "ai_audio_complete":
                                 console.log("🔊 AI Audio streaming completed");
                                 // Reset speaking state when all audio is complete
@@ -290,8 +290,9 @@ export class WebkitVADService {
       this.callbacks.onSpeechResult?.(speechResult.transcript, false, speechResult.confidence);
       this.callbacks.onInterimResult?.(speechResult.transcript, speechResult.confidence);
       
-      // Send interim result to WebSocket immediately for instant feedback
-      this.sendToWebSocket('interim_transcript', speechResult.transcript, speechResult.confidence);
+      // Send interim result to WebSocket immediately; the server speculatively
+      // starts the reply once it stops changing
+      this.sendToWebSocket('partial_transcript', speechResult.transcript, speechResult.confidence);
     }
   }
 